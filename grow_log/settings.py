@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/4.1/ref/settings/
 import os.path
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 FIXTURE_DIRS = [os.path.join(BASE_DIR, 'fixtures')]
@@ -75,14 +77,69 @@ WSGI_APPLICATION = 'grow_log.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
+# SQLite at DJANGO_SQLITE_PATH unless DJANGO_DB_ENGINE is 'postgresql', SQLite serializes writers, PostgreSQL lets
+# several grow rooms post at the same time. Connections stay open for DJANGO_CONN_MAX_AGE seconds, checked before they
+# are reused. To pool them across processes, point POSTGRES_HOST at PgBouncer in transaction mode and set
+# POSTGRES_PGBOUNCER, which turns off the server side cursors of QuerySet.iterator() a pooled connection cannot keep.
+# Tests create the database 'test_' + POSTGRES_DB, and need a direct connection, see the test_db service of
+# docker-compose.yml.
+
+DB_ENGINE = os.environ.get('DJANGO_DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'grow_log'),
+            'USER': os.environ.get('POSTGRES_USER', 'grow_log'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'DISABLE_SERVER_SIDE_CURSORS': bool(os.environ.get('POSTGRES_PGBOUNCER')),
+            'OPTIONS': {
+                'connect_timeout': 10,
+            },
+        }
+    }
+elif DB_ENGINE == 'sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DJANGO_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 0)),
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DJANGO_DB_ENGINE must be 'sqlite3' or 'postgresql', not {DB_ENGINE!r}.")
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+# the 'records' cache holds rendered weeks of the cycle table and the lookups of image variants. It lives on disk in
+# RECORDS_CACHE_DIR, shared by every process using the directory, so invalidations made by the task worker reach the
+# web processes. A part of the entries is culled once RECORDS_CACHE_MAX_ENTRIES is reached. Tests use a temporary
+# directory, see grow_log.test_runner.
 
-DATABASES = {
+RECORDS_CACHE_DIR = os.environ.get('RECORDS_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'records'))
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'records': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': RECORDS_CACHE_DIR,
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('RECORDS_CACHE_MAX_ENTRIES', 2000)),
+        },
+    },
 }
 
+TEST_RUNNER = 'grow_log.test_runner.TestRunner'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -132,3 +189,24 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # https://docs.djangoproject.com/en/4.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Sensors
+# hour of the day, in TIME_ZONE, the lights of the grow room switch on. Sensor readings from lights on until the end
+# of the photoperiod of the phase roll up into the day fields of a log, the rest of the day into the night fields.
+
+RECORDS_LIGHTS_ON_HOUR = int(os.environ.get('RECORDS_LIGHTS_ON_HOUR', 6))
+
+
+# Retention
+# ages, in days, after which raw sensor readings are compacted into their hourly rollups, cycles whose last log is
+# older are archived to RECORDS_ARCHIVE_DIR and removed, and finished background tasks are deleted. None keeps them.
+# Applied daily by the task worker once scheduled with `manage.py compact_records --schedule`.
+
+RECORDS_RETENTION = {
+    'raw_readings_days': int(os.environ.get('RECORDS_RAW_READINGS_DAYS', 30)),
+    'archive_cycles_days': int(os.environ['RECORDS_ARCHIVE_CYCLES_DAYS'])
+    if os.environ.get('RECORDS_ARCHIVE_CYCLES_DAYS') else None,
+    'tasks_days': int(os.environ.get('RECORDS_TASKS_DAYS', 7)),
+}
+RECORDS_ARCHIVE_DIR = os.environ.get('RECORDS_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive'))
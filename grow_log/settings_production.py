@@ -0,0 +1,64 @@
+"""
+Production settings for grow_log project.
+
+Used by the Docker image, which serves `grow_log.wsgi` with gunicorn, see gunicorn.conf.py. Everything not set here
+comes from grow_log.settings. Configured through the environment:
+
+    DJANGO_SECRET_KEY            required, the secret key
+    DJANGO_ALLOWED_HOSTS         comma separated host names, defaults to localhost
+    DJANGO_CSRF_TRUSTED_ORIGINS  comma separated origins, e.g. https://grow.example.com
+    DJANGO_CONN_MAX_AGE          seconds a worker keeps its database connection open, defaults to 600
+    DJANGO_DB_ENGINE             'sqlite3' or 'postgresql', with the POSTGRES_* variables, see grow_log.settings
+    DJANGO_LOG_LEVEL             level of the messages written to the container log, defaults to WARNING
+    RECORDS_CACHE_DIR            directory of the records cache, shared by the gunicorn workers and the task worker,
+                                 a volume mounted in every container, defaults to BASE_DIR/.cache/records
+"""
+import os
+
+from .settings import *  # noqa: F401, F403
+from .settings import DATABASES, MIDDLEWARE
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+CSRF_TRUSTED_ORIGINS = [origin for origin in os.environ.get('DJANGO_CSRF_TRUSTED_ORIGINS', '').split(',') if origin]
+
+
+# Database
+# every gunicorn worker keeps its connection instead of opening one per request, checked before it is reused
+
+DATABASES['default'].update({
+    'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', 600)),
+    'CONN_HEALTH_CHECKS': True,
+})
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # wait for the write lock held by another worker instead of failing with "database is locked"
+    DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 20
+
+
+# Static files
+# collected into STATIC_ROOT at build time and served by WhiteNoise, compressed and under content hashed names
+# browsers may cache forever
+
+MIDDLEWARE = MIDDLEWARE[:1] + ['whitenoise.middleware.WhiteNoiseMiddleware'] + MIDDLEWARE[1:]
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+
+# Logging
+# errors go to the container log, there is no debug page to show them
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.environ.get('DJANGO_LOG_LEVEL', 'WARNING'),
+    },
+}
@@ -0,0 +1,27 @@
+"""
+Test runner of grow_log project.
+
+Runs the tests with the records cache in a temporary directory, so they neither read entries cached by the
+development server nor leave any behind in RECORDS_CACHE_DIR.
+"""
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs) -> None:
+        super().setup_test_environment(**kwargs)
+        self.cache_dir: str = tempfile.mkdtemp(prefix='records-cache-')
+        caches = {alias: dict(config) for alias, config in settings.CACHES.items()}
+        caches['records']['LOCATION'] = self.cache_dir
+        self.cache_override = override_settings(CACHES=caches)
+        self.cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs) -> None:
+        self.cache_override.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,24 @@
+"""
+gunicorn configuration of the production image, see grow_log/settings_production.py.
+
+Run from the project directory with `gunicorn`, which reads this file. Configured through the environment:
+
+    GUNICORN_BIND     address to listen on, defaults to 0.0.0.0:8000
+    GUNICORN_WORKERS  number of worker processes, defaults to 2 per CPU plus one
+    GUNICORN_THREADS  number of threads per worker, defaults to 2
+"""
+import multiprocessing
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'grow_log.settings_production')
+
+wsgi_app = 'grow_log.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# every thread keeps its own persistent database connection
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+timeout = 30
+# restart workers after a while, so a slow leak cannot grow without bounds
+max_requests = 2000
+max_requests_jitter = 200
+accesslog = '-'
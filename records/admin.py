@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Cycle, Log, Nutrient, NutrientLog, ReservoirLog
+from .models import Cycle, CycleSummary, Log, Nutrient, NutrientLog, ReservoirLog, SensorReading, SensorRollup, Task
 
 # Register your models here.
 
@@ -8,3 +8,7 @@ admin.site.register(Log)
 admin.site.register(Nutrient)
 admin.site.register(NutrientLog)
 admin.site.register(ReservoirLog)
+admin.site.register(CycleSummary)
+admin.site.register(Task)
+admin.site.register(SensorReading)
+admin.site.register(SensorRollup)
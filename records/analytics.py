@@ -0,0 +1,116 @@
+import math
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Sum
+
+from .models import Cycle, Log, NutrientLog, ReservoirLog
+
+# numeric Log fields summarized per phase, and their labels
+SUMMARY_METRICS: Dict[str, str] = {
+    'temperature_day': 'Day temperature',
+    'temperature_night': 'Night temperature',
+    'humidity_day': 'Day humidity',
+    'humidity_night': 'Night humidity',
+    'ph': 'pH',
+    'ec': 'EC',
+    'light_height': 'Light height',
+    'light_power': 'Light power',
+    'carbon_dioxide': 'co2',
+}
+
+
+def _to_number(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (Decimal, float)):
+        return round(float(value), 2)
+    return value
+
+
+def _metric_aggregates(metric: str) -> Dict:
+    # the standard deviation is derived from the mean of squares, StdDev fails on SQLite when a phase has no values
+    return {
+        f'{metric}_min': Min(metric),
+        f'{metric}_max': Max(metric),
+        f'{metric}_mean': Avg(metric, output_field=FloatField()),
+        f'{metric}_mean_square': Avg(F(metric) * F(metric), output_field=FloatField()),
+    }
+
+
+def _metric_statistics(row: Dict, metric: str) -> Dict:
+    mean: Optional[float] = row[f'{metric}_mean']
+    stddev: Optional[float] = None
+    if mean is not None:
+        stddev = math.sqrt(max(row[f'{metric}_mean_square'] - mean * mean, 0))
+    return {
+        'min': _to_number(row[f'{metric}_min']),
+        'max': _to_number(row[f'{metric}_max']),
+        'mean': _to_number(mean),
+        'stddev': _to_number(stddev),
+    }
+
+
+def get_phase_summary(cycle: Cycle) -> List[Dict]:
+    """
+    A function to summarize the logs of a cycle by phase, with every statistic computed by the database.
+
+    Metric statistics, log counts and dates come from a single query grouped by phase, water from a second one and
+    nutrient usage from a third one grouped by phase and nutrient, so the number of queries does not depend on the
+    number of logs, metrics or phases.
+
+    Parameters:
+        cycle (Cycle): The Cycle object to summarize.
+
+    Returns:
+        List[Dict]: A dictionary per phase with logs, in phase order, holding:
+                    'phase' and 'label': the phase and its display name,
+                    'days': the number of logs of the phase,
+                    'start' and 'end': the dates of its first and last log,
+                    'duration': the number of calendar days from start to end, both included,
+                    'metrics': for every SUMMARY_METRICS field, its 'label', 'min', 'max', 'mean' and population
+                               'stddev', None if the phase has no value for it,
+                    'water': the water of its reservoir logs, in litres,
+                    'nutrients': the total concentration of every nutrient used, as dictionaries with 'nutrient_id',
+                                 'name', 'brand' and 'concentration'.
+    """
+    aggregates: Dict = {}
+    for metric in SUMMARY_METRICS:
+        aggregates.update(_metric_aggregates(metric))
+    phase_rows = (
+        Log.objects.filter(cycle=cycle).values('phase')
+        .annotate(days=Count('id'), start=Min('date'), end=Max('date'), **aggregates)
+        .order_by('phase_order')
+    )
+    water_by_phase: Dict[str, int] = dict(
+        ReservoirLog.objects.filter(log__cycle=cycle).order_by().values('log__phase')
+        .annotate(total=Sum('water')).values_list('log__phase', 'total')
+    )
+    nutrients_by_phase: Dict[str, List[Dict]] = {}
+    nutrient_rows = (
+        NutrientLog.objects.filter(log__cycle=cycle).order_by().values('log__phase', 'nutrient_id')
+        .annotate(name=Min('nutrient__name'), brand=Min('nutrient__brand'), concentration=Sum('concentration'))
+        .order_by('log__phase', 'brand', 'name')
+    )
+    for row in nutrient_rows:
+        nutrients_by_phase.setdefault(row.pop('log__phase'), []).append(row)
+
+    phase_labels: Dict[str, str] = dict(Log.PHASE_CHOICES)
+    summary: List[Dict] = []
+    for row in phase_rows:
+        phase: str = row['phase']
+        summary.append({
+            'phase': phase,
+            'label': phase_labels.get(phase, phase),
+            'days': row['days'],
+            'start': row['start'],
+            'end': row['end'],
+            'duration': (row['end'] - row['start']).days + 1,
+            'metrics': {
+                metric: {'label': label, **_metric_statistics(row, metric)}
+                for metric, label in SUMMARY_METRICS.items()
+            },
+            'water': water_by_phase.get(phase) or 0,
+            'nutrients': nutrients_by_phase.get(phase, []),
+        })
+    return summary
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class RecordsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'records'
+
+    def ready(self) -> None:
+        from . import signals  # noqa: F401
+        # modules defining background tasks, registered before a worker looks them up
+        from . import images, retention, sensors  # noqa: F401
@@ -0,0 +1,93 @@
+from datetime import date
+from itertools import groupby
+from typing import List, Optional
+
+from django.core.cache import caches
+from django.db.models import F, QuerySet
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+from django.utils.safestring import SafeString, mark_safe
+
+from .models import Cycle, CycleSummary, Log
+
+# rows of the cycle table cached together, a week of daily logs
+ROWS_PER_FRAGMENT: int = 7
+
+
+def get_records_cache():
+    return caches['records']
+
+
+def get_cycle_cache_version(cycle_id) -> str:
+    """
+    A function to get the version the cached fragments of a cycle are stored under.
+
+    The version is a counter on the CycleSummary of the cycle, not a cache key: the records cache evicts entries, and
+    an evicted version would serve fragments stored under an earlier one as current.
+
+    Parameters:
+        cycle_id (UUID): The primary key of the Cycle.
+
+    Returns:
+        str: The cache version of the cycle, 0 if the cycle has no summary.
+    """
+    version: Optional[int] = CycleSummary.objects.filter(cycle_id=cycle_id).values_list(
+        'cache_version', flat=True).first()
+    return str(version or 0)
+
+
+def invalidate_cycle_cache(cycle_id: Optional = None) -> None:
+    """
+    A function to invalidate the cached fragments of a cycle, or of every cycle if no cycle is given.
+
+    Every fragment of the cycle is invalidated, not only the edited week, because the rows of later weeks depend on
+    earlier logs: day numbering, calibration streaks and previous log values. The version is bumped in a single
+    statement, so concurrent invalidations are never lost.
+
+    Parameters:
+        cycle_id (UUID, optional): The primary key of the Cycle. Defaults to None, for every cycle.
+    """
+    summaries: QuerySet = CycleSummary.objects.all() if cycle_id is None else \
+        CycleSummary.objects.filter(cycle_id=cycle_id)
+    summaries.update(cache_version=F('cache_version') + 1)
+
+
+def render_log_rows(request: Optional[HttpRequest], cycle: Cycle, logs: List[Log], today: date) -> SafeString:
+    """
+    A function to render logs as rows of the cycle table, reusing cached fragments of past weeks.
+
+    Logs are grouped into weeks by their row number. Weeks holding a log of today render fresh, because today's rows
+    show edit controls, other weeks are cached until a change to the cycle invalidates them.
+
+    Parameters:
+        request (HttpRequest, optional): The current request, for the template context.
+        cycle (Cycle): The Cycle object the logs belong to.
+        logs (List[Log]): The logs to render, annotated by `get_log_page`.
+        today (date): The current date.
+
+    Returns:
+        SafeString: The rendered 'records/log_rows.html' rows.
+    """
+    cache = get_records_cache()
+    try:
+        # loaded with the cycle when it is fetched with select_related('summary')
+        version: str = str(cycle.summary.cache_version)
+    except CycleSummary.DoesNotExist:
+        version = '0'
+    fragments: List[str] = []
+
+    for week, week_logs in groupby(logs, key=lambda log: (log.row_number - 1) // ROWS_PER_FRAGMENT):
+        week_logs = list(week_logs)
+        context = {'cycle': cycle, 'logs': week_logs, 'today': today}
+        if any(log.date == today for log in week_logs):
+            fragments.append(render_to_string('records/log_rows.html', context, request=request))
+            continue
+
+        key: str = f'log_rows:{cycle.pk}:{version}:{week}:{week_logs[0].pk}:{len(week_logs)}'
+        fragment: Optional[str] = cache.get(key)
+        if fragment is None:
+            fragment = render_to_string('records/log_rows.html', context, request=request)
+            cache.set(key, fragment, timeout=None)
+        fragments.append(fragment)
+
+    return mark_safe(''.join(fragments))
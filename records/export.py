@@ -0,0 +1,210 @@
+import csv
+import uuid
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+
+from .models import Cycle, Log, NutrientLog, ReservoirLog
+
+# rows fetched from the database at a time, the memory used by an export does not grow beyond it
+EXPORT_CHUNK_SIZE: int = 2000
+# exported tables, by the name of their file, and the filter selecting the rows of the given cycles
+EXPORT_TABLES: Dict[str, Tuple[type, str]] = {
+    'cycles': (Cycle, 'pk__in'),
+    'logs': (Log, 'cycle_id__in'),
+    'nutrient_logs': (NutrientLog, 'log__cycle_id__in'),
+    'reservoir_logs': (ReservoirLog, 'log__cycle_id__in'),
+}
+EXPORT_FORMATS: List[str] = ['csv', 'parquet']
+EXPORT_CONTENT_TYPES: Dict[str, str] = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class _Buffer:
+    # a file-like object keeping what was written since it was last drained, for writers that expect a file
+    def __init__(self) -> None:
+        self.chunks: List[bytes] = []
+        self.position: int = 0
+        self.closed: bool = False
+
+    def write(self, data) -> int:
+        chunk: bytes = data.encode() if isinstance(data, str) else bytes(data)
+        self.chunks.append(chunk)
+        self.position += len(chunk)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data: bytes = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def get_export_columns(table: str) -> List[str]:
+    """
+    A function to get the columns of an exported table, the database columns of its model.
+
+    Parameters:
+        table (str): The name of the table, a key of EXPORT_TABLES.
+
+    Returns:
+        List[str]: The column names, foreign keys exported as their `_id` column.
+    """
+    model, _ = EXPORT_TABLES[table]
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def iter_export_rows(table: str, cycle_ids: Optional[Iterable] = None,
+                     chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[tuple]:
+    """
+    A function to iterate the rows of an exported table without loading the table into memory.
+
+    Parameters:
+        table (str): The name of the table, a key of EXPORT_TABLES.
+        cycle_ids (Iterable, optional): The primary keys of the Cycle objects to export. Defaults to None, for every
+                                        cycle.
+        chunk_size (int, optional): The number of rows fetched from the database at a time.
+
+    Returns:
+        Iterator[tuple]: The rows in primary key order, with the values of `get_export_columns`.
+    """
+    model, cycle_filter = EXPORT_TABLES[table]
+    queryset: models.QuerySet = model.objects.order_by('pk')
+    if cycle_ids is not None:
+        queryset = queryset.filter(**{cycle_filter: list(cycle_ids)})
+    return queryset.values_list(*get_export_columns(table)).iterator(chunk_size=chunk_size)
+
+
+def stream_csv(table: str, cycle_ids: Optional[Iterable] = None,
+               chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    A function to stream an exported table as CSV, a header line then a line per row.
+
+    Parameters:
+        table (str): The name of the table, a key of EXPORT_TABLES.
+        cycle_ids (Iterable, optional): The primary keys of the Cycle objects to export. Defaults to every cycle.
+        chunk_size (int, optional): The number of rows fetched from the database and encoded at a time.
+
+    Returns:
+        Iterator[bytes]: UTF-8 encoded CSV, one chunk of lines at a time.
+    """
+    buffer = _Buffer()
+    writer = csv.writer(buffer)
+    writer.writerow(get_export_columns(table))
+    for count, row in enumerate(iter_export_rows(table, cycle_ids, chunk_size), start=1):
+        writer.writerow(row)
+        if count % chunk_size == 0:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def _get_parquet_schema(table: str):
+    import pyarrow
+
+    types: Dict[str, Callable] = {
+        'AutoField': pyarrow.int64,
+        'BigAutoField': pyarrow.int64,
+        'IntegerField': pyarrow.int64,
+        'PositiveSmallIntegerField': pyarrow.int64,
+        'BooleanField': pyarrow.bool_,
+        'DateField': pyarrow.date32,
+        'DecimalField': pyarrow.float64,
+    }
+    model, _ = EXPORT_TABLES[table]
+    return pyarrow.schema([
+        (field.attname, types.get(field.target_field.get_internal_type() if field.is_relation
+                                  else field.get_internal_type(), pyarrow.string)())
+        for field in model._meta.concrete_fields
+    ])
+
+
+def _to_parquet_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _iter_parquet(table: str, cycle_ids: Optional[Iterable], chunk_size: int) -> Iterator[bytes]:
+    import pyarrow
+    import pyarrow.parquet
+
+    schema = _get_parquet_schema(table)
+    buffer = _Buffer()
+    writer = pyarrow.parquet.ParquetWriter(buffer, schema)
+    rows: List[tuple] = []
+
+    def write_row_group() -> bytes:
+        columns = [[_to_parquet_value(value) for value in column] for column in zip(*rows)]
+        writer.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+        ))
+        rows.clear()
+        return buffer.drain()
+
+    for row in iter_export_rows(table, cycle_ids, chunk_size):
+        rows.append(row)
+        if len(rows) == chunk_size:
+            yield write_row_group()
+    if rows:
+        yield write_row_group()
+    writer.close()
+    yield buffer.drain()
+
+
+def stream_parquet(table: str, cycle_ids: Optional[Iterable] = None,
+                   chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    A function to stream an exported table as a Parquet file, a row group per chunk of rows.
+
+    Parquet support needs the optional pyarrow package.
+
+    Parameters:
+        table (str): The name of the table, a key of EXPORT_TABLES.
+        cycle_ids (Iterable, optional): The primary keys of the Cycle objects to export. Defaults to every cycle.
+        chunk_size (int, optional): The number of rows fetched from the database and written per row group.
+
+    Returns:
+        Iterator[bytes]: The Parquet file, one row group at a time, the footer last.
+
+    Raises:
+        ImproperlyConfigured: If pyarrow is not installed.
+    """
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured('Parquet export requires the pyarrow package.')
+    # checked before the first chunk is requested, so a missing package fails before a response is started
+    return _iter_parquet(table, cycle_ids, chunk_size)
+
+
+def stream_export(table: str, export_format: str, cycle_ids: Optional[Iterable] = None,
+                  chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    A function to stream an exported table in one of EXPORT_FORMATS.
+
+    Parameters:
+        table (str): The name of the table, a key of EXPORT_TABLES.
+        export_format (str): 'csv' or 'parquet'.
+        cycle_ids (Iterable, optional): The primary keys of the Cycle objects to export. Defaults to every cycle.
+        chunk_size (int, optional): The number of rows fetched from the database at a time.
+
+    Returns:
+        Iterator[bytes]: The encoded table, chunk by chunk.
+    """
+    if export_format == 'parquet':
+        return stream_parquet(table, cycle_ids, chunk_size)
+    return stream_csv(table, cycle_ids, chunk_size)
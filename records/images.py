@@ -0,0 +1,164 @@
+import os
+from io import BytesIO
+from typing import Dict, Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .cache import get_records_cache, invalidate_cycle_cache
+from .tasks import enqueue, task
+
+# widths of the generated variants, an image is never scaled up
+IMAGE_SIZES: Dict[str, int] = {
+    'small': 160,
+    'medium': 480,
+    'large': 1280,
+}
+# directory of the generated variants, inside the storage of the originals
+IMAGE_VARIANTS_DIR: str = 'thumbnails'
+IMAGE_VARIANTS_CACHE_PREFIX: str = 'image_variants'
+# encoder options of every generated format
+IMAGE_FORMATS: Dict[str, Dict] = {
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+    'webp': {'quality': 80, 'method': 4},
+}
+# seconds a lookup of variants that are not generated yet is cached for
+MISSING_VARIANTS_TIMEOUT: int = 60
+
+
+def get_image_version(name: str) -> str:
+    """
+    A function to get the version of an image, its modification time in hexadecimal microseconds.
+
+    The version is part of the names of the variants, so an original replaced under the same name gets new
+    variants instead of the ones browsers cached as immutable.
+
+    Parameters:
+        name (str): The storage name of the original image.
+
+    Returns:
+        str: The version of the image.
+
+    Raises:
+        OSError: If the original is missing.
+    """
+    return format(int(default_storage.get_modified_time(name).timestamp() * 1000000), 'x')
+
+
+def get_variant_name(name: str, version: str, size: str, image_format: str) -> str:
+    """
+    A function to get the storage name of a variant of an image.
+
+    The name keeps the extension of the original, so 'photo.jpg' and 'photo.png' have variants of their own.
+
+    Parameters:
+        name (str): The storage name of the original image.
+        version (str): The version of the original, see `get_image_version`.
+        size (str): The size of the variant, a key of IMAGE_SIZES.
+        image_format (str): The format of the variant, a key of IMAGE_FORMATS.
+
+    Returns:
+        str: The name of the variant, e.g. 'thumbnails/photo.jpg.5f2c1a3b4d5e6-small.webp' for 'photo.jpg'.
+    """
+    extension: str = 'webp' if image_format == 'webp' else 'jpg'
+    return os.path.join(IMAGE_VARIANTS_DIR, f'{name}.{version}-{size}.{extension}')
+
+
+@task(name='generate_image_variants')
+def generate_image_variants(name: str, cycle_id: Optional[str] = None) -> Dict[str, Dict[str, str]]:
+    """
+    A function to generate the JPEG and WebP variants of every IMAGE_SIZES size of an image.
+
+    The image is rotated according to its EXIF orientation and only decoded if a variant is missing, variants that
+    already exist are kept. Once the variants exist the cached lookup of their URLs is cleared, and the cached rows
+    of the cycle, if given, are invalidated to pick them up.
+
+    Parameters:
+        name (str): The storage name of the original image.
+        cycle_id (str, optional): The primary key of the Cycle the image is shown in. Defaults to None.
+
+    Returns:
+        Dict[str, Dict[str, str]]: The URLs of the variants, see `get_image_variants`, empty if the original is
+                                   missing or is not an image.
+    """
+    try:
+        version: str = get_image_version(name)
+    except OSError:
+        return {}
+
+    missing_variants: Dict[str, Dict[str, str]] = {}
+    for size in IMAGE_SIZES:
+        for image_format in IMAGE_FORMATS:
+            variant_name: str = get_variant_name(name, version, size, image_format)
+            if not default_storage.exists(variant_name):
+                missing_variants.setdefault(size, {})[image_format] = variant_name
+
+    if missing_variants:
+        try:
+            with default_storage.open(name) as original:
+                image = ImageOps.exif_transpose(Image.open(original))
+                image = image.convert('RGB')
+        except (OSError, UnidentifiedImageError):
+            return {}
+
+        for size, variant_names in missing_variants.items():
+            variant = image.copy()
+            variant.thumbnail((IMAGE_SIZES[size], IMAGE_SIZES[size] * 4), Image.LANCZOS)
+            for image_format, variant_name in variant_names.items():
+                buffer = BytesIO()
+                variant.save(buffer, image_format.upper(), **IMAGE_FORMATS[image_format])
+                default_storage.save(variant_name, ContentFile(buffer.getvalue()))
+
+    get_records_cache().delete(f'{IMAGE_VARIANTS_CACHE_PREFIX}:{name}:{version}')
+    if cycle_id is not None:
+        invalidate_cycle_cache(cycle_id)
+    return get_image_variants(name)
+
+
+def schedule_image_variants(name: str, cycle_id: Optional[str] = None) -> None:
+    """
+    A function to enqueue the generation of the variants of an image, run by the task worker.
+
+    Parameters:
+        name (str): The storage name of the original image.
+        cycle_id (str, optional): The primary key of the Cycle the image is shown in. Defaults to None.
+    """
+    enqueue(generate_image_variants, name, cycle_id)
+
+
+def get_image_variants(name: str) -> Dict[str, Dict[str, str]]:
+    """
+    A function to look up the URLs of the variants of an image, cached once every variant exists.
+
+    The lookup is kept in the 'records' cache by the version of the image, shared with the task worker generating
+    the variants, which clears it.
+
+    Parameters:
+        name (str): The storage name of the original image.
+
+    Returns:
+        Dict[str, Dict[str, str]]: The URL of every variant by format, a key of IMAGE_FORMATS, and size, empty while
+                                   the variants are not generated yet or if the original is missing.
+    """
+    try:
+        version: str = get_image_version(name)
+    except OSError:
+        return {}
+    cache = get_records_cache()
+    cache_key: str = f'{IMAGE_VARIANTS_CACHE_PREFIX}:{name}:{version}'
+    variants: Optional[Dict] = cache.get(cache_key)
+    if variants is not None:
+        return variants
+
+    variants = {}
+    for image_format in IMAGE_FORMATS:
+        for size in IMAGE_SIZES:
+            variant_name: str = get_variant_name(name, version, size, image_format)
+            if not default_storage.exists(variant_name):
+                # not generated yet, generating them clears the cached lookup
+                cache.set(cache_key, {}, timeout=MISSING_VARIANTS_TIMEOUT)
+                return {}
+            variants.setdefault(image_format, {})[size] = default_storage.url(variant_name)
+    cache.set(cache_key, variants, timeout=None)
+    return variants
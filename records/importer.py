@@ -0,0 +1,378 @@
+import csv
+import json
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO, Tuple, Type
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from .cache import invalidate_cycle_cache
+from .models import Cycle, CycleSummary, Log, Nutrient, NutrientLog, ReservoirLog, SensorReading, SensorRollup
+from .sensors import SENSOR_SCALES
+
+# days of logs written per transaction
+IMPORT_BATCH_SIZE: int = 5000
+# Log fields read from an imported row, next to 'cycle', 'genetics' and 'date'
+IMPORT_LOG_FIELDS: List[str] = [
+    'phase', 'temperature_day', 'temperature_night', 'humidity_day', 'humidity_night', 'ph', 'ec', 'irrigation',
+    'light_height', 'light_power', 'calibration', 'carbon_dioxide', 'featured_image', 'comment',
+]
+# Cycle fields read from the rows of a cycle that does not exist yet
+IMPORT_CYCLE_FIELDS: List[str] = [
+    'light_type', 'fixture', 'seedbank', 'reproductive_cycle', 'seed_type', 'grow_medium', 'hydro_system',
+]
+# ReservoirLog fields read from an imported row
+IMPORT_RESERVOIR_FIELDS: List[str] = ['water', 'waste_water', 'reverse_osmosis']
+# models of the sensor rows of an archive, see records.retention, a row holds the stored values under its key
+IMPORT_SENSOR_MODELS: Dict[str, Type[models.Model]] = {'sensor_rollup': SensorRollup, 'sensor_reading': SensorReading}
+# fields of the sensor rows, the one unique per cycle first
+IMPORT_SENSOR_FIELDS: Dict[str, List[str]] = {
+    'sensor_rollup': ['hour'] + [f'{metric}_{aggregate}' for metric in SENSOR_SCALES
+                                 for aggregate in ('count', 'sum', 'min', 'max')],
+    'sensor_reading': ['timestamp'] + list(SENSOR_SCALES),
+}
+# spellings of booleans accepted on top of the ones of BooleanField.to_python
+BOOLEAN_VALUES: Dict[str, bool] = {
+    'true': True, 't': True, 'yes': True, 'y': True, '1': True,
+    'false': False, 'f': False, 'no': False, 'n': False, '0': False,
+}
+
+
+class ImportRowError(NamedTuple):
+    """
+    A row that could not be imported.
+
+    Fields:
+        line (int): The line of the row in the input, counting the CSV header.
+        message (str): Why the row was skipped.
+    """
+    line: int
+    message: str
+
+
+def read_csv_rows(source: TextIO) -> Iterator[Tuple[int, Dict]]:
+    """
+    A function to read the rows of a CSV file with a header line, empty cells read as missing values.
+
+    Parameters:
+        source (TextIO): The CSV file.
+
+    Returns:
+        Iterator[Tuple[int, Dict]]: The line number and the values of every row.
+    """
+    reader = csv.DictReader(source)
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}
+
+
+def read_ndjson_rows(source: TextIO) -> Iterator[Tuple[int, Dict]]:
+    """
+    A function to read the objects of a NDJSON file, one per line. Blank lines are skipped.
+
+    Parameters:
+        source (TextIO): The NDJSON file.
+
+    Returns:
+        Iterator[Tuple[int, Dict]]: The line number and the object of every line, or a string with the parse error.
+    """
+    for line_number, line in enumerate(source, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, f'Invalid JSON: {e}'
+
+
+class _Day:
+    # the log of a cycle on a date, and its feeding, merged from every row of that day
+    def __init__(self, line: int, cycle_key: Tuple[str, str], log_date: date) -> None:
+        self.line: int = line
+        self.cycle_key: Tuple[str, str] = cycle_key
+        self.date: date = log_date
+        self.cycle_values: Dict = {}
+        self.log_values: Dict = {}
+        self.reservoir: Optional[Dict] = None
+        self.nutrients: Dict[Tuple[str, str], int] = {}
+
+    def add_log_values(self, values: Dict) -> None:
+        for field, value in values.items():
+            self.log_values.setdefault(field, value)
+
+    def add_cycle_values(self, values: Dict) -> None:
+        for field, value in values.items():
+            self.cycle_values.setdefault(field, value)
+
+    def add_reservoir(self, water: Optional[int], waste_water: Optional[int], reverse_osmosis: str) -> None:
+        # the same rules as ReservoirLog.save, for a first fill and for water added to it
+        if self.reservoir is None:
+            self.reservoir = {
+                'water': water,
+                'waste_water': waste_water,
+                'reverse_osmosis': reverse_osmosis,
+                'ro_amount': water if reverse_osmosis == 'yes' else None,
+                'status': 'refresh' if waste_water is not None else 'refill',
+            }
+            return
+
+        reservoir: Dict = self.reservoir
+        if reverse_osmosis == 'yes':
+            reservoir['ro_amount'] = (reservoir['ro_amount'] or 0) + (water or 0)
+        if waste_water is not None:
+            if waste_water != 0:
+                reservoir['status'] = 'refresh'
+            elif not reservoir['waste_water']:
+                reservoir['status'] = 'refill'
+            reservoir['waste_water'] = (reservoir['waste_water'] or 0) + waste_water
+        reservoir['water'] = (reservoir['water'] or 0) + (water or 0)
+
+    def add_nutrient(self, nutrient_key: Tuple[str, str], concentration: int) -> None:
+        # the same rule as NutrientLog.save, concentrations of a nutrient are added up
+        self.nutrients[nutrient_key] = self.nutrients.get(nutrient_key, 0) + concentration
+
+
+class RecordImporter:
+    """
+    An importer writing logs, nutrient logs and reservoir logs from rows of historical grow data.
+
+    Every row belongs to the log of a cycle on a date. Cycles are resolved by their name and genetics, nutrients by
+    their brand and name, and missing ones are created. Rows of the same cycle and date are merged into one log in
+    memory, with the ReservoirLog and NutrientLog merge rules, and logs are written with bulk_create, a batch of days
+    per transaction. Days for which the cycle already has a log are skipped, so an import can be run again.
+
+    A row holds 'cycle' and 'genetics', 'date', the IMPORT_LOG_FIELDS and IMPORT_RESERVOIR_FIELDS, and a nutrient as
+    'nutrient', 'brand' and 'concentration'. NDJSON rows may list several nutrients under 'nutrients'. The
+    IMPORT_CYCLE_FIELDS of a row are used when its cycle is created. An archived row may instead hold the
+    IMPORT_SENSOR_FIELDS of a SensorRollup or a SensorReading under 'sensor_rollup' or 'sensor_reading', they are
+    written after the logs of their cycle, and hours or seconds the cycle already has are skipped.
+
+    Fields:
+        batch_size (int): The number of days written per transaction.
+        created (Dict[str, int]): The number of created objects, by model name.
+        errors (List[ImportRowError]): The rows that were skipped.
+
+    Methods:
+        run (Dict[str, int]): Imports the rows, returns `created`.
+    """
+
+    def __init__(self, batch_size: int = IMPORT_BATCH_SIZE) -> None:
+        self.batch_size: int = batch_size
+        self.created: Dict[str, int] = {'cycles': 0, 'nutrients': 0, 'logs': 0, 'reservoir_logs': 0,
+                                        'nutrient_logs': 0, 'sensor_rollups': 0, 'sensor_readings': 0}
+        self.errors: List[ImportRowError] = []
+        self._cycles: Dict[Tuple[str, str], Cycle] = {}
+        self._nutrients: Dict[Tuple[str, str], Nutrient] = {}
+        self._touched_cycle_ids: Set = set()
+        self._fields: Dict = {
+            name: model._meta.get_field(name)
+            for model, names in ((Log, IMPORT_LOG_FIELDS + ['date']), (ReservoirLog, IMPORT_RESERVOIR_FIELDS),
+                                 (NutrientLog, ['concentration']), (Cycle, IMPORT_CYCLE_FIELDS))
+            for name in names
+        }
+
+    def run(self, rows: Iterable[Tuple[int, Dict]]) -> Dict[str, int]:
+        self._cycles = {(cycle.name, cycle.genetics): cycle for cycle in Cycle.objects.all()}
+        self._nutrients = {(nutrient.brand, nutrient.name): nutrient for nutrient in Nutrient.objects.all()}
+
+        days: Dict[Tuple, _Day] = {}
+        sensor_rows: List[Tuple[int, Tuple[str, str], str, Dict]] = []
+        for line, row in rows:
+            try:
+                if not isinstance(row, dict):
+                    raise ValidationError(row if isinstance(row, str) else 'Expected an object.')
+                if any(kind in row for kind in IMPORT_SENSOR_MODELS):
+                    sensor_rows.append((line, *self._parse_sensor_row(row)))
+                    key = None
+                else:
+                    key, cycle_values, log_values, reservoir, nutrients = self._parse_row(row)
+            except ValidationError as e:
+                self.errors.append(ImportRowError(line, '; '.join(e.messages)))
+                continue
+
+            if key is None:
+                if len(sensor_rows) >= self.batch_size:
+                    # the logs read so far come first, they create the cycles of the sensor rows
+                    if days:
+                        self._write_batch(list(days.values()))
+                        days = {}
+                    self._write_sensor_batch(sensor_rows)
+                    sensor_rows = []
+                continue
+
+            # a batch ends between days, so every row of a day is merged into the same log
+            if key not in days and len(days) >= self.batch_size:
+                self._write_batch(list(days.values()))
+                days = {}
+            day: _Day = days.get(key) or days.setdefault(key, _Day(line, *key))
+            day.add_cycle_values(cycle_values)
+            day.add_log_values(log_values)
+            if reservoir is not None:
+                day.add_reservoir(**reservoir)
+            for nutrient_key, concentration in nutrients:
+                day.add_nutrient(nutrient_key, concentration)
+        if days:
+            self._write_batch(list(days.values()))
+        if sensor_rows:
+            self._write_sensor_batch(sensor_rows)
+
+        # bulk_create sends no post_save signals
+        CycleSummary.refresh(list(self._touched_cycle_ids))
+        for cycle_id in self._touched_cycle_ids:
+            invalidate_cycle_cache(cycle_id)
+        return self.created
+
+    def _to_python(self, field_name: str, value):
+        field = self._fields[field_name]
+        if isinstance(value, str) and field.get_internal_type() == 'BooleanField':
+            value = BOOLEAN_VALUES.get(value.strip().lower(), value)
+        value = field.to_python(value)
+        if field.choices and value is not None and value not in dict(field.choices):
+            raise ValidationError(f'{field_name}: {value!r} is not a valid choice.')
+        return value
+
+    def _parse_row(self, row: Dict) -> Tuple[Tuple, Dict, Dict, Optional[Dict], List[Tuple[Tuple[str, str], int]]]:
+        # returns the (cycle key, date) of the row, its Cycle values, Log values, ReservoirLog values and nutrients
+        if not row.get('cycle') and not row.get('genetics'):
+            raise ValidationError('cycle or genetics is required.')
+        if not row.get('date'):
+            raise ValidationError('date is required.')
+        cycle_key: Tuple[str, str] = (str(row.get('cycle') or ''), str(row.get('genetics') or ''))
+        log_date: date = self._to_python('date', row['date'])
+
+        cycle_values: Dict = {
+            field: self._to_python(field, row[field]) for field in IMPORT_CYCLE_FIELDS if field in row
+        }
+        log_values: Dict = {field: self._to_python(field, row[field]) for field in IMPORT_LOG_FIELDS if field in row}
+        reservoir: Optional[Dict] = None
+        if row.get('water') is not None or row.get('waste_water') is not None:
+            reservoir = {field: self._to_python(field, row.get(field)) for field in ('water', 'waste_water')}
+            reservoir['reverse_osmosis'] = self._to_python('reverse_osmosis', row.get('reverse_osmosis') or 'yes')
+        nutrients: List[Tuple[Tuple[str, str], int]] = []
+        for nutrient in row.get('nutrients') or ([row] if row.get('nutrient') else []):
+            if not isinstance(nutrient, dict) or not nutrient.get('nutrient'):
+                raise ValidationError('nutrients: every nutrient needs a name.')
+            concentration = self._to_python('concentration', nutrient.get('concentration'))
+            if concentration is None:
+                raise ValidationError(f"{nutrient['nutrient']}: concentration is required.")
+            nutrients.append(((str(nutrient.get('brand') or ''), str(nutrient['nutrient'])), concentration))
+        return (cycle_key, log_date), cycle_values, log_values, reservoir, nutrients
+
+    def _parse_sensor_row(self, row: Dict) -> Tuple[Tuple[str, str], str, Dict]:
+        # returns the cycle key of the row, its kind and the values of the SensorRollup or SensorReading
+        if not row.get('cycle') and not row.get('genetics'):
+            raise ValidationError('cycle or genetics is required.')
+        kind: str = next(kind for kind in IMPORT_SENSOR_MODELS if kind in row)
+        if not isinstance(row[kind], dict):
+            raise ValidationError(f'{kind}: expected an object.')
+        values: Dict = {}
+        for field_name in IMPORT_SENSOR_FIELDS[kind]:
+            field = IMPORT_SENSOR_MODELS[kind]._meta.get_field(field_name)
+            value = row[kind].get(field_name)
+            if value is None:
+                if not field.null and not field.has_default():
+                    raise ValidationError(f'{kind}: {field_name} is required.')
+                if field.null:
+                    values[field_name] = None
+                continue
+            values[field_name] = field.to_python(value)
+        return (str(row.get('cycle') or ''), str(row.get('genetics') or '')), kind, values
+
+    def _resolve_cycles(self, days: List[_Day]) -> None:
+        new_cycles: Dict[Tuple[str, str], Cycle] = {}
+        first_dates: Dict[Tuple[str, str], date] = {}
+        for day in days:
+            if day.cycle_key not in self._cycles:
+                name, genetics = day.cycle_key
+                new_cycles.setdefault(day.cycle_key, Cycle(name=name, genetics=genetics, **day.cycle_values))
+                first_dates[day.cycle_key] = min(day.date, first_dates.get(day.cycle_key, day.date))
+        if not new_cycles:
+            return
+
+        Cycle.objects.bulk_create(new_cycles.values())
+        CycleSummary.objects.bulk_create([CycleSummary(cycle=cycle) for cycle in new_cycles.values()])
+        # auto_now_add stamps the cycles with today, they start with their first imported log instead
+        for cycle_key, cycle in new_cycles.items():
+            cycle.date = first_dates[cycle_key]
+        Cycle.objects.bulk_update(new_cycles.values(), ['date'])
+        self._cycles.update(new_cycles)
+        self.created['cycles'] += len(new_cycles)
+
+    def _resolve_nutrients(self, days: List[_Day]) -> None:
+        new_nutrients: Dict[Tuple[str, str], Nutrient] = {}
+        for day in days:
+            for brand, name in day.nutrients:
+                if (brand, name) not in self._nutrients:
+                    new_nutrients.setdefault((brand, name), Nutrient(brand=brand, name=name))
+        if new_nutrients:
+            Nutrient.objects.bulk_create(new_nutrients.values())
+            self._nutrients.update(new_nutrients)
+            self.created['nutrients'] += len(new_nutrients)
+
+    def _write_batch(self, days: List[_Day]) -> None:
+        with transaction.atomic():
+            self._resolve_cycles(days)
+            self._resolve_nutrients(days)
+
+            existing_days: Set[Tuple] = set(Log.objects.filter(
+                cycle_id__in={self._cycles[day.cycle_key].pk for day in days},
+                date__in={day.date for day in days},
+            ).order_by().values_list('cycle_id', 'date'))
+            new_days: List[_Day] = []
+            for day in days:
+                if (self._cycles[day.cycle_key].pk, day.date) in existing_days:
+                    self.errors.append(ImportRowError(day.line, f'{day.cycle_key[0] or day.cycle_key[1]} already '
+                                                              f'has a log on {day.date.isoformat()}.'))
+                else:
+                    new_days.append(day)
+
+            logs: List[Log] = Log.objects.bulk_create([
+                Log(cycle_id=self._cycles[day.cycle_key].pk, **day.log_values) for day in new_days
+            ])
+            # auto_now_add stamps the logs with today, restore the imported dates, a statement per date
+            log_ids_by_date: Dict[date, List[int]] = {}
+            for log, day in zip(logs, new_days):
+                log.date = day.date
+                log_ids_by_date.setdefault(day.date, []).append(log.pk)
+            for log_date, log_ids in log_ids_by_date.items():
+                Log.objects.filter(pk__in=log_ids).update(date=log_date)
+
+            reservoir_logs: List[ReservoirLog] = ReservoirLog.objects.bulk_create([
+                ReservoirLog(log_id=log.pk, **day.reservoir) for log, day in zip(logs, new_days) if day.reservoir
+            ])
+            nutrient_logs: List[NutrientLog] = NutrientLog.objects.bulk_create([
+                NutrientLog(log_id=log.pk, nutrient_id=self._nutrients[nutrient_key].pk, concentration=concentration)
+                for log, day in zip(logs, new_days) for nutrient_key, concentration in day.nutrients.items()
+            ])
+
+        self._touched_cycle_ids.update(log.cycle_id for log in logs)
+        self.created['logs'] += len(logs)
+        self.created['reservoir_logs'] += len(reservoir_logs)
+        self.created['nutrient_logs'] += len(nutrient_logs)
+
+    def _write_sensor_batch(self, sensor_rows: List[Tuple[int, Tuple[str, str], str, Dict]]) -> None:
+        with transaction.atomic():
+            for kind, model in IMPORT_SENSOR_MODELS.items():
+                unique_field: str = IMPORT_SENSOR_FIELDS[kind][0]
+                kind_rows: List[Tuple[int, Tuple[str, str], Dict]] = [
+                    (line, cycle_key, values) for line, cycle_key, row_kind, values in sensor_rows if row_kind == kind
+                ]
+                cycle_ids: Set = {self._cycles[cycle_key].pk for _, cycle_key, _ in kind_rows
+                                  if cycle_key in self._cycles}
+                seen: Set[Tuple] = set(model.objects.filter(**{
+                    'cycle_id__in': cycle_ids,
+                    f'{unique_field}__in': {values[unique_field] for _, _, values in kind_rows},
+                }).order_by().values_list('cycle_id', unique_field))
+
+                objects: List[models.Model] = []
+                for line, cycle_key, values in kind_rows:
+                    if cycle_key not in self._cycles:
+                        self.errors.append(ImportRowError(line, f'{cycle_key[0] or cycle_key[1]} has no logs.'))
+                        continue
+                    key: Tuple = (self._cycles[cycle_key].pk, values[unique_field])
+                    if key not in seen:
+                        seen.add(key)
+                        objects.append(model(cycle_id=key[0], **values))
+                model.objects.bulk_create(objects)
+                self._touched_cycle_ids.update(obj.cycle_id for obj in objects)
+                self.created[f'{kind}s'] += len(objects)
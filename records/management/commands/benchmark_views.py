@@ -0,0 +1,146 @@
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import date, timedelta
+from typing import Callable, Dict, List
+
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from records.models import Cycle, CycleSummary, Log, Nutrient, NutrientLog, ReservoirLog
+
+
+class Command(BaseCommand):
+    """
+    A management command that measures the cost of the records views on synthetic cycles.
+
+    For every requested size a cycle with that many logs is built, each log having nutrient logs and a reservoir log,
+    and the records, record, create_feeding_log, create_log and phase_summary views are requested through the test
+    client. Query count, wall time and peak traced memory are written as JSON to the output file. Requesting
+    create_log adds a log to the cycle, the same way the "Add" button of the record table does.
+
+    By default the command runs against a throwaway test database, so the development database is never touched.
+    """
+    help = 'Measure query counts, wall time and peak memory of the records views on synthetic cycles.'
+
+    BATCH_SIZE: int = 1000
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000],
+                            help='Number of logs of each synthetic cycle.')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Number of requests per view, the median wall time is reported.')
+        parser.add_argument('--output', default='benchmark_results.json',
+                            help='Path of the JSON file the results are written to.')
+        parser.add_argument('--no-test-database', action='store_true',
+                            help='Run against the current database instead of creating a throwaway test database.')
+
+    def handle(self, *args, **options) -> None:
+        if options['no_test_database']:
+            results = self.run_benchmarks(options['sizes'], options['repeat'])
+        else:
+            setup_test_environment()
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                results = self.run_benchmarks(options['sizes'], options['repeat'])
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
+
+        with open(options['output'], 'w') as output:
+            json.dump(results, output, indent=2)
+
+        for result in results:
+            self.stdout.write(
+                f"{result['view']:<20} logs={result['logs']:<6} queries={result['queries']:<5} "
+                f"time={result['time_ms']:.1f}ms peak_memory={result['peak_memory_kb']:.0f}KiB"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run_benchmarks(self, sizes: List[int], repeat: int) -> List[Dict]:
+        client = Client()
+        nutrients = self.create_nutrients()
+        results: List[Dict] = []
+
+        for size in sizes:
+            cycle = self.create_cycle(size, nutrients)
+            last_log = cycle.logs.order_by('id').last()
+            views: Dict[str, Callable] = {
+                'records': lambda: client.get(reverse('records')),
+                'record': lambda: client.get(reverse('record', args=[cycle.pk])),
+                'create_feeding_log': lambda: client.get(
+                    reverse('create_feeding_log', kwargs={'pk': cycle.pk, 'log_pk': last_log.pk})
+                ),
+                'create_log': lambda: client.get(reverse('create_log', args=[cycle.pk])),
+                'phase_summary': lambda: client.get(reverse('phase_summary', args=[cycle.pk])),
+            }
+            for name, request in views.items():
+                results.append({'view': name, 'logs': size, **self.measure(request, repeat)})
+        return results
+
+    @staticmethod
+    def measure(request: Callable, repeat: int) -> Dict:
+        # the query log is a bounded deque, filled up by building the synthetic cycle
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            request()
+        # captured queries are sliced from the query log lazily, the next request resets it
+        query_count = len(queries)
+
+        timings: List[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            request()
+            timings.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        request()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {
+            'queries': query_count,
+            'time_ms': statistics.median(timings) * 1000,
+            'peak_memory_kb': peak_memory / 1024,
+        }
+
+    @staticmethod
+    def create_nutrients() -> List[Nutrient]:
+        return [
+            Nutrient.objects.create(name=f'Benchmark {nutrient_type}', brand='Benchmark', nutrient_type=nutrient_type)
+            for nutrient_type, _ in Nutrient.NUTRIENT_TYPE_CHOICES
+        ]
+
+    def create_cycle(self, size: int, nutrients: List[Nutrient]) -> Cycle:
+        cycle = Cycle.objects.create(name=f'Benchmark {size}', genetics='Benchmark')
+        phases = ['seedling'] * (size // 10) + ['vegetative'] * (size * 4 // 10)
+        phases += ['bloom'] * (size - len(phases))
+        logs = Log.objects.bulk_create([
+            Log(cycle=cycle, phase=phase, temperature_day=24, temperature_night=20, humidity_day=60,
+                humidity_night=55, ph=6.0, ec=1.2, irrigation='drip', light_height=50 - day % 5, light_power=75,
+                calibration=day % 45 == 0, carbon_dioxide=800)
+            for day, phase in enumerate(phases)
+        ], batch_size=self.BATCH_SIZE)
+
+        # auto_now_add stamps every log with today, spread them over the past instead
+        first_day = date.today() - timedelta(days=size - 1)
+        for day, log in enumerate(logs):
+            log.date = first_day + timedelta(days=day)
+        Log.objects.bulk_update(logs, ['date'], batch_size=self.BATCH_SIZE)
+
+        NutrientLog.objects.bulk_create([
+            NutrientLog(log=log, nutrient=nutrient, concentration=10)
+            for log in logs for nutrient in nutrients[:2]
+        ], batch_size=self.BATCH_SIZE)
+        ReservoirLog.objects.bulk_create([
+            ReservoirLog(log=log, water=40, ro_amount=40, waste_water=10 if day % 7 == 0 else None,
+                         status='refresh' if day % 7 == 0 else 'refill')
+            for day, log in enumerate(logs)
+        ], batch_size=self.BATCH_SIZE)
+        # bulk_create and bulk_update send no signals, the summary of the cycle is computed once at the end
+        CycleSummary.refresh([cycle.pk])
+        return cycle
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from records.retention import apply_retention, schedule_retention
+
+
+class Command(BaseCommand):
+    """
+    A management command that applies the retention policies of the records, see records.retention.
+
+    Raw sensor readings are compacted into their hourly rollups, finished cycles are archived to gzip compressed
+    NDJSON files that import_records reads back, and finished background tasks are deleted. The database is then
+    VACUUMed, if anything was removed, and ANALYZEd. Policies default to the RECORDS_RETENTION setting.
+    """
+    help = 'Compact old sensor readings, archive finished cycles and optimize the database.'
+
+    def add_arguments(self, parser) -> None:
+        retention = settings.RECORDS_RETENTION
+        parser.add_argument('--raw-days', type=int, default=retention.get('raw_readings_days'),
+                            help='Age in days after which raw sensor readings are compacted into their rollups.')
+        parser.add_argument('--archive-days', type=int, default=retention.get('archive_cycles_days'),
+                            help='Age in days of the last log after which a cycle is archived and removed.')
+        parser.add_argument('--task-days', type=int, default=retention.get('tasks_days'),
+                            help='Age in days after which finished background tasks are deleted.')
+        parser.add_argument('--archive-dir', default=settings.RECORDS_ARCHIVE_DIR,
+                            help='Directory archived cycles are written to.')
+        parser.add_argument('--no-vacuum', action='store_true',
+                            help='Only ANALYZE the database, VACUUM rewrites the whole SQLite file.')
+        parser.add_argument('--schedule', action='store_true',
+                            help='Instead of compacting now, let the task worker apply RECORDS_RETENTION daily.')
+
+    def handle(self, *args, **options) -> None:
+        if options['schedule']:
+            scheduled = schedule_retention(delay=0)
+            self.stdout.write(self.style.SUCCESS(
+                'Scheduled the daily retention task.' if scheduled else 'The retention task is already scheduled.'
+            ))
+            return
+
+        removed = apply_retention(
+            raw_readings_days=options['raw_days'], archive_cycles_days=options['archive_days'],
+            tasks_days=options['task_days'], archive_dir=options['archive_dir'], vacuum=not options['no_vacuum'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted {removed['readings']} readings, archived {removed['cycles']} cycles, "
+            f"deleted {removed['tasks']} tasks."
+        ))
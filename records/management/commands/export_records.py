@@ -0,0 +1,53 @@
+import os
+from typing import List
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from records.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORT_TABLES, stream_export
+from records.models import Cycle
+
+
+class Command(BaseCommand):
+    """
+    A management command that exports cycles, logs, nutrient logs and reservoir logs, a file per table.
+
+    Rows are streamed from the database in chunks and written as they come, so memory use does not grow with the
+    size of the history. Parquet output needs the optional pyarrow package.
+    """
+    help = 'Export cycles and their feeding history as CSV or Parquet files, a file per table.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv',
+                            help='Format of the exported files.')
+        parser.add_argument('--output-dir', default='.',
+                            help='Directory the files are written to, as <table>.<format>.')
+        parser.add_argument('--cycle', nargs='+', default=None,
+                            help='Primary keys of the cycles to export. Defaults to every cycle.')
+        parser.add_argument('--tables', nargs='+', choices=list(EXPORT_TABLES), default=list(EXPORT_TABLES),
+                            help='Tables to export.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Number of rows fetched from the database at a time.')
+
+    def handle(self, *args, **options) -> None:
+        cycle_ids = None
+        if options['cycle']:
+            try:
+                cycle_ids = [Cycle._meta.pk.to_python(pk) for pk in options['cycle']]
+            except ValidationError as e:
+                raise CommandError(f'Invalid cycle: {e.messages[0]}')
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        paths: List[str] = []
+        for table in options['tables']:
+            path: str = os.path.join(options['output_dir'], f"{table}.{options['format']}")
+            try:
+                chunks = stream_export(table, options['format'], cycle_ids, options['chunk_size'])
+            except ImproperlyConfigured as e:
+                raise CommandError(str(e))
+            with open(path, 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+            paths.append(path)
+            self.stdout.write(f'{table:<15} -> {path}')
+        self.stdout.write(self.style.SUCCESS(f'Exported {len(paths)} tables.'))
@@ -0,0 +1,52 @@
+import gzip
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from records.importer import IMPORT_BATCH_SIZE, RecordImporter, read_csv_rows, read_ndjson_rows
+
+
+class Command(BaseCommand):
+    """
+    A management command that imports historical grow data from a CSV or NDJSON file.
+
+    Rows are merged into logs and feedings in memory and written with bulk_create, a batch of days per transaction,
+    see records.importer.RecordImporter for the row format and the merge rules. Skipped rows are reported by line.
+    """
+    help = 'Import logs, nutrient logs, reservoir logs and archived sensor data from a CSV or NDJSON file.'
+
+    # the number of skipped rows listed in the output
+    MAX_REPORTED_ERRORS: int = 20
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('path', help='Path of the CSV or NDJSON file, gzip compressed if it ends with .gz.')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], default=None,
+                            help='Format of the file. Defaults to the file extension, .ndjson and .jsonl for NDJSON.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                            help='Number of days of logs written per transaction.')
+
+    def handle(self, *args, **options) -> None:
+        stem, extension = os.path.splitext(options['path'])
+        compressed: bool = extension == '.gz'
+        if compressed:
+            extension = os.path.splitext(stem)[1]
+        import_format = options['format']
+        if import_format is None:
+            import_format = 'ndjson' if extension in ('.ndjson', '.jsonl') else 'csv'
+        read_rows = read_ndjson_rows if import_format == 'ndjson' else read_csv_rows
+
+        importer = RecordImporter(batch_size=options['batch_size'])
+        open_source = gzip.open if compressed else open
+        try:
+            with open_source(options['path'], 'rt', newline='', encoding='utf-8') as source:
+                created = importer.run(read_rows(source))
+        except OSError as e:
+            raise CommandError(f'Unable to read {options["path"]}: {e}')
+
+        for error in importer.errors[:self.MAX_REPORTED_ERRORS]:
+            self.stderr.write(f'line {error.line}: {error.message}')
+        if len(importer.errors) > self.MAX_REPORTED_ERRORS:
+            self.stderr.write(f'... and {len(importer.errors) - self.MAX_REPORTED_ERRORS} more skipped rows')
+
+        summary = ', '.join(f'{count} {name}' for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f'Imported {summary}, skipped {len(importer.errors)} rows.'))
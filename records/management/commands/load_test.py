@@ -0,0 +1,127 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import reverse
+
+from records.models import Cycle
+
+
+class Command(BaseCommand):
+    """
+    A management command that measures the throughput of a running server, by default on the record view.
+
+    Unlike benchmark_views, which calls the views in process, requests go over HTTP to a server started separately,
+    so the development server and the production profile (gunicorn with grow_log.settings_production) can be
+    compared on the same database. Every client thread keeps its connection alive, like a browser, and requests run
+    for a fixed number of seconds after a warm up. Throughput, latency percentiles and errors are printed and can be
+    written as JSON.
+    """
+    help = 'Measure requests per second and latency of a running server.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('url', nargs='?', default=None,
+                            help='URL to request. Defaults to the record view of the cycle with the most logs on '
+                                 'http://127.0.0.1:8000.')
+        parser.add_argument('--concurrency', type=int, default=8,
+                            help='Number of client threads requesting at the same time.')
+        parser.add_argument('--duration', type=float, default=10.0,
+                            help='Seconds to measure for.')
+        parser.add_argument('--warmup', type=float, default=2.0,
+                            help='Seconds to request for before measuring, to fill caches and start connections.')
+        parser.add_argument('--output', default=None,
+                            help='Path of a JSON file the results are written to.')
+
+    def handle(self, *args, **options) -> None:
+        url: str = options['url'] or self.get_default_url()
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise CommandError(f'Invalid URL: {url}')
+
+        stop_at: List[float] = [time.perf_counter() + options['warmup']]
+        measuring = threading.Event()
+        latencies: List[List[float]] = [[] for _ in range(options['concurrency'])]
+        errors: List[int] = [0] * options['concurrency']
+
+        def client(index: int) -> None:
+            connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            connection: Optional[http.client.HTTPConnection] = None
+            target: str = parts.path or '/'
+            if parts.query:
+                target += f'?{parts.query}'
+            while time.perf_counter() < stop_at[0]:
+                started: float = time.perf_counter()
+                try:
+                    if connection is None:
+                        connection = connection_class(parts.hostname, parts.port, timeout=30)
+                    connection.request('GET', target, headers={'Host': parts.netloc})
+                    response = connection.getresponse()
+                    response.read()
+                    failed: bool = response.status >= 400
+                    if response.will_close:
+                        connection.close()
+                        connection = None
+                except (OSError, http.client.HTTPException):
+                    failed = True
+                    connection = None
+                if measuring.is_set():
+                    latencies[index].append(time.perf_counter() - started)
+                    errors[index] += failed
+            if connection is not None:
+                connection.close()
+
+        threads: List[threading.Thread] = [
+            threading.Thread(target=client, args=(index,), daemon=True) for index in range(options['concurrency'])
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['warmup'])
+        started: float = time.perf_counter()
+        measuring.set()
+        stop_at[0] = started + options['duration']
+        for thread in threads:
+            thread.join()
+        elapsed: float = time.perf_counter() - started
+
+        results: Dict = self.summarize(url, options['concurrency'], elapsed, latencies, sum(errors))
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+        self.stdout.write(
+            f"{results['url']}\n"
+            f"concurrency={results['concurrency']} requests={results['requests']} errors={results['errors']}\n"
+            f"throughput={results['requests_per_second']:.1f} req/s "
+            f"p50={results['p50_ms']:.1f}ms p95={results['p95_ms']:.1f}ms p99={results['p99_ms']:.1f}ms"
+        )
+        if results['errors']:
+            self.stdout.write(self.style.WARNING(f"{results['errors']} requests failed."))
+
+    @staticmethod
+    def get_default_url() -> str:
+        cycle: Optional[Cycle] = Cycle.objects.annotate(log_count=Count('logs')).order_by('-log_count').first()
+        if cycle is None:
+            raise CommandError('There is no cycle to request, pass a URL.')
+        return f"http://127.0.0.1:8000{reverse('record', args=[cycle.pk])}"
+
+    @staticmethod
+    def summarize(url: str, concurrency: int, elapsed: float, latencies: List[List[float]], errors: int) -> Dict:
+        samples: List[float] = sorted(latency for thread_latencies in latencies for latency in thread_latencies)
+        if len(samples) < 2:
+            raise CommandError('Too few requests completed, increase --duration.')
+        percentiles: List[float] = statistics.quantiles(samples, n=100)
+        return {
+            'url': url,
+            'concurrency': concurrency,
+            'requests': len(samples),
+            'errors': errors,
+            'requests_per_second': len(samples) / elapsed,
+            'p50_ms': statistics.median(samples) * 1000,
+            'p95_ms': percentiles[94] * 1000,
+            'p99_ms': percentiles[98] * 1000,
+        }
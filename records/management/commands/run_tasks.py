@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from records.tasks import TASK_VISIBILITY_TIMEOUT, run_pending_tasks
+
+
+class Command(BaseCommand):
+    """
+    A management command running the worker of the background task queue, see records.tasks.
+
+    Any number of workers may run side by side, each task is claimed by exactly one of them. A task whose worker
+    dies is taken over by another worker once its visibility timeout expires. Like a request, every claim starts
+    with close_old_connections(), so a connection past CONN_MAX_AGE or dropped by the server or PgBouncer is
+    replaced instead of failing every claim that follows.
+    """
+    help = 'Run queued background tasks, polling the database for new ones.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no task is due instead of polling.')
+        parser.add_argument('--sleep', type=float, default=1.0,
+                            help='Seconds to wait between polls of an empty queue.')
+        parser.add_argument('--visibility-timeout', type=int, default=TASK_VISIBILITY_TIMEOUT,
+                            help='Seconds a started task is owned by this worker before others may take it over.')
+        parser.add_argument('--max-tasks', type=int, default=None,
+                            help='Exit after running this many tasks.')
+
+    def handle(self, *args, **options) -> None:
+        total: int = 0
+        try:
+            while options['max_tasks'] is None or total < options['max_tasks']:
+                close_old_connections()
+                count: int = run_pending_tasks(1, options['visibility_timeout'])
+                total += count
+                if options['once'] and not count:
+                    break
+                if not count:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Ran {total} tasks.'))
@@ -0,0 +1,40 @@
+# Generated by Django 4.1.6 on 2026-10-18 12:21
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_nutrient_logs(apps, schema_editor):
+    # concurrent submissions could store a nutrient twice for a log, the oldest row keeps the total concentration
+    NutrientLog = apps.get_model('records', 'NutrientLog')
+    duplicates = (
+        NutrientLog.objects.order_by().values('log_id', 'nutrient_id').annotate(count=Count('id')).filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        nutrient_logs = list(NutrientLog.objects.filter(
+            log_id=duplicate['log_id'], nutrient_id=duplicate['nutrient_id']
+        ).order_by('id'))
+        kept = nutrient_logs[0]
+        kept.concentration = sum(nutrient_log.concentration for nutrient_log in nutrient_logs)
+        kept.save(update_fields=['concentration'])
+        NutrientLog.objects.filter(pk__in=[nutrient_log.pk for nutrient_log in nutrient_logs[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0037_cycle_hydro_system_alter_cycle_fixture_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cycle',
+            name='hydro_system',
+            field=models.CharField(blank=True, choices=[('DWC', 'Deep Water Culture (DWC)'), ('RDWC', 'Recirculating Deep Water Culture (RDWC)'), ('DRIP', 'Drip Irrigation'), ('RDI', 'Recirculating Drip Irrigation (RDI)'), ('NFT', 'Nutrient Film Technique (NFT)'), ('Ebb&Flow', 'Ebb & Flow'), ('Flood&Drain', 'Flood & Drain'), ('Aeroponics', 'Aeroponics'), ('Aquaponics', 'Aquaponics'), ('Kratky', 'Kratky Method'), ('VF', 'Vertical Farming')], max_length=37, null=True),
+        ),
+        migrations.RunPython(merge_duplicate_nutrient_logs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='nutrientlog',
+            constraint=models.UniqueConstraint(fields=('log', 'nutrient'), name='unique_nutrient_log_per_log'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.1.6 on 2026-10-18 12:22
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_reservoir_logs(apps, schema_editor):
+    # concurrent fills could store several reservoir logs for a log, they are added to the oldest one by the rules of
+    # ReservoirLog.save() for a fill of a log that already has one
+    ReservoirLog = apps.get_model('records', 'ReservoirLog')
+    duplicates = ReservoirLog.objects.order_by().values('log_id').annotate(count=Count('id')).filter(count__gt=1)
+    for duplicate in duplicates:
+        reservoir_logs = list(ReservoirLog.objects.filter(log_id=duplicate['log_id']).order_by('id'))
+        kept = reservoir_logs[0]
+        for reservoir_log in reservoir_logs[1:]:
+            if reservoir_log.reverse_osmosis == 'yes':
+                kept.ro_amount = (kept.ro_amount or 0) + (reservoir_log.water or 0)
+            if reservoir_log.waste_water is not None:
+                if reservoir_log.waste_water != 0:
+                    kept.status = 'refresh'
+                elif not kept.waste_water:
+                    kept.status = 'refill'
+                kept.waste_water = (kept.waste_water or 0) + reservoir_log.waste_water
+            kept.water = (kept.water or 0) + (reservoir_log.water or 0)
+        kept.save(update_fields=['status', 'water', 'waste_water', 'ro_amount'])
+        ReservoirLog.objects.filter(pk__in=[reservoir_log.pk for reservoir_log in reservoir_logs[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0038_nutrientlog_unique_log_nutrient'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_reservoir_logs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='reservoirlog',
+            constraint=models.UniqueConstraint(fields=('log',), name='unique_reservoir_log_per_log'),
+        ),
+    ]
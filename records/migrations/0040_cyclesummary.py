@@ -0,0 +1,57 @@
+# Generated by Django 4.1.6 on 2026-10-18 12:26
+
+from django.db import migrations, models
+from django.db.models import Case, Count, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def create_cycle_summaries(apps, schema_editor):
+    Cycle = apps.get_model('records', 'Cycle')
+    CycleSummary = apps.get_model('records', 'CycleSummary')
+    Log = apps.get_model('records', 'Log')
+    NutrientLog = apps.get_model('records', 'NutrientLog')
+    ReservoirLog = apps.get_model('records', 'ReservoirLog')
+
+    CycleSummary.objects.bulk_create([CycleSummary(cycle_id=pk) for pk in Cycle.objects.values_list('pk', flat=True)])
+    phase_order = Case(
+        When(phase='seedling', then=Value(1)),
+        When(phase='vegetative', then=Value(2)),
+        When(phase='bloom', then=Value(3)),
+    )
+    logs = Log.objects.filter(cycle_id=OuterRef('cycle_id'))
+    reservoir_logs = ReservoirLog.objects.filter(log__cycle_id=OuterRef('cycle_id')).order_by()
+    nutrient_logs = NutrientLog.objects.filter(log__cycle_id=OuterRef('cycle_id')).order_by()
+    CycleSummary.objects.update(
+        log_count=Coalesce(Subquery(logs.order_by().values('cycle_id').annotate(count=Count('id')).values('count')), 0),
+        current_phase=Subquery(logs.order_by(phase_order.desc(), '-date', '-id').values('phase')[:1]),
+        last_log_date=Subquery(logs.order_by('-date').values('date')[:1]),
+        total_water=Coalesce(Subquery(
+            reservoir_logs.values('log__cycle_id').annotate(total=Sum('water')).values('total')
+        ), 0),
+        total_nutrients=Coalesce(Subquery(
+            nutrient_logs.values('log__cycle_id').annotate(total=Sum('concentration')).values('total')
+        ), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0039_reservoirlog_unique_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CycleSummary',
+            fields=[
+                ('cycle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='records.cycle')),
+                ('log_count', models.IntegerField(default=0)),
+                ('current_phase', models.CharField(blank=True, choices=[('seedling', 'Seedling'), ('vegetative', 'Vegetative'), ('bloom', 'Bloom')], max_length=12, null=True)),
+                ('last_log_date', models.DateField(blank=True, null=True)),
+                ('total_water', models.IntegerField(default=0)),
+                ('total_nutrients', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_cycle_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.1.6 on 2026-10-18 12:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0041_task'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.BigIntegerField()),
+                ('temperature_count', models.IntegerField(default=0)),
+                ('temperature_sum', models.BigIntegerField(default=0)),
+                ('temperature_min', models.IntegerField(blank=True, null=True)),
+                ('temperature_max', models.IntegerField(blank=True, null=True)),
+                ('humidity_count', models.IntegerField(default=0)),
+                ('humidity_sum', models.BigIntegerField(default=0)),
+                ('humidity_min', models.IntegerField(blank=True, null=True)),
+                ('humidity_max', models.IntegerField(blank=True, null=True)),
+                ('carbon_dioxide_count', models.IntegerField(default=0)),
+                ('carbon_dioxide_sum', models.BigIntegerField(default=0)),
+                ('carbon_dioxide_min', models.IntegerField(blank=True, null=True)),
+                ('carbon_dioxide_max', models.IntegerField(blank=True, null=True)),
+                ('cycle', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sensor_rollups', to='records.cycle')),
+            ],
+            options={
+                'ordering': ['cycle', 'hour'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SensorReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.BigIntegerField()),
+                ('temperature', models.SmallIntegerField(blank=True, null=True)),
+                ('humidity', models.SmallIntegerField(blank=True, null=True)),
+                ('carbon_dioxide', models.IntegerField(blank=True, null=True)),
+                ('cycle', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sensor_readings', to='records.cycle')),
+            ],
+            options={
+                'ordering': ['cycle', 'timestamp'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='sensorrollup',
+            constraint=models.UniqueConstraint(fields=('cycle', 'hour'), name='records_sensorrollup_cycle_hour'),
+        ),
+        migrations.AddConstraint(
+            model_name='sensorreading',
+            constraint=models.UniqueConstraint(fields=('cycle', 'timestamp'), name='records_sensorreading_cycle_timestamp'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.1.6 on 2026-10-18 12:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+import records.models
+
+
+def set_phase_order(apps, schema_editor):
+    Log = apps.get_model('records', 'Log')
+    for order, phase in enumerate(['seedling', 'vegetative', 'bloom'], start=1):
+        Log.objects.filter(phase=phase).update(phase_order=order)
+    Log.objects.exclude(phase__in=['seedling', 'vegetative', 'bloom']).update(phase_order=4)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0042_sensorreading_sensorrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='log',
+            name='phase_order',
+            field=records.models.OrdinalField(default=2, editable=False, source='phase', values=['seedling', 'vegetative', 'bloom']),
+        ),
+        migrations.RunPython(set_phase_order, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='log',
+            name='cycle',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='logs', to='records.cycle'),
+        ),
+        migrations.AlterField(
+            model_name='nutrientlog',
+            name='log',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='nutrient_logs', to='records.log'),
+        ),
+        migrations.AlterField(
+            model_name='reservoirlog',
+            name='log',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reservoir_logs', to='records.log'),
+        ),
+        migrations.AddIndex(
+            model_name='log',
+            index=models.Index(fields=['cycle', 'phase_order', 'date', 'id'], name='records_log_cycle_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='log',
+            index=models.Index(fields=['cycle', 'phase'], name='records_log_cycle_phase_idx'),
+        ),
+    ]
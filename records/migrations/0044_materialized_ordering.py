@@ -0,0 +1,35 @@
+# Generated by Django 4.1.6 on 2026-10-18 12:57
+
+from django.db import migrations
+import records.models
+
+
+def set_type_order(apps, schema_editor):
+    Nutrient = apps.get_model('records', 'Nutrient')
+    nutrient_types = ['medium_conditioner', 'base_line', 'root_expander', 'bud_strengthener', 'bud_enlarger', 'bud_taste']
+    for order, nutrient_type in enumerate(nutrient_types, start=1):
+        Nutrient.objects.filter(nutrient_type=nutrient_type).update(type_order=order)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0043_log_phase_order_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nutrient',
+            name='type_order',
+            field=records.models.OrdinalField(default=7, editable=False, source='nutrient_type', values=['medium_conditioner', 'base_line', 'root_expander', 'bud_strengthener', 'bud_enlarger', 'bud_taste']),
+        ),
+        migrations.RunPython(set_type_order, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='log',
+            options={'ordering': ['phase_order', 'date', 'id']},
+        ),
+        migrations.AlterModelOptions(
+            name='nutrientlog',
+            options={'ordering': ['nutrient__type_order', 'id']},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.6 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('records', '0044_materialized_ordering'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cyclesummary',
+            name='cache_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
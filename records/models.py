@@ -1,8 +1,12 @@
-from typing import List, Tuple, Optional
+from typing import List, Sequence, Tuple, Optional
 import uuid, logging
 
-from django.db import models
-from django.db.models import Case, Value, When
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
 
 
 # Record model
@@ -89,6 +93,39 @@ class Cycle(models.Model):
             return f"{self.genetics} - {quarter}/{year}"
 
 
+# Ordinal field
+class OrdinalField(models.PositiveSmallIntegerField):
+    """
+    A field storing the position of the value of another field of the model in a list of values, starting at 1, so
+    querysets sort by an indexed column instead of a Case expression computed for every row.
+
+    The position is set whenever the field is written, by `save()` and by `bulk_create()`. A value missing from the
+    list, e.g. None, comes after all of them. `QuerySet.update()` of the source field leaves the position stale.
+
+    Parameters:
+        source (str): The name of the field whose value is ranked.
+        values (Sequence): The values of the source field, in order.
+    """
+    def __init__(self, *args, source: str = '', values: Sequence = (), **kwargs) -> None:
+        self.source = source
+        self.values = list(values)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def get_ordinal(self, value) -> int:
+        return self.values.index(value) + 1 if value in self.values else len(self.values) + 1
+
+    def pre_save(self, model_instance: models.Model, add: bool) -> int:
+        ordinal: int = self.get_ordinal(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, ordinal)
+        return ordinal
+
+    def deconstruct(self) -> Tuple:
+        name, path, args, kwargs = super().deconstruct()
+        kwargs.update(source=self.source, values=self.values)
+        return name, path, args, kwargs
+
+
 # Log model
 class Log(models.Model):
     """
@@ -98,6 +135,7 @@ class Log(models.Model):
         cycle (Cycle): The cycle associated with the log. Required field.
         date (DateField): The date when the log was created, set automatically on creation.
         phase (str): The phase of the cycle associated with the log, from PHASE_CHOICES.
+        phase_order (OrdinalField): The position of the phase in PHASE_CHOICES, set automatically on save.
         temperature_day (DecimalField): The temperature during the day.
         temperature_night (DecimalField): The temperature during the night.
         humidity_day (IntegerField): The humidity during the day, as a percentage.
@@ -113,9 +151,16 @@ class Log(models.Model):
         comment (TextField): An optional comment about the day.
 
     Meta:
-        ordering (List): The default ordering for logs, first by phase, then by date, then by id.
+        ordering (List): The default ordering for logs, first by phase order, then by date, then by id, the order
+                         of records_log_cycle_order_idx, so the logs of a cycle, its `first()` and `last()` are read
+                         from the index.
+        indexes (List): An index on cycle, phase_order, date and id, the order logs of a cycle are listed and
+                        paginated in, and an index on cycle and phase, the lookup of the logs of a phase. Both lead
+                        with the cycle, so the foreign key has no index of its own.
 
     Methods:
+        save():                                     Overrides the default save method to keep `phase_order` in
+                                                    sync when only some fields are saved.
         get_day_in_cycle (int):                     Returns the day in the cycle.
         get_phase_day_in_cycle (int):               Returns the day in the phase of cycle.
         get_previous_log (Optional['Log']):         Returns the previous log object based on the ID of the current
@@ -138,9 +183,10 @@ class Log(models.Model):
         (100, '100%'),
     ]
 
-    cycle = models.ForeignKey(Cycle, on_delete=models.CASCADE, related_name='logs')
+    cycle = models.ForeignKey(Cycle, on_delete=models.CASCADE, related_name='logs', db_index=False)
     date = models.DateField(auto_now_add=True)
     phase = models.CharField(max_length=12, choices=PHASE_CHOICES, default='vegetative')
+    phase_order = OrdinalField(source='phase', values=[phase for phase, _ in PHASE_CHOICES], default=2)
     temperature_day = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
     temperature_night = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True)
     humidity_day = models.IntegerField(blank=True, null=True)
@@ -157,14 +203,20 @@ class Log(models.Model):
 
     class Meta:
         ordering: List = [
-            Case(
-                When(phase='seedling', then=Value(1)),
-                When(phase='vegetative', then=Value(2)),
-                When(phase='bloom', then=Value(3)),
-            ),
+            'phase_order',
             'date',
             'id',
         ]
+        indexes: List = [
+            models.Index(fields=['cycle', 'phase_order', 'date', 'id'], name='records_log_cycle_order_idx'),
+            models.Index(fields=['cycle', 'phase'], name='records_log_cycle_phase_idx'),
+        ]
+
+    def save(self, *args, **kwargs) -> None:
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phase' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phase_order'}
+        super().save(*args, **kwargs)
 
     def get_day_in_cycle(self) -> int:
         try:
@@ -223,6 +275,8 @@ class Nutrient(models.Model):
         name (CharField): The name of the nutrient.
         brand (CharField): The brand of the nutrient.
         nutrient_type (CharField): The type of the nutrient, from NUTRIENT_TYPE_CHOICES.
+        type_order (OrdinalField): The position of the type in NUTRIENT_TYPE_CHOICES, set automatically on save,
+                                   after every type for a nutrient without one.
         featured_image (ImageField): An image representing the nutrient.
         detail (TextField): Additional details about the nutrient.
 
@@ -231,6 +285,7 @@ class Nutrient(models.Model):
                          the first by brand, then by nutrient_type, then by name.
 
     Methods:
+        save(): Overrides the default save method to keep `type_order` in sync when only some fields are saved.
         __str__ (str): Returns the name of the nutrient as a string.
 
     """
@@ -246,6 +301,7 @@ class Nutrient(models.Model):
     name = models.CharField(max_length=80)
     brand = models.CharField(max_length=80)
     nutrient_type = models.CharField(max_length=18, blank=True, null=True, choices=NUTRIENT_TYPE_CHOICES)
+    type_order = OrdinalField(source='nutrient_type', values=[value for value, _ in NUTRIENT_TYPE_CHOICES], default=7)
     featured_image = models.ImageField(null=True, blank=True, default="default_fertilizer.jpg")
     detail = models.TextField(blank=True, null=True)
 
@@ -256,6 +312,12 @@ class Nutrient(models.Model):
             'name',
         ]
 
+    def save(self, *args, **kwargs) -> None:
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nutrient_type' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'type_order'}
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         return self.name
 
@@ -272,14 +334,24 @@ class NutrientLog(models.Model):
 
     Meta:
         ordering (List): A list of strings representing the fields to order the results by. The results will be ordered
-                         the first by medium_conditioner, then by base_line, then by root_expander,
-                         then by bud_strengthener, then by bud_enlarger, then by bud_taste.
+                         by the type order of the nutrient, the first by medium_conditioner, then by base_line, then by
+                         root_expander, then by bud_strengthener, then by bud_enlarger, then by bud_taste, then by id.
+        constraints (List): A `Log` holds at most one `NutrientLog` per `Nutrient`. The unique index on log and
+                            nutrient serves the lookups by log, so the foreign key has no index of its own.
 
     Methods:
         save():                                             Overrides the default save method. If a `NutrientLog`
                                                             already exists for the same `Log` and `Nutrient`, the
-                                                            concentrations are added together and the existing logs
-                                                            are deleted before saving the new `NutrientLog` instance.
+                                                            concentration of the new `NutrientLog` is added to it in
+                                                            a single atomic upsert, and the instance takes over its
+                                                            primary key and total concentration. The concentration
+                                                            added to the cycle is kept in `_summary_delta` for
+                                                            CycleSummary, None for an edit of an existing instance.
+
+        _upsert():                                          Helper method inserting the `NutrientLog`, or adding its
+                                                            concentration to the existing one, in one statement on
+                                                            PostgreSQL and in one transaction on SQLite, reporting
+                                                            whether the row was inserted to `post_save`.
 
         __str__ (str):                                      Returns the name and concentration of the nutrient log as
                                                             a string. formatted as "[nutrient] - [concentration]".
@@ -289,31 +361,82 @@ class NutrientLog(models.Model):
                                                             usage per liter as a float rounded to two decimal places,
                                                             or `None` if the required data is missing.
     """
-    log = models.ForeignKey(Log, on_delete=models.CASCADE, related_name='nutrient_logs')
+    log = models.ForeignKey(Log, on_delete=models.CASCADE, related_name='nutrient_logs', db_index=False)
     nutrient = models.ForeignKey(Nutrient, on_delete=models.CASCADE)
     concentration = models.IntegerField()
 
     class Meta:
         ordering: List = [
-            Case(
-                When(nutrient__nutrient_type='medium_conditioner', then=Value(1)),
-                When(nutrient__nutrient_type='base_line', then=Value(2)),
-                When(nutrient__nutrient_type='root_expander', then=Value(3)),
-                When(nutrient__nutrient_type='bud_strengthener', then=Value(4)),
-                When(nutrient__nutrient_type='bud_enlarger', then=Value(5)),
-                When(nutrient__nutrient_type='bud_taste', then=Value(6)),
-            ),
+            'nutrient__type_order',
+            'id',
+        ]
+        constraints: List = [
+            models.UniqueConstraint(fields=['log', 'nutrient'], name='unique_nutrient_log_per_log'),
         ]
 
     def __str__(self) -> str:
         return f"{self.nutrient} - {self.concentration}"
 
     def save(self, *args, **kwargs) -> None:
-        existing_logs: models.QuerySet = NutrientLog.objects.filter(log_id=self.log_id, nutrient=self.nutrient)
-        if existing_logs.exists():
-            self.concentration += sum(log.concentration for log in existing_logs)
-            existing_logs.delete()
-        super().save(*args, **kwargs)
+        if not self._state.adding:
+            self._summary_delta = None
+            super().save(*args, **kwargs)
+            return
+
+        self._summary_delta = self.concentration
+        using: str = kwargs.get('using') or router.db_for_write(NutrientLog, instance=self)
+        features = connections[using].features
+        if features.supports_update_conflicts_with_target and features.can_return_columns_from_insert:
+            self._upsert(using)
+            return
+
+        with transaction.atomic(using=using):
+            existing_log: Optional['NutrientLog'] = NutrientLog.objects.using(using).select_for_update().filter(
+                log_id=self.log_id, nutrient_id=self.nutrient_id
+            ).first()
+            if existing_log:
+                self.pk = existing_log.pk
+                self.concentration += existing_log.concentration
+                self._state.adding = False
+                kwargs['force_insert'] = False
+            super().save(*args, **kwargs)
+
+    def _upsert(self, using: str) -> None:
+        connection = connections[using]
+        table: str = connection.ops.quote_name(self._meta.db_table)
+        values: List = [self.log_id, self.nutrient_id, self.concentration]
+        pre_save.send(sender=NutrientLog, instance=self, raw=False, using=using, update_fields=None)
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # xmax is 0 for a row version the statement inserted, not for one it updated
+                cursor.execute(
+                    f"INSERT INTO {table} (log_id, nutrient_id, concentration) VALUES (%s, %s, %s) "
+                    f"ON CONFLICT (log_id, nutrient_id) DO UPDATE "
+                    f"SET concentration = {table}.concentration + excluded.concentration "
+                    f"RETURNING id, concentration, (xmax = 0)",
+                    values,
+                )
+                self.pk, self.concentration, created = cursor.fetchone()
+            else:
+                # the insert takes the write lock, so the row it conflicted with is still there to add to
+                cursor.execute(
+                    f"INSERT INTO {table} (log_id, nutrient_id, concentration) VALUES (%s, %s, %s) "
+                    f"ON CONFLICT (log_id, nutrient_id) DO NOTHING RETURNING id, concentration",
+                    values,
+                )
+                row: Optional[Tuple[int, int]] = cursor.fetchone()
+                created = row is not None
+                if not created:
+                    cursor.execute(
+                        f"UPDATE {table} SET concentration = concentration + %s "
+                        f"WHERE log_id = %s AND nutrient_id = %s RETURNING id, concentration",
+                        [self.concentration, self.log_id, self.nutrient_id],
+                    )
+                    row = cursor.fetchone()
+                self.pk, self.concentration = row
+        self._state.adding = False
+        self._state.db = using
+        post_save.send(sender=NutrientLog, instance=self, created=created, update_fields=None, raw=False, using=using)
 
     def get_nutrient_usage_per_liter(self) -> Optional[float]:
         try:
@@ -341,17 +464,25 @@ class ReservoirLog(models.Model):
         waste_water (IntegerField): An optional integer field representing the amount of waste water.
         ro_amount (IntegerField): An optional integer field representing the amount of water that underwent reverse osmosis.
 
+    Meta:
+        constraints (List): A `Log` holds at most one `ReservoirLog`. Its unique index serves the lookups by log, so
+                            the foreign key has no index of its own.
+
     Methods:
         __str__(str):                           Returns a string representation of the ReservoirLog object.
 
         get_ro_water_ratio(Optional[int]):      Calculates and returns the ratio of water that underwent reverse
                                                 osmosis to the total water amount in %.
 
-        save():                                 Overrides the default save method to update existing logs and calculate
-                                                reverse osmosis usage.
-        _update_existing_log():                 Helper method to update an existing log.
-        _update_existing_ro_amount():           Helper method to update the reverse osmosis amount of an existing log.
-        _update_existing_waste_water():         Helper method to update the waste water amount of an existing log.
+        save():                                 Overrides the default save method to set the reverse osmosis amount
+                                                from the water of the instance, and to add new water to the existing
+                                                log of the same `Log`, if any, in a single conditional update inside
+                                                a transaction. The water
+                                                added to the cycle is kept in `_summary_delta` for CycleSummary,
+                                                None for an edit of an existing instance.
+        _update_existing_log():                 Helper method to update an existing log, returns whether one existed.
+        _update_existing_ro_amount():           Helper method building the reverse osmosis amount update.
+        _update_existing_waste_water():         Helper method building the waste water and status update.
     """
     RO_OPTIONS: List[Tuple[str, str]] = [
         ('yes', 'Yes'),
@@ -362,53 +493,76 @@ class ReservoirLog(models.Model):
         ('refill', 'Refill'),
     ]
 
-    log = models.ForeignKey(Log, on_delete=models.CASCADE, related_name='reservoir_logs')
+    log = models.ForeignKey(Log, on_delete=models.CASCADE, related_name='reservoir_logs', db_index=False)
     status = models.CharField(choices=RESERVOIR_STATUS, default='refill', max_length=7, editable=False)
     reverse_osmosis = models.CharField(choices=RO_OPTIONS, default='yes', max_length=3)
     water = models.IntegerField(blank=True, null=True)
     waste_water = models.IntegerField(blank=True, null=True)
     ro_amount = models.IntegerField(blank=True, null=True, editable=False)
 
+    class Meta:
+        constraints: List = [
+            models.UniqueConstraint(fields=['log'], name='unique_reservoir_log_per_log'),
+        ]
+
     def __str__(self) -> str:
         return f"{self.status} - {self.water}"
 
-    def save(self, *args, **kwargs):
-        if self.reverse_osmosis == 'yes':
-            if self.ro_amount is None:
-                self.ro_amount = self.water
-            else:
-                self.ro_amount += self.water
-        else:
-            self.ro_amount = None
+    def save(self, *args, **kwargs) -> None:
+        # an edit replaces the amount, new water is added to an existing log by `_update_existing_log`
+        self.ro_amount = self.water if self.reverse_osmosis == 'yes' else None
 
-        try:
-            existing_log: models.QuerySet = ReservoirLog.objects.get(log=self.log)
-            existing_log.water = (existing_log.water or 0) + (self.water or 0)
-            self._update_existing_log(existing_log)
-            super(ReservoirLog, existing_log).save(*args, **kwargs)
-        except ReservoirLog.DoesNotExist:
-            if self.waste_water is not None:
-                self.status = 'refresh'
+        if not self._state.adding:
+            self._summary_delta = None
             super().save(*args, **kwargs)
-        except Exception as e:
-            logging.exception(f"An error occurred: {e}")
+            return
 
-    def _update_existing_log(self, existing_log: 'ReservoirLog') -> None:
+        self._summary_delta = self.water or 0
+        using: str = kwargs.get('using') or router.db_for_write(ReservoirLog, instance=self)
+        with transaction.atomic(using=using):
+            if self._update_existing_log(using):
+                return
+            if self.waste_water is not None:
+                self.status = 'refresh'
+            try:
+                # a concurrent first fill of the same log may insert before us, then add to it instead
+                with transaction.atomic(using=using):
+                    super().save(*args, **kwargs)
+            except IntegrityError:
+                if not self._update_existing_log(using):
+                    raise
+
+    def _update_existing_log(self, using: str) -> bool:
+        existing_logs: models.QuerySet = ReservoirLog.objects.using(using).filter(log_id=self.log_id)
+        updates: dict = {'water': Coalesce(F('water'), 0) + (self.water or 0)}
         if self.reverse_osmosis == 'yes':
-            self._update_existing_ro_amount(existing_log)
+            updates.update(self._update_existing_ro_amount())
         if self.waste_water is not None:
-            self._update_existing_waste_water(existing_log)
-
-    def _update_existing_ro_amount(self, existing_log: 'ReservoirLog') -> None:
-        existing_log.ro_amount = existing_log.ro_amount or 0
-        existing_log.ro_amount += self.water if self.water is not None else 0
-
-    def _update_existing_waste_water(self, existing_log: 'ReservoirLog') -> None:
-        existing_log.waste_water = (existing_log.waste_water or 0) + (self.waste_water or 0)
+            updates.update(self._update_existing_waste_water())
+        if not existing_logs.update(**updates):
+            return False
+
+        existing_log: ReservoirLog = existing_logs.get()
+        for field in ('id', 'status', 'water', 'waste_water', 'ro_amount'):
+            setattr(self, field, getattr(existing_log, field))
+        self._state.adding = False
+        self._state.db = using
+        post_save.send(sender=ReservoirLog, instance=self, created=False, update_fields=None, raw=False, using=using)
+        return True
+
+    def _update_existing_ro_amount(self) -> dict:
+        return {'ro_amount': Coalesce(F('ro_amount'), 0) + (self.water if self.water is not None else 0)}
+
+    def _update_existing_waste_water(self) -> dict:
+        updates: dict = {'waste_water': Coalesce(F('waste_water'), 0) + self.waste_water}
         if self.waste_water != 0:
-            existing_log.status = 'refresh'
-        elif existing_log.waste_water == 0:
-            existing_log.status = 'refill'
+            updates['status'] = Value('refresh')
+        else:
+            updates['status'] = Case(
+                When(Q(waste_water=0) | Q(waste_water__isnull=True), then=Value('refill')),
+                default=F('status'),
+            )
+        return updates
 
     def get_percent_ro_ratio(self) -> Optional[int]:
         try:
@@ -419,3 +573,225 @@ class ReservoirLog(models.Model):
         except Exception as e:
             logging.exception(f"Unable to calculate RO ratio: {e}")
             return None
+
+
+# CycleSummary model
+class CycleSummary(models.Model):
+    """
+    A model holding denormalized progress counters of a `Cycle`, so the cycle list renders in a single query.
+
+    Fields:
+        cycle (OneToOneField): The `Cycle` the counters belong to, the primary key of the summary.
+        log_count (IntegerField): The number of logs of the cycle.
+        current_phase (CharField): The phase of the last log of the cycle in `Log` ordering, from Log.PHASE_CHOICES.
+        last_log_date (DateField): The date of the most recent log of the cycle.
+        total_water (IntegerField): The water of every reservoir log of the cycle, in litres.
+        total_nutrients (IntegerField): The concentration of every nutrient log of the cycle.
+        cache_version (PositiveIntegerField): The version the cached log rows of the cycle are stored under, see
+                                              records.cache. Kept here rather than in the cache, which evicts.
+
+    Methods:
+        add_log():      Updates the counters of the cycle of a newly created `Log` incrementally, in one statement.
+        add_feeding():  Adds the water or concentration of a new or merged feeding to the totals of a cycle, in one
+                        statement.
+        refresh():      Recomputes the counters of the given cycles from their logs, in one statement. Used when a
+                        change cannot be applied incrementally, e.g. an edited or deleted log or feeding, or logs
+                        written with bulk_create, which sends no signals.
+    """
+    cycle = models.OneToOneField(Cycle, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    log_count = models.IntegerField(default=0)
+    current_phase = models.CharField(max_length=12, choices=Log.PHASE_CHOICES, blank=True, null=True)
+    last_log_date = models.DateField(blank=True, null=True)
+    total_water = models.IntegerField(default=0)
+    total_nutrients = models.IntegerField(default=0)
+    cache_version = models.PositiveIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.cycle} - {self.log_count} logs"
+
+    @staticmethod
+    def add_log(log: Log) -> None:
+        phases: List[str] = [phase for phase, _ in Log.PHASE_CHOICES]
+        # the new log comes last in `Log` ordering unless the cycle already reached a later phase
+        earlier_phases: List[str] = phases[:phases.index(log.phase) + 1] if log.phase in phases else []
+        CycleSummary.objects.filter(cycle_id=log.cycle_id).update(
+            log_count=F('log_count') + 1,
+            last_log_date=Case(
+                When(Q(last_log_date__isnull=True) | Q(last_log_date__lt=log.date), then=Value(log.date)),
+                default=F('last_log_date'),
+            ),
+            current_phase=Case(
+                When(Q(current_phase__isnull=True) | Q(current_phase__in=earlier_phases), then=Value(log.phase)),
+                default=F('current_phase'),
+            ),
+        )
+
+    @staticmethod
+    def add_feeding(cycle_id, water: int = 0, nutrients: int = 0) -> None:
+        CycleSummary.objects.filter(cycle_id=cycle_id).update(
+            total_water=F('total_water') + water,
+            total_nutrients=F('total_nutrients') + nutrients,
+        )
+
+    @staticmethod
+    def refresh(cycle_ids: List) -> None:
+        logs: models.QuerySet = Log.objects.filter(cycle_id=OuterRef('cycle_id'))
+        reservoir_logs: models.QuerySet = ReservoirLog.objects.filter(log__cycle_id=OuterRef('cycle_id')).order_by()
+        nutrient_logs: models.QuerySet = NutrientLog.objects.filter(log__cycle_id=OuterRef('cycle_id')).order_by()
+        CycleSummary.objects.filter(cycle_id__in=cycle_ids).update(
+            log_count=Coalesce(Subquery(
+                logs.order_by().values('cycle_id').annotate(count=Count('id')).values('count')
+            ), 0),
+            current_phase=Subquery(logs.order_by('-phase_order', '-date', '-id').values('phase')[:1]),
+            last_log_date=Subquery(logs.order_by('-date').values('date')[:1]),
+            total_water=Coalesce(Subquery(
+                reservoir_logs.values('log__cycle_id').annotate(total=Sum('water')).values('total')
+            ), 0),
+            total_nutrients=Coalesce(Subquery(
+                nutrient_logs.values('log__cycle_id').annotate(total=Sum('concentration')).values('total')
+            ), 0),
+        )
+
+
+# Task model
+class Task(models.Model):
+    """
+    A model representing a job of the background task queue, see records.tasks.
+
+    Fields:
+        name (CharField): The name the task function is registered under.
+        args (JSONField): The positional arguments of the call, a list.
+        kwargs (JSONField): The keyword arguments of the call, a dictionary.
+        status (CharField): The state of the task, from STATUS_CHOICES.
+        attempts (IntegerField): The number of times a worker started the task.
+        max_attempts (IntegerField): The number of attempts after which a failing task is given up.
+        run_after (DateTimeField): The time before which no worker starts the task, pushed back between retries.
+        locked_until (DateTimeField): The end of the visibility timeout of a running task, after which another
+                                      worker takes it over.
+        last_error (TextField): The traceback of the last failed attempt.
+        created (DateTimeField): The time the task was enqueued, set automatically on creation.
+        finished (DateTimeField): The time the task succeeded or was given up.
+
+    Meta:
+        ordering (List): Tasks are started in the order they became due, then by id.
+        indexes (List): An index on status and run_after, the lookup of the next due task.
+    """
+    STATUS_CHOICES: List[Tuple[str, str]] = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True, encoder=DjangoJSONEncoder)
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering: List = [
+            'run_after',
+            'id',
+        ]
+        indexes: List = [
+            models.Index(fields=['status', 'run_after'], name='records_task_due_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} #{self.pk} - {self.status}"
+
+
+# SensorReading model
+class SensorReading(models.Model):
+    """
+    A model representing a sample of the environment sensors of a cycle, posted by a controller every few seconds.
+
+    Values are stored as integers at the fixed scales of records.sensors.SENSOR_SCALES, e.g. 2456 for 24.56 °C, which
+    keeps rows small and avoids Decimal conversions on reads. Readings are summarized into `SensorRollup` buckets and
+    the day and night fields of `Log`, see records.sensors.
+
+    Fields:
+        cycle (ForeignKey): The `Cycle` the reading belongs to.
+        timestamp (BigIntegerField): The time of the sample, in seconds since the Unix epoch.
+        temperature (SmallIntegerField): The air temperature, in hundredths of a degree Celsius.
+        humidity (SmallIntegerField): The relative humidity, in tenths of a percent.
+        carbon_dioxide (IntegerField): The co2 concentration, in ppm.
+
+    Meta:
+        ordering (List): Readings are ordered by cycle, then by time, the order of their unique index.
+        constraints (List): A cycle has a single reading per second, so a batch posted twice is stored once. Its
+                            index serves the time range queries of a cycle.
+    """
+    # the unique index on cycle and timestamp covers lookups by cycle, a second index would only slow down inserts
+    cycle = models.ForeignKey(Cycle, on_delete=models.CASCADE, related_name='sensor_readings', db_index=False)
+    timestamp = models.BigIntegerField()
+    temperature = models.SmallIntegerField(blank=True, null=True)
+    humidity = models.SmallIntegerField(blank=True, null=True)
+    carbon_dioxide = models.IntegerField(blank=True, null=True)
+
+    class Meta:
+        ordering: List = [
+            'cycle',
+            'timestamp',
+        ]
+        constraints: List = [
+            models.UniqueConstraint(fields=['cycle', 'timestamp'], name='records_sensorreading_cycle_timestamp'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.cycle} - {self.timestamp}"
+
+
+# SensorRollup model
+class SensorRollup(models.Model):
+    """
+    A model representing the readings of a cycle within an hour, aggregated for dashboards.
+
+    Sums and counts are kept instead of means, so buckets combine into days or phases exactly. Values are at the
+    scales of `SensorReading`.
+
+    Fields:
+        cycle (ForeignKey): The `Cycle` the readings belong to.
+        hour (BigIntegerField): The start of the hour, in seconds since the Unix epoch.
+        <metric>_count (IntegerField): The number of readings with a value, for temperature, humidity and
+                                       carbon_dioxide.
+        <metric>_sum (BigIntegerField): The sum of the values.
+        <metric>_min, <metric>_max (IntegerField): The extremes of the values.
+
+    Meta:
+        ordering (List): Buckets are ordered by cycle, then by hour, the order of their unique index.
+        constraints (List): A cycle has a single bucket per hour.
+    """
+    cycle = models.ForeignKey(Cycle, on_delete=models.CASCADE, related_name='sensor_rollups', db_index=False)
+    hour = models.BigIntegerField()
+    temperature_count = models.IntegerField(default=0)
+    temperature_sum = models.BigIntegerField(default=0)
+    temperature_min = models.IntegerField(blank=True, null=True)
+    temperature_max = models.IntegerField(blank=True, null=True)
+    humidity_count = models.IntegerField(default=0)
+    humidity_sum = models.BigIntegerField(default=0)
+    humidity_min = models.IntegerField(blank=True, null=True)
+    humidity_max = models.IntegerField(blank=True, null=True)
+    carbon_dioxide_count = models.IntegerField(default=0)
+    carbon_dioxide_sum = models.BigIntegerField(default=0)
+    carbon_dioxide_min = models.IntegerField(blank=True, null=True)
+    carbon_dioxide_max = models.IntegerField(blank=True, null=True)
+
+    class Meta:
+        ordering: List = [
+            'cycle',
+            'hour',
+        ]
+        constraints: List = [
+            models.UniqueConstraint(fields=['cycle', 'hour'], name='records_sensorrollup_cycle_hour'),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.cycle} - {self.hour}"
@@ -0,0 +1,232 @@
+import gzip
+import json
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .importer import IMPORT_CYCLE_FIELDS, IMPORT_LOG_FIELDS, IMPORT_SENSOR_FIELDS, IMPORT_SENSOR_MODELS
+from .models import Cycle, Log, NutrientLog, ReservoirLog, SensorReading, Task
+from .sensors import ROLLUP_SECONDS, rollup_sensor_readings
+from .tasks import enqueue, task
+
+# seconds between two runs of the scheduled retention task
+RETENTION_INTERVAL: int = 24 * 60 * 60
+
+
+def compact_sensor_readings(days: int) -> int:
+    """
+    A function to delete the raw sensor readings older than a number of days, once they are rolled up.
+
+    The cutoff is rounded down to a full hour, so the SensorRollup bucket of a deleted reading never has to be
+    recomputed from the raw readings left. Readings posted later for a compacted hour would replace its bucket, so
+    controllers should not backfill past the retention.
+
+    Parameters:
+        days (int): The age, in days, of the oldest readings kept.
+
+    Returns:
+        int: The number of deleted readings.
+    """
+    cutoff: int = int((timezone.now() - timedelta(days=days)).timestamp())
+    cutoff -= cutoff % ROLLUP_SECONDS
+    spans = (
+        SensorReading.objects.filter(timestamp__lt=cutoff).order_by().values('cycle_id')
+        .annotate(start=Min('timestamp'), end=Max('timestamp'))
+    )
+    deleted: int = 0
+    for span in spans:
+        with transaction.atomic():
+            rollup_sensor_readings(span['cycle_id'], span['start'], span['end'])
+            count, _ = SensorReading.objects.filter(cycle_id=span['cycle_id'], timestamp__lt=cutoff).delete()
+        deleted += count
+    return deleted
+
+
+def _reservoir_rows(reservoir: Dict) -> List[Dict]:
+    # the rows the importer merges back into the reservoir log, the reverse osmosis water and the rest of it
+    water: int = reservoir['water'] or 0
+    ro_amount: int = reservoir['ro_amount'] or 0
+    rows: List[Dict] = [{
+        'water': ro_amount or water,
+        'waste_water': reservoir['waste_water'],
+        'reverse_osmosis': 'yes' if ro_amount else 'no',
+    }]
+    if ro_amount and water > ro_amount:
+        rows.append({'water': water - ro_amount, 'reverse_osmosis': 'no'})
+    return rows
+
+
+def iter_archive_rows(cycle: Cycle) -> Iterator[Dict]:
+    """
+    A function to iterate the history of a cycle as rows of the importer, see records.importer.RecordImporter.
+
+    Parameters:
+        cycle (Cycle): The Cycle object to archive.
+
+    Returns:
+        Iterator[Dict]: A row per log, in date order, holding the cycle, the log fields and the nutrients, followed
+                        by a row per part of its reservoir log, then a row per sensor rollup and per sensor reading.
+    """
+    nutrients: Dict[int, List[Dict]] = {}
+    for nutrient_log in NutrientLog.objects.filter(log__cycle=cycle).order_by().values(
+            'log_id', 'nutrient__name', 'nutrient__brand', 'concentration'):
+        nutrients.setdefault(nutrient_log['log_id'], []).append({
+            'nutrient': nutrient_log['nutrient__name'],
+            'brand': nutrient_log['nutrient__brand'],
+            'concentration': nutrient_log['concentration'],
+        })
+    reservoirs: Dict[int, List[Dict]] = {}
+    for reservoir in ReservoirLog.objects.filter(log__cycle=cycle).order_by('id').values(
+            'log_id', 'water', 'waste_water', 'ro_amount'):
+        reservoirs.setdefault(reservoir['log_id'], []).extend(_reservoir_rows(reservoir))
+
+    cycle_values: Dict = {'cycle': cycle.name, 'genetics': cycle.genetics}
+    cycle_values.update({field: getattr(cycle, field) for field in IMPORT_CYCLE_FIELDS})
+    logs = Log.objects.filter(cycle=cycle).order_by('date', 'id').values('id', 'date', *IMPORT_LOG_FIELDS)
+    for log in logs.iterator():
+        log_id: int = log.pop('id')
+        row: Dict = {**cycle_values, **{field: value for field, value in log.items() if value not in (None, '')}}
+        if log_id in nutrients:
+            row['nutrients'] = nutrients[log_id]
+        yield row
+        for reservoir_row in reservoirs.get(log_id, []):
+            yield {'cycle': cycle.name, 'genetics': cycle.genetics, 'date': log['date'], **reservoir_row}
+
+    # rollups keep the history of compacted readings, so both are archived as stored
+    for kind, model in IMPORT_SENSOR_MODELS.items():
+        for values in model.objects.filter(cycle=cycle).values(*IMPORT_SENSOR_FIELDS[kind]).iterator():
+            yield {'cycle': cycle.name, 'genetics': cycle.genetics, kind: values}
+
+
+def archive_cycle(cycle: Cycle, directory: str) -> str:
+    """
+    A function to write the history of a cycle to a gzip compressed NDJSON file, then delete the cycle.
+
+    The file holds the logs, feedings and sensor data of the cycle, and can be imported again with the
+    import_records command. The cycle is only deleted once its file is
+    complete.
+
+    Parameters:
+        cycle (Cycle): The Cycle object to archive.
+        directory (str): The directory the file is written to, created if missing.
+
+    Returns:
+        str: The path of the file, '<cycle date>-<cycle id>.ndjson.gz'.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path: str = os.path.join(directory, f'{cycle.date.isoformat()}-{cycle.pk}.ndjson.gz')
+    with gzip.open(f'{path}.tmp', 'wt', encoding='utf-8') as archive:
+        for row in iter_archive_rows(cycle):
+            archive.write(json.dumps(row, default=str) + '\n')
+    os.replace(f'{path}.tmp', path)
+    cycle.delete()
+    return path
+
+
+def archive_finished_cycles(days: int, directory: str) -> List[str]:
+    """
+    A function to archive the cycles whose last log is older than a number of days, see `archive_cycle`.
+
+    Parameters:
+        days (int): The age, in days, of the last log of an archived cycle.
+        directory (str): The directory the files are written to.
+
+    Returns:
+        List[str]: The paths of the written files.
+    """
+    cutoff: date = timezone.localdate() - timedelta(days=days)
+    return [
+        archive_cycle(cycle, directory)
+        for cycle in Cycle.objects.filter(summary__last_log_date__lt=cutoff).order_by('date')
+    ]
+
+
+def purge_tasks(days: int) -> int:
+    """
+    A function to delete the tasks that succeeded or were given up more than a number of days ago.
+
+    Parameters:
+        days (int): The age, in days, of the oldest finished tasks kept.
+
+    Returns:
+        int: The number of deleted tasks.
+    """
+    count, _ = Task.objects.filter(
+        status__in=['done', 'failed'], finished__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return count
+
+
+def optimize_database(vacuum: bool = True) -> None:
+    """
+    A function to refresh the statistics of the query planner and, optionally, give the space of deleted rows back.
+
+    VACUUM rewrites the whole SQLite file, and cannot run inside a transaction.
+
+    Parameters:
+        vacuum (bool, optional): Whether to VACUUM before analyzing. Defaults to True.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('VACUUM ANALYZE' if vacuum else 'ANALYZE')
+        elif connection.vendor == 'sqlite':
+            if vacuum:
+                cursor.execute('VACUUM')
+            cursor.execute('ANALYZE')
+
+
+def apply_retention(raw_readings_days: Optional[int] = None, archive_cycles_days: Optional[int] = None,
+                    tasks_days: Optional[int] = None, archive_dir: Optional[str] = None,
+                    vacuum: bool = True) -> Dict[str, int]:
+    """
+    A function to apply the retention policies, then optimize the database. A policy left to None is not applied.
+
+    Parameters:
+        raw_readings_days (int, optional): The age after which raw readings are compacted into their rollups.
+        archive_cycles_days (int, optional): The age of the last log after which a cycle is archived.
+        tasks_days (int, optional): The age after which finished tasks are deleted.
+        archive_dir (str, optional): The directory cycles are archived to. Defaults to RECORDS_ARCHIVE_DIR.
+        vacuum (bool, optional): Whether to VACUUM the database if anything was removed, ANALYZE runs either way.
+                                 Defaults to True.
+
+    Returns:
+        Dict[str, int]: The number of compacted 'readings', archived 'cycles' and deleted 'tasks'.
+    """
+    removed: Dict[str, int] = {'readings': 0, 'cycles': 0, 'tasks': 0}
+    if raw_readings_days is not None:
+        removed['readings'] = compact_sensor_readings(raw_readings_days)
+    if archive_cycles_days is not None:
+        removed['cycles'] = len(archive_finished_cycles(archive_cycles_days,
+                                                        archive_dir or settings.RECORDS_ARCHIVE_DIR))
+    if tasks_days is not None:
+        removed['tasks'] = purge_tasks(tasks_days)
+    optimize_database(vacuum=vacuum and any(removed.values()))
+    return removed
+
+
+def schedule_retention(delay: int = RETENTION_INTERVAL) -> Optional[Task]:
+    """
+    A function to enqueue the scheduled retention task, unless it is already waiting to run.
+
+    Parameters:
+        delay (int, optional): The number of seconds before the task may start. Defaults to RETENTION_INTERVAL.
+
+    Returns:
+        Optional[Task]: The enqueued task, None if one was already pending.
+    """
+    if Task.objects.filter(name=apply_retention_policy.task_name, status='pending').exists():
+        return None
+    return enqueue(apply_retention_policy, delay=delay)
+
+
+@task(name='apply_retention_policy', max_attempts=1, atomic=False)
+def apply_retention_policy() -> None:
+    # schedules the next run before applying the RECORDS_RETENTION policies, so the daily runs go on even if this one
+    # fails, its worker dies or a long VACUUM outlives the visibility timeout and the task is given up
+    schedule_retention()
+    apply_retention(**settings.RECORDS_RETENTION)
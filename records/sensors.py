@@ -0,0 +1,326 @@
+import math
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.base.operations import BaseDatabaseOperations
+from django.db.models import Count, F, Max, Min, QuerySet, Sum
+from django.db.models.functions import Mod
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .cache import invalidate_cycle_cache
+from .models import Log, SensorReading, SensorRollup, Task
+from .tasks import enqueue, task
+
+# measured metrics and the factor their values are stored at, e.g. a temperature of 24.56 °C is stored as 2456
+SENSOR_SCALES: Dict[str, int] = {
+    'temperature': 100,
+    'humidity': 10,
+    'carbon_dioxide': 1,
+}
+# hours of light per day of every phase, readings outside the photoperiod count as night
+PHOTOPERIODS: Dict[str, int] = {
+    'seedling': 18,
+    'vegetative': 18,
+    'bloom': 12,
+}
+# the readings of a bucket are aggregated into the duration of a SensorRollup
+ROLLUP_SECONDS: int = 3600
+# seconds a rollup waits after the readings that scheduled it, readings arriving meanwhile join the same rollup
+ROLLUP_DELAY: int = 300
+SENSOR_BATCH_SIZE: int = 2000
+# the scaled values the SensorReading column of every metric holds, the same on every database backend
+SENSOR_RANGES: Dict[str, Tuple[int, int]] = {
+    metric: BaseDatabaseOperations.integer_field_ranges[SensorReading._meta.get_field(metric).get_internal_type()]
+    for metric in SENSOR_SCALES
+}
+
+
+class ReadingError(NamedTuple):
+    """
+    A reading rejected by `parse_readings`.
+
+    Fields:
+        index (int): The position of the reading in the batch.
+        errors (Dict[str, List[str]]): The messages by field.
+    """
+    index: int
+    errors: Dict[str, List[str]]
+
+
+def _parse_timestamp(value) -> int:
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, (int, float)):
+        return int(value)
+    moment: Optional[datetime] = parse_datetime(str(value))
+    if moment is None:
+        raise ValueError
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, timezone.get_default_timezone())
+    return int(moment.timestamp())
+
+
+def parse_readings(rows: Iterable, cycles: Dict) -> Tuple[List[SensorReading], List[ReadingError]]:
+    """
+    A function to validate readings posted by a controller and scale them into SensorReading objects.
+
+    A reading is a dictionary with the 'cycle' primary key, a 'timestamp' as seconds since the Unix epoch or an ISO
+    8601 date and time, and any SENSOR_SCALES metric as a number or null. A value its column cannot hold once scaled,
+    see SENSOR_RANGES, rejects the reading rather than failing the insert of the whole batch.
+
+    Parameters:
+        rows (Iterable): The readings.
+        cycles (Dict): The Cycle objects the readings may belong to, by primary key as a string.
+
+    Returns:
+        Tuple[List[SensorReading], List[ReadingError]]: The valid readings, unsaved, and the rejected ones.
+    """
+    readings: List[SensorReading] = []
+    errors: List[ReadingError] = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append(ReadingError(index, {'non_field_errors': ['Expected an object.']}))
+            continue
+
+        row_errors: Dict[str, List[str]] = {}
+        cycle = cycles.get(str(row.get('cycle')))
+        if cycle is None:
+            row_errors['cycle'] = ['Cycle not found.']
+        try:
+            timestamp: int = _parse_timestamp(row.get('timestamp'))
+        except (TypeError, ValueError, OverflowError):
+            row_errors['timestamp'] = ['Expected seconds since the epoch or an ISO 8601 date and time.']
+        values: Dict[str, Optional[int]] = {}
+        for metric, scale in SENSOR_SCALES.items():
+            value = row.get(metric)
+            if value is None:
+                values[metric] = None
+            elif isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+                values[metric] = round(value * scale)
+                low, high = SENSOR_RANGES[metric]
+                if not low <= values[metric] <= high:
+                    row_errors[metric] = [f'Ensure this value is between {low / scale:g} and {high / scale:g}.']
+            else:
+                row_errors[metric] = ['A valid number is required.']
+
+        if row_errors:
+            errors.append(ReadingError(index, row_errors))
+        else:
+            readings.append(SensorReading(cycle_id=cycle.pk, timestamp=timestamp, **values))
+    return readings, errors
+
+
+def append_readings(readings: List[SensorReading], batch_size: int = SENSOR_BATCH_SIZE) -> None:
+    """
+    A function to store a batch of readings and schedule the rollup of the hours they fall in.
+
+    Readings repeating the cycle and timestamp of a stored one are ignored, so a controller may resend a batch.
+
+    Parameters:
+        readings (List[SensorReading]): The unsaved readings.
+        batch_size (int, optional): The number of readings inserted per statement.
+    """
+    spans: Dict = {}
+    for reading in readings:
+        start, end = spans.get(reading.cycle_id, (reading.timestamp, reading.timestamp))
+        spans[reading.cycle_id] = (min(start, reading.timestamp), max(end, reading.timestamp))
+
+    with transaction.atomic():
+        SensorReading.objects.bulk_create(readings, batch_size=batch_size, ignore_conflicts=True)
+        for cycle_id, (start, end) in spans.items():
+            schedule_rollup(cycle_id, start, end)
+
+
+def schedule_rollup(cycle_id, start: int, end: int) -> None:
+    """
+    A function to enqueue the rollup of the readings of a cycle, merged into a rollup of the cycle not started yet.
+
+    Parameters:
+        cycle_id (UUID): The primary key of the Cycle.
+        start (int): The timestamp of the earliest reading to roll up.
+        end (int): The timestamp of the latest reading to roll up.
+    """
+    pending: Optional[Task] = Task.objects.filter(
+        name=rollup_sensor_readings.task_name, status='pending', args__0=str(cycle_id)
+    ).first()
+    if pending is not None:
+        # the task is only widened while no worker has claimed it
+        _, pending_start, pending_end = pending.args
+        widened: int = Task.objects.filter(pk=pending.pk, status='pending').update(
+            args=[str(cycle_id), min(start, pending_start), max(end, pending_end)]
+        )
+        if widened:
+            return
+    enqueue(rollup_sensor_readings, cycle_id, start, end, delay=ROLLUP_DELAY)
+
+
+def _rollup_aggregates() -> Dict:
+    aggregates: Dict = {}
+    for metric in SENSOR_SCALES:
+        aggregates.update({
+            f'{metric}_count': Count(metric),
+            f'{metric}_sum': Sum(metric),
+            f'{metric}_min': Min(metric),
+            f'{metric}_max': Max(metric),
+        })
+    return aggregates
+
+
+def is_day_hour(moment: datetime, phase: str) -> bool:
+    """
+    A function to tell whether the lights are on at a time, from RECORDS_LIGHTS_ON_HOUR and the photoperiod of the
+    phase.
+
+    Parameters:
+        moment (datetime): An aware date and time.
+        phase (str): The phase of the cycle, from Log.PHASE_CHOICES.
+
+    Returns:
+        bool: True during the photoperiod, False during the night.
+    """
+    hour: int = timezone.localtime(moment, timezone.get_default_timezone()).hour
+    return (hour - settings.RECORDS_LIGHTS_ON_HOUR) % 24 < PHOTOPERIODS.get(phase, 18)
+
+
+def _to_value(total: int, count: int, metric: str, places: int):
+    if not count:
+        return None
+    value = Decimal(total) / count / SENSOR_SCALES[metric]
+    return value.quantize(Decimal(1).scaleb(-places)) if places else int(value.to_integral_value())
+
+
+def _update_logs(cycle_id, first_day: date, last_day: date) -> List[Log]:
+    # the rollups of the calendar days of the logs, split into lights on and lights off
+    logs: List[Log] = list(Log.objects.filter(cycle_id=cycle_id, date__range=(first_day, last_day)).order_by())
+    if not logs:
+        return []
+    tz = timezone.get_default_timezone()
+    day_start = int(datetime.combine(first_day, datetime.min.time(), tz).timestamp())
+    day_end = int(datetime.combine(last_day + timedelta(days=1), datetime.min.time(), tz).timestamp())
+    rollups = SensorRollup.objects.filter(cycle_id=cycle_id, hour__gte=day_start, hour__lt=day_end)
+
+    totals: Dict[Tuple[date, bool], Dict[str, List[int]]] = {}
+    phases: Dict[date, str] = {log.date: log.phase for log in logs}
+    for rollup in rollups:
+        moment: datetime = datetime.fromtimestamp(rollup.hour, tz)
+        day: date = moment.date()
+        if day not in phases:
+            continue
+        bucket = totals.setdefault((day, is_day_hour(moment, phases[day])), {
+            metric: [0, 0] for metric in SENSOR_SCALES
+        })
+        for metric in SENSOR_SCALES:
+            bucket[metric][0] += getattr(rollup, f'{metric}_sum')
+            bucket[metric][1] += getattr(rollup, f'{metric}_count')
+
+    updated: List[Log] = []
+    for log in logs:
+        day_totals = totals.get((log.date, True))
+        night_totals = totals.get((log.date, False))
+        if day_totals is None and night_totals is None:
+            continue
+        if day_totals is not None:
+            log.temperature_day = _to_value(*day_totals['temperature'], 'temperature', 2)
+            log.humidity_day = _to_value(*day_totals['humidity'], 'humidity', 0)
+            log.carbon_dioxide = _to_value(*day_totals['carbon_dioxide'], 'carbon_dioxide', 0)
+        if night_totals is not None:
+            log.temperature_night = _to_value(*night_totals['temperature'], 'temperature', 2)
+            log.humidity_night = _to_value(*night_totals['humidity'], 'humidity', 0)
+        updated.append(log)
+    Log.objects.bulk_update(updated, [
+        'temperature_day', 'temperature_night', 'humidity_day', 'humidity_night', 'carbon_dioxide',
+    ])
+    return updated
+
+
+@task(name='rollup_sensor_readings')
+def rollup_sensor_readings(cycle_id, start: int, end: int) -> None:
+    """
+    A task aggregating the readings of a cycle into hourly SensorRollup buckets and the day and night fields of its
+    logs.
+
+    Every hour touched by the given span is recomputed from the raw readings in one grouped query, so a rollup can be
+    repeated. The logs of the calendar days of the span then get the means of the lights on hours as their day values,
+    co2 included, and of the remaining hours as their night values. Fields of a day without readings are kept. The
+    cached rows of the cycle are invalidated in the shared 'records' cache once the task commits.
+
+    Parameters:
+        cycle_id (UUID): The primary key of the Cycle.
+        start (int): The timestamp of the earliest reading to roll up.
+        end (int): The timestamp of the latest reading to roll up.
+    """
+    first_hour: int = start - start % ROLLUP_SECONDS
+    last_hour: int = end - end % ROLLUP_SECONDS
+    rows = (
+        SensorReading.objects.filter(cycle_id=cycle_id, timestamp__gte=first_hour,
+                                     timestamp__lt=last_hour + ROLLUP_SECONDS)
+        .annotate(bucket=F('timestamp') - Mod('timestamp', ROLLUP_SECONDS))
+        .order_by().values('bucket').annotate(**_rollup_aggregates())
+    )
+    rollups: List[SensorRollup] = [
+        SensorRollup(cycle_id=cycle_id, hour=row.pop('bucket'), **{
+            field: (value or 0) if field.endswith(('_count', '_sum')) else value for field, value in row.items()
+        })
+        for row in rows
+    ]
+    SensorRollup.objects.filter(cycle_id=cycle_id, hour__gte=first_hour, hour__lte=last_hour).delete()
+    SensorRollup.objects.bulk_create(rollups)
+
+    tz = timezone.get_default_timezone()
+    first_day: date = datetime.fromtimestamp(first_hour, tz).date()
+    last_day: date = datetime.fromtimestamp(last_hour, tz).date()
+    if _update_logs(cycle_id, first_day, last_day):
+        # bulk_update sends no signals, and a web process rendering the rows before the commit would cache the old
+        # values under the new version
+        transaction.on_commit(lambda: invalidate_cycle_cache(cycle_id))
+
+
+def get_readings(cycle_id, start: int, end: int) -> QuerySet:
+    """
+    A function to query the raw readings of a cycle within a time range, an index range scan.
+
+    Parameters:
+        cycle_id (UUID): The primary key of the Cycle.
+        start (int): The first timestamp of the range, included.
+        end (int): The last timestamp of the range, excluded.
+
+    Returns:
+        QuerySet: The readings in time order, as dictionaries of the scaled values.
+    """
+    return SensorReading.objects.filter(cycle_id=cycle_id, timestamp__gte=start, timestamp__lt=end).values(
+        'timestamp', *SENSOR_SCALES
+    )
+
+
+def get_rollups(cycle_id, start: int, end: int) -> List[Dict]:
+    """
+    A function to get the hourly buckets of a cycle within a time range, with their means scaled back to units.
+
+    Parameters:
+        cycle_id (UUID): The primary key of the Cycle.
+        start (int): The first timestamp of the range, included.
+        end (int): The last timestamp of the range, excluded.
+
+    Returns:
+        List[Dict]: A dictionary per bucket in time order, holding the 'hour' and for every SENSOR_SCALES metric
+                    its 'mean', 'min' and 'max', None without readings.
+    """
+    buckets: List[Dict] = []
+    for rollup in SensorRollup.objects.filter(cycle_id=cycle_id, hour__gte=start - start % ROLLUP_SECONDS,
+                                              hour__lt=end):
+        bucket: Dict = {'hour': rollup.hour}
+        for metric, scale in SENSOR_SCALES.items():
+            count: int = getattr(rollup, f'{metric}_count')
+            minimum: Optional[int] = getattr(rollup, f'{metric}_min')
+            maximum: Optional[int] = getattr(rollup, f'{metric}_max')
+            bucket[metric] = {
+                'mean': round(getattr(rollup, f'{metric}_sum') / count / scale, 2) if count else None,
+                'min': None if minimum is None else minimum / scale,
+                'max': None if maximum is None else maximum / scale,
+            }
+        buckets.append(bucket)
+    return buckets
@@ -0,0 +1,64 @@
+import json
+from typing import Dict, List
+
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from .models import Cycle, Log
+
+
+# log serializer
+class LogSerializer(serializers.ModelSerializer):
+    """
+    A serializer for validating a Log reading posted by an environment controller.
+
+    Fields:
+        cycle (UUIDField): The primary key of the Cycle the reading belongs to, resolved from the `cycles` context.
+        phase (CharField): The phase of the cycle, from Log.PHASE_CHOICES.
+        temperature_day, temperature_night, humidity_day, humidity_night, ph, ec, carbon_dioxide: The readings.
+        irrigation, light_height, light_power, calibration, comment: Optional details of the day.
+        date (DateField): Optional, the day of the reading for buffered or backfilled data. Log.date is auto_now_add,
+                          so the view applies it after creating the log, defaults to today.
+
+    Methods:
+        validate_cycle (Cycle): Returns the Cycle from the `cycles` context, mapping primary keys to Cycle objects,
+                                so a batch resolves its cycles in a single query.
+    """
+    cycle = serializers.UUIDField()
+    date = serializers.DateField(required=False)
+
+    class Meta:
+        model = Log
+        fields = [
+            'cycle', 'date', 'phase', 'temperature_day', 'temperature_night', 'humidity_day', 'humidity_night', 'ph', 'ec',
+            'irrigation', 'light_height', 'light_power', 'calibration', 'carbon_dioxide', 'comment',
+        ]
+
+    def validate_cycle(self, value) -> Cycle:
+        cycles: Dict = self.context.get('cycles', {})
+        if value not in cycles:
+            raise serializers.ValidationError('Cycle not found.')
+        return cycles[value]
+
+
+# ndjson parser
+class NDJSONParser(BaseParser):
+    """
+    A parser for newline delimited JSON, one object per line, returned as a list. Blank lines are skipped.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None) -> List:
+        parser_context = parser_context or {}
+        encoding: str = parser_context.get('encoding', 'utf-8')
+        rows: List = []
+        for line_number, line in enumerate(stream, start=1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                raise ParseError(f'NDJSON parse error on line {line_number}: {e}')
+        return rows
@@ -0,0 +1,67 @@
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_cycle_cache
+from .images import get_image_variants, schedule_image_variants
+from .models import Cycle, CycleSummary, Log, Nutrient, NutrientLog, ReservoirLog
+
+
+def _deleted_with(origin, *models) -> bool:
+    # deletions cascading from one of the models are handled by the receivers of that model
+    return isinstance(origin, models) or (isinstance(origin, QuerySet) and issubclass(origin.model, models))
+
+
+@receiver(post_save, sender=Cycle)
+def create_cycle_summary(sender, instance: Cycle, created: bool, raw: bool = False, **kwargs) -> None:
+    if created and not raw:
+        CycleSummary.objects.get_or_create(cycle=instance)
+
+
+@receiver(post_save, sender=Log)
+def on_log_save(sender, instance: Log, created: bool, raw: bool = False, **kwargs) -> None:
+    invalidate_cycle_cache(instance.cycle_id)
+    if created:
+        CycleSummary.add_log(instance)
+    else:
+        CycleSummary.refresh([instance.cycle_id])
+    if instance.featured_image and not raw and not get_image_variants(instance.featured_image.name):
+        schedule_image_variants(instance.featured_image.name, instance.cycle_id)
+
+
+@receiver(post_delete, sender=Log)
+def on_log_delete(sender, instance: Log, origin=None, **kwargs) -> None:
+    if not _deleted_with(origin, Cycle):
+        invalidate_cycle_cache(instance.cycle_id)
+        CycleSummary.refresh([instance.cycle_id])
+
+
+@receiver([post_save, post_delete], sender=NutrientLog)
+@receiver([post_save, post_delete], sender=ReservoirLog)
+def on_feeding_change(sender, instance, signal=None, origin=None, using: Optional[str] = None, **kwargs) -> None:
+    if _deleted_with(origin, Cycle, Log):
+        return
+    cycle_id = Log.objects.filter(pk=instance.log_id).values_list('cycle_id', flat=True).first()
+    if cycle_id is None:
+        return
+    # a merge sends post_save inside its transaction, rows rendered before it commits must not take the new version
+    transaction.on_commit(lambda: invalidate_cycle_cache(cycle_id), using=using)
+    # a new or merged feeding adds to the totals, an edit or a deletion recomputes them
+    delta = getattr(instance, '_summary_delta', None) if signal is post_save else None
+    if delta is None:
+        CycleSummary.refresh([cycle_id])
+    elif sender is NutrientLog:
+        CycleSummary.add_feeding(cycle_id, nutrients=delta)
+    else:
+        CycleSummary.add_feeding(cycle_id, water=delta)
+
+
+@receiver([post_save, post_delete], sender=Nutrient)
+def on_nutrient_change(sender, instance: Nutrient, signal=None, raw: bool = False, **kwargs) -> None:
+    invalidate_cycle_cache()
+    if signal is post_save and instance.featured_image and not raw \
+            and not get_image_variants(instance.featured_image.name):
+        schedule_image_variants(instance.featured_image.name)
@@ -0,0 +1,164 @@
+import logging
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Union
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import CycleSummary, Task
+
+logger = logging.getLogger(__name__)
+
+# seconds a worker owns a started task, another worker takes the task over if it has not finished by then
+TASK_VISIBILITY_TIMEOUT: int = 300
+# seconds before the first retry of a failed task, doubled for every further attempt
+TASK_RETRY_DELAY: int = 30
+# task functions by the name they are enqueued under
+TASKS: Dict[str, Callable] = {}
+
+
+def task(name: Optional[str] = None, max_attempts: int = 3, atomic: bool = True) -> Callable:
+    """
+    A decorator registering a function as a task of the queue, so it can be enqueued and run by a worker.
+
+    The arguments of a task are stored as JSON, UUIDs, dates and decimals arrive as strings.
+
+    Parameters:
+        name (str, optional): The name the task is enqueued under. Defaults to the module and name of the function.
+        max_attempts (int, optional): The number of attempts after which a failing task is given up. Defaults to 3.
+        atomic (bool, optional): Whether the task runs in a transaction, rolled back if it fails. Defaults to True,
+                                 tasks running statements that are not allowed in a transaction, e.g. VACUUM, manage
+                                 their own transactions.
+
+    Returns:
+        Callable: The decorator, which returns the function unchanged.
+    """
+    def register(func: Callable) -> Callable:
+        func.task_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        func.atomic = atomic
+        TASKS[func.task_name] = func
+        return func
+    return register
+
+
+def enqueue(func: Union[Callable, str], *args, delay: int = 0, **kwargs) -> Task:
+    """
+    A function to enqueue a call of a task, run by a worker after the current transaction commits.
+
+    The task is written in the transaction of the caller, so it is dropped if the transaction rolls back and a
+    worker never starts it before the data it works on is committed.
+
+    Parameters:
+        func (Union[Callable, str]): A function decorated with `task`, or the name it is registered under.
+        *args: The JSON serializable positional arguments of the call.
+        delay (int, optional): The number of seconds before the task may start. Defaults to 0.
+        **kwargs: The JSON serializable keyword arguments of the call.
+
+    Returns:
+        Task: The enqueued task.
+
+    Raises:
+        ValueError: If the function is not a registered task.
+    """
+    name: str = func if isinstance(func, str) else getattr(func, 'task_name', '')
+    if name not in TASKS:
+        raise ValueError(f'{func!r} is not a registered task.')
+    return Task.objects.create(
+        name=name, args=list(args), kwargs=kwargs, max_attempts=TASKS[name].max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim_task(visibility_timeout: int = TASK_VISIBILITY_TIMEOUT) -> Optional[Task]:
+    """
+    A function to claim the next due task for the calling worker.
+
+    A task is due if it is pending and its `run_after` has passed, or if it is running past its visibility timeout,
+    i.e. its worker died or got stuck. The claim is a conditional UPDATE, so of several workers racing for a task
+    exactly one gets it, without row locks the database may not support.
+
+    Parameters:
+        visibility_timeout (int, optional): The number of seconds the worker owns the claimed task.
+
+    Returns:
+        Optional[Task]: The claimed task, with its attempt counted, or None if no task is due.
+    """
+    now = timezone.now()
+    due = Q(status='pending', run_after__lte=now) | Q(status='running', locked_until__lt=now)
+    for pk in Task.objects.filter(due).order_by('run_after', 'id').values_list('pk', flat=True)[:10]:
+        claimed: int = Task.objects.filter(due, pk=pk).update(
+            status='running', attempts=F('attempts') + 1, locked_until=now + timedelta(seconds=visibility_timeout),
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def run_task(task: Task) -> bool:
+    """
+    A function to run a claimed task, in a transaction unless it opted out, and record its outcome.
+
+    A failed attempt is retried after TASK_RETRY_DELAY seconds, doubled for every attempt, until `max_attempts` is
+    reached. The outcome is not recorded if another worker took the task over meanwhile.
+
+    Parameters:
+        task (Task): A task returned by `claim_task`.
+
+    Returns:
+        bool: Whether the task succeeded.
+    """
+    now = timezone.now()
+    updates: Dict = {'locked_until': None}
+    try:
+        if task.attempts > task.max_attempts:
+            # the last attempt outlived its visibility timeout
+            raise TimeoutError('The task did not finish within its visibility timeout.')
+        if task.name not in TASKS:
+            raise LookupError(f'{task.name!r} is not a registered task.')
+        func: Callable = TASKS[task.name]
+        with transaction.atomic() if func.atomic else nullcontext():
+            func(*task.args, **task.kwargs)
+    except Exception:
+        logger.exception(f"Task {task} failed on attempt {task.attempts}")
+        updates['last_error'] = traceback.format_exc()
+        if task.attempts >= task.max_attempts:
+            updates.update(status='failed', finished=timezone.now())
+        else:
+            delay: int = TASK_RETRY_DELAY * 2 ** (task.attempts - 1)
+            updates.update(status='pending', run_after=now + timedelta(seconds=delay))
+    else:
+        updates.update(status='done', finished=timezone.now())
+
+    Task.objects.filter(pk=task.pk, status='running', attempts=task.attempts).update(**updates)
+    return updates['status'] == 'done'
+
+
+def run_pending_tasks(limit: Optional[int] = None, visibility_timeout: int = TASK_VISIBILITY_TIMEOUT) -> int:
+    """
+    A function to run due tasks until none is left.
+
+    Parameters:
+        limit (int, optional): The maximum number of tasks to run. Defaults to None, for no limit.
+        visibility_timeout (int, optional): The number of seconds the worker owns each claimed task.
+
+    Returns:
+        int: The number of tasks run, successful or not.
+    """
+    count: int = 0
+    while limit is None or count < limit:
+        claimed: Optional[Task] = claim_task(visibility_timeout)
+        if claimed is None:
+            break
+        run_task(claimed)
+        count += 1
+    return count
+
+
+# tasks
+@task(name='refresh_cycle_summaries')
+def refresh_cycle_summaries(cycle_ids: List) -> None:
+    CycleSummary.refresh(cycle_ids)
@@ -0,0 +1,44 @@
+from typing import Dict
+
+from django import template
+from django.db.models.fields.files import ImageFieldFile
+
+from ..images import IMAGE_SIZES, get_image_variants
+
+register = template.Library()
+
+
+@register.inclusion_tag('records/responsive_image.html')
+def responsive_image(image: ImageFieldFile, size: str = 'medium', alt: str = '') -> Dict:
+    """
+    A template tag to render an image as a <picture> of its WebP and JPEG variants, lazily loaded.
+
+    The browser picks the smallest variant covering the displayed width, and the original image is used until the
+    variants are generated.
+
+    Parameters:
+        image (ImageFieldFile): The image, e.g. `log.featured_image`.
+        size (str, optional): The displayed size, a key of IMAGE_SIZES. Defaults to 'medium'.
+        alt (str, optional): The alternative text of the image. Defaults to ''.
+
+    Returns:
+        Dict: The context of the 'records/responsive_image.html' template.
+    """
+    if not image:
+        return {'src': None}
+
+    variants: Dict[str, Dict[str, str]] = get_image_variants(image.name)
+    if not variants:
+        return {'src': image.url, 'alt': alt, 'width': IMAGE_SIZES[size]}
+
+    def srcset(image_format: str) -> str:
+        return ', '.join(f'{url} {IMAGE_SIZES[variant_size]}w' for variant_size, url in variants[image_format].items())
+
+    return {
+        'src': variants['jpeg'][size],
+        'alt': alt,
+        'width': IMAGE_SIZES[size],
+        'srcset': srcset('jpeg'),
+        'webp_srcset': srcset('webp'),
+        'sizes': f'{IMAGE_SIZES[size]}px',
+    }
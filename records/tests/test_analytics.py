@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from records.analytics import SUMMARY_METRICS, get_phase_summary
+from records.models import Cycle, Log, Nutrient, NutrientLog, ReservoirLog
+
+
+class GetPhaseSummaryTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle')
+        self.nutrient = Nutrient.objects.create(name='Grow', brand='Test Brand')
+        first_day = date.today() - timedelta(days=9)
+        for day, (phase, temperature) in enumerate([
+            ('vegetative', 20), ('vegetative', 24), ('seedling', 22), ('bloom', 26), ('vegetative', None),
+        ]):
+            log = Log.objects.create(cycle=self.cycle, phase=phase, temperature_day=temperature, ph=Decimal('6.1'))
+            Log.objects.filter(pk=log.pk).update(date=first_day + timedelta(days=day * 2))
+            ReservoirLog.objects.create(log=log, water=10)
+            NutrientLog.objects.create(log=log, nutrient=self.nutrient, concentration=5)
+
+    def test_phases_in_order(self):
+        summary = get_phase_summary(self.cycle)
+        self.assertEqual([phase['phase'] for phase in summary], ['seedling', 'vegetative', 'bloom'])
+        self.assertEqual(summary[0]['label'], 'Seedling')
+
+    def test_metric_statistics(self):
+        vegetative = get_phase_summary(self.cycle)[1]
+        self.assertEqual(set(vegetative['metrics']), set(SUMMARY_METRICS))
+        temperature = vegetative['metrics']['temperature_day']
+        self.assertEqual((temperature['min'], temperature['max'], temperature['mean']), (20, 24, 22))
+        self.assertEqual(temperature['stddev'], 2)
+        self.assertEqual(vegetative['metrics']['ph']['mean'], 6.1)
+        self.assertIsNone(vegetative['metrics']['ec']['mean'])
+
+    def test_durations_and_feeding(self):
+        vegetative = get_phase_summary(self.cycle)[1]
+        self.assertEqual(vegetative['days'], 3)
+        self.assertEqual(vegetative['duration'], 9)
+        self.assertEqual(vegetative['water'], 30)
+        self.assertEqual(vegetative['nutrients'], [
+            {'nutrient_id': self.nutrient.pk, 'name': 'Grow', 'brand': 'Test Brand', 'concentration': 15},
+        ])
+
+    def test_fixed_number_of_queries(self):
+        with self.assertNumQueries(3):
+            get_phase_summary(self.cycle)
+
+    def test_cycle_without_logs(self):
+        self.assertEqual(get_phase_summary(Cycle.objects.create(name='Empty')), [])
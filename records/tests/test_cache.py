@@ -0,0 +1,93 @@
+import multiprocessing
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.urls import reverse
+
+from records.cache import get_cycle_cache_version, get_records_cache, invalidate_cycle_cache
+from records.models import Cycle, Log, Nutrient, NutrientLog, ReservoirLog
+
+
+def run_in_other_process(func, *args) -> None:
+    # runs func in a forked process with its own cache objects, like the task worker, it must not use the database
+    process = multiprocessing.get_context('fork').Process(target=func, args=args)
+    process.start()
+    process.join()
+    assert process.exitcode == 0, f'{func.__name__} failed in the other process'
+
+
+def clear_records_cache() -> None:
+    get_records_cache().clear()
+
+
+class LogRowsCacheTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle')
+        self.logs = [Log.objects.create(cycle=self.cycle, irrigation='drip') for _ in range(3)]
+        Log.objects.filter(cycle=self.cycle).update(date=date.today() - timedelta(days=10))
+        self.url = reverse('record', args=[self.cycle.pk])
+
+    def test_past_weeks_are_served_from_cache(self):
+        self.client.get(self.url)
+        Log.objects.filter(pk=self.logs[0].pk).update(irrigation='flood')
+        self.assertNotContains(self.client.get(self.url), 'flood')
+
+    def test_log_save_invalidates_cycle(self):
+        self.client.get(self.url)
+        log = Log.objects.get(pk=self.logs[0].pk)
+        log.irrigation = 'flood'
+        log.save()
+        self.assertContains(self.client.get(self.url), 'flood')
+
+    def test_feeding_changes_invalidate_cycle(self):
+        version = get_cycle_cache_version(self.cycle.pk)
+        nutrient = Nutrient.objects.create(name='test nutrient', brand='test brand')
+        self.assertNotEqual(get_cycle_cache_version(self.cycle.pk), version)
+
+        version = get_cycle_cache_version(self.cycle.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            nutrient_log = NutrientLog.objects.create(log=self.logs[0], nutrient=nutrient, concentration=10)
+        self.assertNotEqual(get_cycle_cache_version(self.cycle.pk), version)
+
+        version = get_cycle_cache_version(self.cycle.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            ReservoirLog.objects.create(log=self.logs[0], water=10)
+        self.assertNotEqual(get_cycle_cache_version(self.cycle.pk), version)
+
+        version = get_cycle_cache_version(self.cycle.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            nutrient_log.delete()
+        self.assertNotEqual(get_cycle_cache_version(self.cycle.pk), version)
+
+    def test_feeding_merge_invalidates_cycle_on_commit(self):
+        ReservoirLog.objects.create(log=self.logs[0], water=10)
+        version = get_cycle_cache_version(self.cycle.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            ReservoirLog.objects.create(log=self.logs[0], water=5)
+            self.assertEqual(get_cycle_cache_version(self.cycle.pk), version)
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertNotEqual(get_cycle_cache_version(self.cycle.pk), version)
+
+    def test_today_rows_are_rendered_fresh(self):
+        log = Log.objects.create(cycle=self.cycle, irrigation='drip')
+        self.client.get(self.url)
+        Log.objects.filter(pk=log.pk).update(irrigation='flood')
+        self.assertContains(self.client.get(self.url), 'flood')
+
+    def test_cache_cleared_by_another_process_is_seen(self):
+        self.client.get(self.url)
+        Log.objects.filter(pk=self.logs[0].pk).update(irrigation='flood')
+        run_in_other_process(clear_records_cache)
+        self.assertContains(self.client.get(self.url), 'flood')
+
+    def test_version_survives_cache_eviction(self):
+        invalidate_cycle_cache(self.cycle.pk)
+        version = get_cycle_cache_version(self.cycle.pk)
+        get_records_cache().clear()
+        self.assertEqual(get_cycle_cache_version(self.cycle.pk), version)
+
+    def test_invalidating_every_cycle(self):
+        version = get_cycle_cache_version(self.cycle.pk)
+        invalidate_cycle_cache()
+        self.assertNotEqual(get_cycle_cache_version(self.cycle.pk), version)
@@ -0,0 +1,106 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, TestCase
+from django.urls import reverse
+
+from records.models import Cycle, CycleSummary, Log, Task
+from records.tasks import enqueue, refresh_cycle_summaries
+
+
+class BenchmarkViewsCommandTestCase(TestCase):
+    def test_benchmark_views_writes_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command('benchmark_views', '--no-test-database', '--sizes', '5', '--repeat', '1',
+                         '--output', output, stdout=StringIO())
+            with open(output) as results_file:
+                results = json.load(results_file)
+
+        views = {result['view'] for result in results}
+        self.assertEqual(views, {'records', 'record', 'create_feeding_log', 'create_log', 'phase_summary'})
+        for result in results:
+            self.assertEqual(result['logs'], 5)
+            self.assertGreater(result['queries'], 0)
+            self.assertGreaterEqual(result['time_ms'], 0)
+            self.assertGreater(result['peak_memory_kb'], 0)
+
+
+class ExportRecordsCommandTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle', genetics='Test Genetics')
+        Log.objects.create(cycle=self.cycle)
+        other_cycle = Cycle.objects.create(name='Other Cycle', genetics='Test Genetics')
+        Log.objects.create(cycle=other_cycle)
+
+    def test_export_writes_a_file_per_table(self):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('export_records', '--output-dir', directory, '--cycle', str(self.cycle.pk),
+                         '--chunk-size', '1', stdout=StringIO())
+            self.assertEqual(sorted(os.listdir(directory)),
+                             ['cycles.csv', 'logs.csv', 'nutrient_logs.csv', 'reservoir_logs.csv'])
+            with open(os.path.join(directory, 'logs.csv')) as logs_file:
+                rows = list(csv.reader(logs_file))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], str(self.cycle.pk))
+
+    def test_export_with_invalid_cycle(self):
+        with self.assertRaises(CommandError):
+            call_command('export_records', '--cycle', 'invalid', stdout=StringIO())
+
+
+class ImportRecordsCommandTestCase(TestCase):
+    def test_import_reports_created_and_skipped_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'diary.ndjson')
+            with open(path, 'w') as diary:
+                diary.write('{"cycle": "Imported", "genetics": "Sativa", "date": "2022-01-01", "water": 10}\n')
+                diary.write('{"cycle": "Imported", "genetics": "Sativa"}\n')
+            stdout, stderr = StringIO(), StringIO()
+            call_command('import_records', path, stdout=stdout, stderr=stderr)
+
+        self.assertIn('1 logs', stdout.getvalue())
+        self.assertIn('skipped 1 rows', stdout.getvalue())
+        self.assertIn('line 2: date is required.', stderr.getvalue())
+        self.assertEqual(Log.objects.get().reservoir_logs.get().water, 10)
+
+
+class RunTasksCommandTestCase(TestCase):
+    def test_run_tasks_once(self):
+        cycle = Cycle.objects.create(name='Test Cycle')
+        Log.objects.bulk_create([Log(cycle=cycle), Log(cycle=cycle)])
+        enqueue(refresh_cycle_summaries, [cycle.pk])
+
+        out = StringIO()
+        # closing the connection would end the transaction of the test case
+        with mock.patch('records.management.commands.run_tasks.close_old_connections') as close_old_connections:
+            call_command('run_tasks', '--once', stdout=out)
+        self.assertIn('Ran 1 tasks.', out.getvalue())
+        # before the claim of the task and before the claim finding the queue empty
+        self.assertEqual(close_old_connections.call_count, 2)
+        self.assertEqual(Task.objects.get().status, 'done')
+        self.assertEqual(CycleSummary.objects.get(cycle=cycle).log_count, 2)
+
+
+class LoadTestCommandTestCase(LiveServerTestCase):
+    def test_load_test_record_view(self):
+        cycle = Cycle.objects.create(name='Test Cycle')
+        Log.objects.create(cycle=cycle)
+        output = os.path.join(tempfile.mkdtemp(), 'load_test.json')
+
+        call_command('load_test', self.live_server_url + reverse('record', args=[cycle.pk]), '--concurrency', '2',
+                     '--duration', '0.5', '--warmup', '0.1', '--output', output, stdout=StringIO())
+        with open(output) as results_file:
+            results = json.load(results_file)
+        self.assertGreater(results['requests'], 1)
+        self.assertEqual(results['errors'], 0)
+        self.assertGreater(results['requests_per_second'], 0)
+
+    def test_load_test_invalid_url(self):
+        with self.assertRaises(CommandError):
+            call_command('load_test', 'localhost:8000/', stdout=StringIO())
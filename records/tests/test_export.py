@@ -0,0 +1,64 @@
+import csv
+import io
+import unittest
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from records.export import get_export_columns, stream_csv, stream_export
+from records.models import Cycle, Log, Nutrient, NutrientLog
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class ExportTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle', genetics='Test Genetics')
+        self.other_cycle = Cycle.objects.create(name='Other Cycle', genetics='Test Genetics')
+        nutrient = Nutrient.objects.create(name='Grow', brand='Test Brand')
+        for ph in (Decimal('6.1'), None, Decimal('5.9')):
+            log = Log.objects.create(cycle=self.cycle, ph=ph)
+            NutrientLog.objects.create(log=log, nutrient=nutrient, concentration=5)
+        Log.objects.create(cycle=self.other_cycle)
+
+    def read_csv(self, chunks):
+        return list(csv.reader(io.StringIO(b''.join(chunks).decode())))
+
+    def test_csv(self):
+        rows = self.read_csv(stream_csv('logs', chunk_size=2))
+        self.assertEqual(rows[0], get_export_columns('logs'))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([row[rows[0].index('ph')] for row in rows[1:4]], ['6.10', '', '5.90'])
+
+    def test_csv_chunks(self):
+        chunks = list(stream_csv('logs', chunk_size=2))
+        self.assertEqual(len(chunks), 3)
+
+    def test_cycle_filter(self):
+        rows = self.read_csv(stream_csv('nutrient_logs', cycle_ids=[self.other_cycle.pk]))
+        self.assertEqual(len(rows), 1)
+        rows = self.read_csv(stream_csv('cycles', cycle_ids=[self.cycle.pk]))
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.cycle.pk)])
+
+    @unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+    def test_parquet(self):
+        data = b''.join(stream_export('logs', 'parquet', chunk_size=2))
+        parquet_file = pyarrow.parquet.ParquetFile(io.BytesIO(data))
+        self.assertEqual(parquet_file.metadata.num_rows, 4)
+        self.assertEqual(parquet_file.num_row_groups, 2)
+        self.assertEqual(parquet_file.read().column('ph').to_pylist(), [6.1, None, 5.9, None])
+
+    def test_export_view(self):
+        response = self.client.get(reverse('export_records', args=['logs']), {'cycle': self.cycle.pk})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="logs.csv"')
+        self.assertEqual(len(self.read_csv(response.streaming_content)), 4)
+
+    def test_export_view_with_invalid_parameters(self):
+        self.assertEqual(self.client.get(reverse('export_records', args=['users'])).status_code, 400)
+        url = reverse('export_records', args=['logs'])
+        self.assertEqual(self.client.get(url, {'format': 'xlsx'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cycle': 'invalid'}).status_code, 400)
@@ -0,0 +1,142 @@
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from records.cache import get_records_cache, invalidate_cycle_cache
+from records.images import (
+    IMAGE_SIZES, generate_image_variants, get_image_variants, get_image_version, get_variant_name,
+)
+from records.models import Cycle, Log, Task
+from records.tasks import run_pending_tasks
+from records.tests.test_cache import run_in_other_process
+
+
+def save_image(name: str, width: int, height: int) -> str:
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color='green').save(buffer, 'JPEG')
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+class ImageVariantsTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.addCleanup(get_records_cache().clear)
+        self.name = save_image('photo.jpg', 2000, 1000)
+
+    def variant_url(self, name: str, size: str, image_format: str) -> str:
+        return default_storage.url(get_variant_name(name, get_image_version(name), size, image_format))
+
+    def test_variants_are_generated_in_every_size_and_format(self):
+        generate_image_variants(self.name)
+        for size, width in IMAGE_SIZES.items():
+            for image_format in ('jpeg', 'webp'):
+                with default_storage.open(get_variant_name(self.name, get_image_version(self.name), size, image_format)) as variant:
+                    image = Image.open(variant)
+                    self.assertEqual(image.format, image_format.upper())
+                    self.assertEqual(image.size, (width, width // 2))
+
+    def test_small_images_are_not_scaled_up(self):
+        name = save_image('small.jpg', 100, 50)
+        generate_image_variants(name)
+        with default_storage.open(get_variant_name(name, get_image_version(name), 'large', 'webp')) as variant:
+            self.assertEqual(Image.open(variant).size, (100, 50))
+
+    def test_invalid_image_has_no_variants(self):
+        name = default_storage.save('broken.jpg', ContentFile(b'not an image'))
+        self.assertEqual(generate_image_variants(name), {})
+
+    def test_variant_urls_are_cached_once_generated(self):
+        self.assertEqual(get_image_variants(self.name), {})
+        variants = generate_image_variants(self.name)
+        self.assertEqual(variants['webp']['small'], self.variant_url(self.name, 'small', 'webp'))
+        self.assertTrue(variants['webp']['small'].startswith('/images/thumbnails/photo.jpg.'))
+
+        with mock.patch.object(default_storage, 'exists') as exists:
+            self.assertEqual(get_image_variants(self.name), variants)
+        exists.assert_not_called()
+
+    def test_originals_with_the_same_stem_have_their_own_variants(self):
+        png_buffer = BytesIO()
+        Image.new('RGB', (100, 50), color='red').save(png_buffer, 'PNG')
+        png_name = default_storage.save('photo.png', ContentFile(png_buffer.getvalue()))
+        jpeg_variants = generate_image_variants(self.name)
+        png_variants = generate_image_variants(png_name)
+        self.assertNotEqual(png_variants['webp']['small'], jpeg_variants['webp']['small'])
+        with default_storage.open(get_variant_name(png_name, get_image_version(png_name), 'large', 'webp')) as variant:
+            self.assertEqual(Image.open(variant).size, (100, 50))
+
+    def test_replaced_original_gets_new_variants(self):
+        variants = generate_image_variants(self.name)
+        default_storage.delete(self.name)
+        self.assertEqual(save_image(self.name, 100, 50), self.name)
+        modified = default_storage.get_modified_time(self.name) + timedelta(seconds=1)
+        with mock.patch.object(default_storage, 'get_modified_time', return_value=modified):
+            self.assertEqual(get_image_variants(self.name), {})
+            new_variants = generate_image_variants(self.name)
+            self.assertNotEqual(new_variants['webp']['large'], variants['webp']['large'])
+            variant_name = get_variant_name(self.name, get_image_version(self.name), 'large', 'webp')
+        with default_storage.open(variant_name) as variant:
+            self.assertEqual(Image.open(variant).size, (100, 50))
+
+    def test_saving_a_log_enqueues_its_variants(self):
+        cycle = Cycle.objects.create(name='Test Cycle')
+        Log.objects.create(cycle=cycle, featured_image=self.name)
+        task = Task.objects.get(name='generate_image_variants')
+        self.assertEqual(task.args, [self.name, str(cycle.pk)])
+
+        run_pending_tasks()
+        self.assertTrue(default_storage.exists(get_variant_name(self.name, get_image_version(self.name), 'small',
+                                                                'webp')))
+
+    def test_cached_rows_pick_up_variants_generated_by_the_worker(self):
+        cycle = Cycle.objects.create(name='Test Cycle')
+        log = Log.objects.create(cycle=cycle, featured_image=self.name)
+        Log.objects.filter(pk=log.pk).update(date=date.today() - timedelta(days=10))
+        url = reverse('record', args=[cycle.pk])
+        self.assertNotContains(self.client.get(url), self.variant_url(self.name, 'small', 'webp'))
+
+        # the worker bumps the cache version in the database, which a forked test process cannot share
+        run_in_other_process(generate_image_variants, self.name)
+        invalidate_cycle_cache(cycle.pk)
+        self.assertContains(self.client.get(url), self.variant_url(self.name, 'small', 'webp'))
+
+    def test_variants_are_served_with_long_lived_cache_headers(self):
+        generate_image_variants(self.name)
+        variant_url = self.variant_url(self.name, 'medium', 'jpeg')
+        response = self.client.get(variant_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get(reverse('image_variant', args=['missing.jpg.1-medium.jpg']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_responsive_image_tag(self):
+        template = Template("{% load records_images %}{% responsive_image log.featured_image 'small' %}")
+        log = Log(featured_image=self.name)
+
+        html = template.render(Context({'log': log}))
+        self.assertIn(f'src="/images/{self.name}"', html)
+        self.assertNotIn('srcset', html)
+
+        generate_image_variants(self.name)
+        html = template.render(Context({'log': log}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn(f"{self.variant_url(self.name, 'small', 'webp')} 160w", html)
+        self.assertIn(f'''src="{self.variant_url(self.name, 'small', 'jpeg')}"''', html)
+        self.assertIn('loading="lazy"', html)
+
+        self.assertEqual(template.render(Context({'log': Log()})).strip(), '')
@@ -0,0 +1,78 @@
+import io
+from datetime import date
+
+from django.test import TestCase
+
+from records.importer import RecordImporter, read_csv_rows, read_ndjson_rows
+from records.models import Cycle, CycleSummary, Log, Nutrient, NutrientLog, ReservoirLog
+
+CSV = """cycle,genetics,date,phase,temperature_day,ph,calibration,water,waste_water,reverse_osmosis,nutrient,brand,concentration
+Imported,Sativa,2022-01-01,seedling,22.5,6.0,true,10,,yes,Grow,Brand,5
+Imported,Sativa,2022-01-01,,,,,5,,no,Grow,Brand,3
+Imported,Sativa,2022-01-01,,,,,,,,Bloom,Brand,2
+Imported,Sativa,2022-01-02,vegetative,24,6.1,false,20,4,yes,,,
+Imported,Sativa,2022-01-03,bloom,invalid,,,,,,,,
+Imported,Sativa,,bloom,,,,,,,,,
+"""
+
+
+class RecordImporterTestCase(TestCase):
+    def import_csv(self, text=CSV, batch_size=1):
+        importer = RecordImporter(batch_size=batch_size)
+        importer.run(read_csv_rows(io.StringIO(text)))
+        return importer
+
+    def test_import_merges_rows_of_a_day(self):
+        importer = self.import_csv()
+        self.assertEqual(importer.created, {'cycles': 1, 'nutrients': 2, 'logs': 2, 'reservoir_logs': 2,
+                                            'nutrient_logs': 2, 'sensor_rollups': 0, 'sensor_readings': 0})
+        cycle = Cycle.objects.get(name='Imported', genetics='Sativa')
+        self.assertEqual(cycle.date, date(2022, 1, 1))
+        log = Log.objects.get(cycle=cycle, date=date(2022, 1, 1))
+        self.assertEqual((log.phase, log.calibration, str(log.ph)), ('seedling', True, '6.00'))
+
+        reservoir_log = ReservoirLog.objects.get(log=log)
+        self.assertEqual((reservoir_log.water, reservoir_log.ro_amount, reservoir_log.status), (15, 10, 'refill'))
+        concentrations = dict(NutrientLog.objects.filter(log=log).values_list('nutrient__name', 'concentration'))
+        self.assertEqual(concentrations, {'Grow': 8, 'Bloom': 2})
+
+        reservoir_log = ReservoirLog.objects.get(log__date=date(2022, 1, 2))
+        self.assertEqual((reservoir_log.waste_water, reservoir_log.status), (4, 'refresh'))
+
+    def test_invalid_rows_are_reported(self):
+        importer = self.import_csv()
+        self.assertEqual([error.line for error in importer.errors], [6, 7])
+
+    def test_summary_is_refreshed(self):
+        self.import_csv()
+        summary = CycleSummary.objects.get(cycle__name='Imported')
+        self.assertEqual((summary.log_count, summary.current_phase, summary.total_water), (2, 'vegetative', 35))
+
+    def test_existing_days_are_skipped(self):
+        self.import_csv()
+        importer = self.import_csv()
+        self.assertEqual(importer.created['logs'], 0)
+        self.assertEqual(Log.objects.count(), 2)
+        self.assertEqual(Cycle.objects.count(), 1)
+
+    def test_existing_cycles_and_nutrients_are_reused(self):
+        cycle = Cycle.objects.create(name='Imported', genetics='Sativa')
+        nutrient = Nutrient.objects.create(name='Grow', brand='Brand')
+        importer = self.import_csv(batch_size=100)
+        self.assertEqual((importer.created['cycles'], importer.created['nutrients']), (0, 1))
+        self.assertEqual(Log.objects.filter(cycle=cycle).count(), 2)
+        self.assertEqual(NutrientLog.objects.filter(nutrient=nutrient).count(), 1)
+
+    def test_ndjson(self):
+        text = (
+            '{"cycle": "Imported", "genetics": "Indica", "date": "2022-02-01", "ph": 6.2,'
+            ' "nutrients": [{"nutrient": "Grow", "brand": "Brand", "concentration": 4},'
+            ' {"nutrient": "Grow", "brand": "Brand", "concentration": 1}]}\n'
+            '\n'
+            'not json\n'
+        )
+        importer = RecordImporter()
+        importer.run(read_ndjson_rows(io.StringIO(text)))
+        self.assertEqual(importer.created['logs'], 1)
+        self.assertEqual(NutrientLog.objects.get().concentration, 5)
+        self.assertEqual([error.line for error in importer.errors], [3])
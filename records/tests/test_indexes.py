@@ -0,0 +1,105 @@
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from records.models import Cycle, Log, Nutrient, NutrientLog, ReservoirLog
+from records.utils import LOG_PAGE_ORDER
+
+
+class QueryPlanTestCase(TestCase):
+    """
+    Checks the query plans of the record and feeding views against the indexes they rely on, with EXPLAIN.
+
+    The tables of a test hold a handful of rows, so PostgreSQL is told to avoid sequential scans and sorts whenever
+    an index can replace them, as it would on a table of real size.
+    """
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle')
+        self.log = Log.objects.create(cycle=self.cycle, phase='bloom')
+        self.nutrient = Nutrient.objects.create(name='Grow', brand='Brand')
+
+    def explain(self, queryset: QuerySet) -> str:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset: QuerySet, index: str) -> None:
+        plan: str = self.explain(queryset)
+        if connection.vendor == 'postgresql':
+            self.assertRegex(plan, rf'Index (Only )?Scan( Backward)? using {index}\b')
+            self.assertNotIn('Sort', plan)
+        else:
+            self.assertIn(f'USING INDEX {index} ', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_record_page_reads_logs_in_index_order(self):
+        self.assertUsesIndex(Log.objects.filter(cycle=self.cycle).order_by(*LOG_PAGE_ORDER),
+                             'records_log_cycle_order_idx')
+        self.assertUsesIndex(
+            Log.objects.filter(cycle=self.cycle, phase_order=3, date=self.log.date, id__gt=self.log.id)
+            .order_by(*LOG_PAGE_ORDER),
+            'records_log_cycle_order_idx',
+        )
+
+    def test_default_ordering_reads_logs_in_index_order(self):
+        self.assertUsesIndex(self.cycle.logs.all(), 'records_log_cycle_order_idx')
+        # the query of cycle.logs.last() and first()
+        self.assertUsesIndex(self.cycle.logs.reverse()[:1], 'records_log_cycle_order_idx')
+        self.assertUsesIndex(self.cycle.logs.all()[:1], 'records_log_cycle_order_idx')
+
+    def test_phase_lookup_uses_cycle_phase_index(self):
+        self.assertUsesIndex(Log.objects.filter(cycle=self.cycle, phase='vegetative').order_by(),
+                             'records_log_cycle_phase_idx')
+
+    def test_feeding_lookups_use_unique_indexes(self):
+        # SQLite names the index of a unique constraint after the table
+        nutrient_log_index: str = ('unique_nutrient_log_per_log' if connection.vendor == 'postgresql'
+                                   else 'sqlite_autoindex_records_nutrientlog_1')
+        reservoir_log_index: str = ('unique_reservoir_log_per_log' if connection.vendor == 'postgresql'
+                                    else 'sqlite_autoindex_records_reservoirlog_1')
+        self.assertUsesIndex(NutrientLog.objects.filter(log=self.log, nutrient=self.nutrient).order_by(),
+                             nutrient_log_index)
+        self.assertUsesIndex(NutrientLog.objects.filter(log=self.log).order_by(), nutrient_log_index)
+        self.assertUsesIndex(ReservoirLog.objects.filter(log=self.log), reservoir_log_index)
+
+
+class OrdinalFieldTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle')
+
+    def test_phase_order_follows_phase_on_save(self):
+        log = Log.objects.create(cycle=self.cycle, phase='seedling')
+        self.assertEqual(log.phase_order, 1)
+        log.phase = 'bloom'
+        log.save(update_fields=['phase'])
+        self.assertEqual(Log.objects.values_list('phase_order', flat=True).get(pk=log.pk), 3)
+
+    def test_phase_order_is_set_by_bulk_create(self):
+        Log.objects.bulk_create([Log(cycle=self.cycle, phase=phase) for phase in ['bloom', 'seedling', 'vegetative']])
+        self.assertEqual(
+            list(Log.objects.order_by('phase_order').values_list('phase', 'phase_order')),
+            [('seedling', 1), ('vegetative', 2), ('bloom', 3)],
+        )
+
+    def test_type_order_follows_nutrient_type(self):
+        nutrient = Nutrient.objects.create(name='Grow', brand='Brand')
+        self.assertEqual(nutrient.type_order, 7)
+        nutrient.nutrient_type = 'base_line'
+        nutrient.save(update_fields=['nutrient_type'])
+        self.assertEqual(Nutrient.objects.values_list('type_order', flat=True).get(pk=nutrient.pk), 2)
+
+    def test_nutrient_logs_are_ordered_by_nutrient_type(self):
+        log = Log.objects.create(cycle=self.cycle)
+        for name, nutrient_type in [('Taste', 'bud_taste'), ('Other', None), ('Base', 'base_line'),
+                                    ('Conditioner', 'medium_conditioner')]:
+            nutrient = Nutrient.objects.create(name=name, brand='Brand', nutrient_type=nutrient_type)
+            NutrientLog.objects.create(log=log, nutrient=nutrient, concentration=1)
+        self.assertEqual([nutrient_log.nutrient.name for nutrient_log in log.nutrient_logs.all()],
+                         ['Conditioner', 'Base', 'Taste', 'Other'])
+
+    def test_last_log_is_the_last_of_the_latest_phase(self):
+        bloom = Log.objects.create(cycle=self.cycle, phase='bloom')
+        Log.objects.create(cycle=self.cycle, phase='vegetative')
+        self.assertEqual(self.cycle.logs.last(), bloom)
@@ -0,0 +1,86 @@
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+
+class MigrationTestCase(TransactionTestCase):
+    """
+    Migrates the records app back to `migrate_from`, lets `set_up_data` write rows with the historical models, then
+    migrates to `migrate_to`.
+    """
+    migrate_from: str = ''
+    migrate_to: str = ''
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        self.addCleanup(self.migrate_to_latest)
+        executor.migrate([('records', self.migrate_from)])
+        self.set_up_data(executor.loader.project_state(('records', self.migrate_from)).apps)
+
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('records', self.migrate_to)])
+        self.apps = executor.loader.project_state(('records', self.migrate_to)).apps
+
+    @staticmethod
+    def migrate_to_latest():
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def set_up_data(self, apps):
+        pass
+
+
+class MergeDuplicateNutrientLogsTestCase(MigrationTestCase):
+    migrate_from = '0037_cycle_hydro_system_alter_cycle_fixture_and_more'
+    migrate_to = '0038_nutrientlog_unique_log_nutrient'
+
+    def set_up_data(self, apps):
+        Cycle = apps.get_model('records', 'Cycle')
+        Log = apps.get_model('records', 'Log')
+        Nutrient = apps.get_model('records', 'Nutrient')
+        NutrientLog = apps.get_model('records', 'NutrientLog')
+        log = Log.objects.create(cycle=Cycle.objects.create(name='Test Cycle'))
+        grow = Nutrient.objects.create(name='Grow', brand='Brand')
+        bloom = Nutrient.objects.create(name='Bloom', brand='Brand')
+        NutrientLog.objects.bulk_create([
+            NutrientLog(log=log, nutrient=grow, concentration=10),
+            NutrientLog(log=log, nutrient=grow, concentration=15),
+            NutrientLog(log=log, nutrient=bloom, concentration=5),
+        ])
+        self.first_id = NutrientLog.objects.filter(nutrient=grow).order_by('id').values_list('id', flat=True)[0]
+
+    def test_duplicates_are_merged_into_the_oldest_row(self):
+        NutrientLog = self.apps.get_model('records', 'NutrientLog')
+        self.assertEqual(
+            sorted(NutrientLog.objects.values_list('nutrient__name', 'concentration')), [('Bloom', 5), ('Grow', 25)]
+        )
+        self.assertTrue(NutrientLog.objects.filter(pk=self.first_id, concentration=25).exists())
+
+
+class MergeDuplicateReservoirLogsTestCase(MigrationTestCase):
+    migrate_from = '0038_nutrientlog_unique_log_nutrient'
+    migrate_to = '0039_reservoirlog_unique_log'
+
+    def set_up_data(self, apps):
+        Cycle = apps.get_model('records', 'Cycle')
+        Log = apps.get_model('records', 'Log')
+        ReservoirLog = apps.get_model('records', 'ReservoirLog')
+        cycle = Cycle.objects.create(name='Test Cycle')
+        self.refreshed_log, self.refilled_log = Log.objects.create(cycle=cycle), Log.objects.create(cycle=cycle)
+        # the rows ReservoirLog.save() stored for separate fills of the same log
+        ReservoirLog.objects.bulk_create([
+            ReservoirLog(log=self.refreshed_log, water=10, ro_amount=10, reverse_osmosis='yes', status='refill'),
+            ReservoirLog(log=self.refreshed_log, water=5, reverse_osmosis='no', waste_water=3, status='refresh'),
+            ReservoirLog(log=self.refreshed_log, water=2, ro_amount=2, reverse_osmosis='yes', status='refill'),
+            ReservoirLog(log=self.refilled_log, water=10, reverse_osmosis='no', status='refill'),
+            ReservoirLog(log=self.refilled_log, water=5, reverse_osmosis='no', waste_water=0, status='refresh'),
+        ])
+
+    def test_duplicates_are_merged_into_the_oldest_row(self):
+        ReservoirLog = self.apps.get_model('records', 'ReservoirLog')
+        fields = ('water', 'waste_water', 'ro_amount', 'status')
+        self.assertEqual(ReservoirLog.objects.filter(log_id=self.refreshed_log.pk).values_list(*fields).get(),
+                         (17, 3, 12, 'refresh'))
+        self.assertEqual(ReservoirLog.objects.filter(log_id=self.refilled_log.pk).values_list(*fields).get(),
+                         (15, 0, None, 'refill'))
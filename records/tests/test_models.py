@@ -1,7 +1,11 @@
+from unittest import mock
+
 from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
+from django.db.models.signals import post_save
 from django.test import TestCase
 
-from records.models import Cycle, Log, Nutrient, NutrientLog, ReservoirLog
+from records.models import Cycle, CycleSummary, Log, Nutrient, NutrientLog, ReservoirLog
 
 
 # Cycle model test cases
@@ -288,6 +292,40 @@ class NutrientLogTestCase(TestCase):
     def test_get_nutrient_usage_per_liter(self):
         self.assertEqual(self.nutrient_log.get_nutrient_usage_per_liter(), 0.2)
 
+    def test_nutrient_log_save_adds_to_existing_log(self):
+        nutrient_log = NutrientLog.objects.create(log=self.log, nutrient=self.nutrient1, concentration=50)
+        self.assertEqual(nutrient_log.pk, self.nutrient_log.pk)
+        self.assertEqual(nutrient_log.concentration, 150)
+        self.assertEqual(NutrientLog.objects.get().concentration, 150)
+
+    def test_nutrient_log_save_reports_whether_it_inserted(self):
+        NutrientLog.objects.filter(pk=self.nutrient_log.pk).update(concentration=0)
+        receiver = mock.Mock()
+        post_save.connect(receiver, sender=NutrientLog)
+        self.addCleanup(post_save.disconnect, receiver, sender=NutrientLog)
+
+        nutrient_log = NutrientLog.objects.create(log=self.log, nutrient=self.nutrient1, concentration=50)
+        self.assertEqual((nutrient_log.pk, nutrient_log.concentration), (self.nutrient_log.pk, 50))
+        self.assertFalse(receiver.call_args.kwargs['created'])
+
+        NutrientLog.objects.create(log=self.log, nutrient=self.nutrient2, concentration=0)
+        self.assertTrue(receiver.call_args.kwargs['created'])
+
+    def test_nutrient_log_save_existing_instance(self):
+        self.nutrient_log.concentration = 80
+        self.nutrient_log.save()
+        self.assertEqual(NutrientLog.objects.get().concentration, 80)
+
+    def test_nutrient_log_save_without_upsert_support(self):
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False):
+            nutrient_log = NutrientLog.objects.create(log=self.log, nutrient=self.nutrient1, concentration=50)
+        self.assertEqual(nutrient_log.pk, self.nutrient_log.pk)
+        self.assertEqual(NutrientLog.objects.get().concentration, 150)
+
+    def test_nutrient_log_unique_per_log(self):
+        with self.assertRaises(IntegrityError):
+            NutrientLog.objects.bulk_create([NutrientLog(log=self.log, nutrient=self.nutrient1, concentration=1)])
+
 
 # ReservoirLog model test cases
 class ReservoirLogTestCase(TestCase):
@@ -310,3 +348,131 @@ class ReservoirLogTestCase(TestCase):
         self.reservoir_log.reverse_osmosis = 'no'
         self.reservoir_log.save()
         self.assertIsNone(self.reservoir_log.ro_amount)
+
+    def test_edit_sets_ro_amount_from_water(self):
+        self.reservoir_log.water = 30
+        self.reservoir_log.save()
+        self.assertEqual(ReservoirLog.objects.get().ro_amount, 30)
+        self.assertEqual(self.reservoir_log.get_percent_ro_ratio(), 100)
+
+        self.reservoir_log.water = None
+        self.reservoir_log.save()
+        self.assertIsNone(ReservoirLog.objects.get().ro_amount)
+
+    def test_save_adds_to_existing_log(self):
+        reservoir_log = ReservoirLog.objects.create(log=self.log, water=20)
+        self.assertEqual(reservoir_log.pk, self.reservoir_log.pk)
+        self.assertEqual(ReservoirLog.objects.count(), 1)
+        existing_log = ReservoirLog.objects.get()
+        self.assertEqual(existing_log.water, 70)
+        self.assertEqual(existing_log.ro_amount, 70)
+        self.assertIsNone(existing_log.waste_water)
+        self.assertEqual(existing_log.status, 'refill')
+
+    def test_save_adds_waste_water_and_refreshes(self):
+        ReservoirLog.objects.create(log=self.log, water=20, reverse_osmosis='no', waste_water=5)
+        existing_log = ReservoirLog.objects.get()
+        self.assertEqual(existing_log.water, 70)
+        self.assertEqual(existing_log.ro_amount, 50)
+        self.assertEqual(existing_log.waste_water, 5)
+        self.assertEqual(existing_log.status, 'refresh')
+
+    def test_save_without_waste_water_keeps_refresh_status(self):
+        ReservoirLog.objects.create(log=self.log, water=20, waste_water=5)
+        ReservoirLog.objects.create(log=self.log, water=10, waste_water=0)
+        existing_log = ReservoirLog.objects.get()
+        self.assertEqual(existing_log.waste_water, 5)
+        self.assertEqual(existing_log.status, 'refresh')
+
+    def test_save_with_zero_waste_water_refills(self):
+        ReservoirLog.objects.create(log=self.log, water=10, waste_water=0)
+        existing_log = ReservoirLog.objects.get()
+        self.assertEqual(existing_log.waste_water, 0)
+        self.assertEqual(existing_log.status, 'refill')
+
+    def test_new_log_with_waste_water_is_refresh(self):
+        log = Log.objects.create(cycle=self.log.cycle)
+        reservoir_log = ReservoirLog.objects.create(log=log, water=10, waste_water=10)
+        self.assertEqual(reservoir_log.status, 'refresh')
+
+
+# CycleSummary model test cases
+class CycleSummaryTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name="Test Cycle")
+        self.nutrient = Nutrient.objects.create(name="Test Nutrient", brand="Test Brand")
+
+    def get_summary(self):
+        return CycleSummary.objects.get(cycle=self.cycle)
+
+    def test_summary_created_with_cycle(self):
+        summary = self.get_summary()
+        self.assertEqual(summary.log_count, 0)
+        self.assertIsNone(summary.current_phase)
+        self.assertIsNone(summary.last_log_date)
+
+    def test_log_creation_updates_counters(self):
+        Log.objects.create(cycle=self.cycle, phase='seedling')
+        log = Log.objects.create(cycle=self.cycle, phase='bloom')
+        Log.objects.create(cycle=self.cycle, phase='vegetative')
+        summary = self.get_summary()
+        self.assertEqual(summary.log_count, 3)
+        self.assertEqual(summary.current_phase, 'bloom')
+        self.assertEqual(summary.last_log_date, log.date)
+
+    def test_log_edit_and_delete_refresh_counters(self):
+        Log.objects.create(cycle=self.cycle, phase='vegetative')
+        log = Log.objects.create(cycle=self.cycle, phase='bloom')
+        log.phase = 'seedling'
+        log.save()
+        self.assertEqual(self.get_summary().current_phase, 'vegetative')
+
+        log.delete()
+        summary = self.get_summary()
+        self.assertEqual(summary.log_count, 1)
+        self.assertEqual(summary.current_phase, 'vegetative')
+
+    def test_feeding_totals(self):
+        log = Log.objects.create(cycle=self.cycle)
+        ReservoirLog.objects.create(log=log, water=40)
+        ReservoirLog.objects.create(log=log, water=10)
+        NutrientLog.objects.create(log=log, nutrient=self.nutrient, concentration=20)
+        NutrientLog.objects.create(log=log, nutrient=self.nutrient, concentration=5)
+        summary = self.get_summary()
+        self.assertEqual(summary.total_water, 50)
+        self.assertEqual(summary.total_nutrients, 25)
+
+        log.delete()
+        summary = self.get_summary()
+        self.assertEqual((summary.log_count, summary.total_water, summary.total_nutrients), (0, 0, 0))
+
+    def test_new_and_merged_feedings_update_totals_incrementally(self):
+        log = Log.objects.create(cycle=self.cycle)
+        with mock.patch.object(CycleSummary, 'refresh') as refresh:
+            ReservoirLog.objects.create(log=log, water=40)
+            ReservoirLog.objects.create(log=log, water=10)
+            NutrientLog.objects.create(log=log, nutrient=self.nutrient, concentration=20)
+            NutrientLog.objects.create(log=log, nutrient=self.nutrient, concentration=5)
+        refresh.assert_not_called()
+        summary = self.get_summary()
+        self.assertEqual((summary.total_water, summary.total_nutrients), (50, 25))
+
+    def test_feeding_edits_refresh_totals(self):
+        log = Log.objects.create(cycle=self.cycle)
+        reservoir_log = ReservoirLog.objects.create(log=log, water=40)
+        nutrient_log = NutrientLog.objects.create(log=log, nutrient=self.nutrient, concentration=20)
+        reservoir_log.water = 30
+        reservoir_log.save()
+        nutrient_log.concentration = 15
+        nutrient_log.save()
+        summary = self.get_summary()
+        self.assertEqual((summary.total_water, summary.total_nutrients), (30, 15))
+
+        nutrient_log.delete()
+        self.assertEqual(self.get_summary().total_nutrients, 0)
+
+    def test_refresh_after_bulk_create(self):
+        Log.objects.bulk_create([Log(cycle=self.cycle, phase='vegetative') for _ in range(3)])
+        self.assertEqual(self.get_summary().log_count, 0)
+        CycleSummary.refresh([self.cycle.pk])
+        self.assertEqual(self.get_summary().log_count, 3)
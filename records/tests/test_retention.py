@@ -0,0 +1,155 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from records.models import Cycle, Log, Nutrient, NutrientLog, ReservoirLog, SensorReading, SensorRollup, Task
+from records.retention import (
+    apply_retention, archive_finished_cycles, compact_sensor_readings, optimize_database, purge_tasks,
+    schedule_retention,
+)
+from records.tasks import enqueue, refresh_cycle_summaries, run_pending_tasks
+
+
+class RetentionTestCase(TestCase):
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+
+    def create_cycle(self, last_log_date: date, name: str = 'Old Cycle') -> Cycle:
+        cycle = Cycle.objects.create(name=name, genetics='Test Genetics', fixture='Test Fixture')
+        log = Log.objects.create(cycle=cycle, phase='bloom', temperature_day=Decimal('24.50'), calibration=True)
+        Log.objects.filter(pk=log.pk).update(date=last_log_date)
+        nutrient = Nutrient.objects.create(name='Grow', brand='Brand')
+        NutrientLog.objects.create(log=log, nutrient=nutrient, concentration=20)
+        ReservoirLog.objects.create(log=log, water=10, waste_water=2, reverse_osmosis='yes')
+        ReservoirLog.objects.create(log=log, water=5, reverse_osmosis='no')
+        enqueue(refresh_cycle_summaries, [cycle.pk])
+        run_pending_tasks()
+        return cycle
+
+    def test_old_readings_are_compacted_into_rollups(self):
+        cycle = Cycle.objects.create(name='Test Cycle')
+        now = int(timezone.now().timestamp())
+        old = now - 40 * 24 * 3600
+        # both readings in the same rollup bucket
+        old -= old % 3600
+        SensorReading.objects.bulk_create([
+            SensorReading(cycle=cycle, timestamp=old, temperature=2400),
+            SensorReading(cycle=cycle, timestamp=old + 30, temperature=2600),
+            SensorReading(cycle=cycle, timestamp=now, temperature=2500),
+        ])
+
+        self.assertEqual(compact_sensor_readings(30), 2)
+        self.assertEqual(list(SensorReading.objects.values_list('timestamp', flat=True)), [now])
+        rollup = SensorRollup.objects.get()
+        self.assertEqual((rollup.temperature_count, rollup.temperature_sum), (2, 5000))
+
+    def test_finished_cycles_are_archived_and_can_be_imported(self):
+        old_cycle = self.create_cycle(timezone.localdate() - timedelta(days=400))
+        current_cycle = self.create_cycle(timezone.localdate(), name='Current Cycle')
+        reservoir = ReservoirLog.objects.get(log__cycle=old_cycle)
+
+        paths = archive_finished_cycles(365, self.archive_dir)
+        self.assertEqual(len(paths), 1)
+        self.assertFalse(Cycle.objects.filter(pk=old_cycle.pk).exists())
+        self.assertTrue(Cycle.objects.filter(pk=current_cycle.pk).exists())
+        with gzip.open(paths[0], 'rt') as archive:
+            rows = [json.loads(line) for line in archive]
+        self.assertEqual(rows[0]['nutrients'], [{'nutrient': 'Grow', 'brand': 'Brand', 'concentration': 20}])
+
+        call_command('import_records', paths[0], stdout=StringIO(), stderr=StringIO())
+        imported = Cycle.objects.exclude(pk=current_cycle.pk).get()
+        self.assertEqual((imported.name, imported.genetics, imported.fixture),
+                         ('Old Cycle', 'Test Genetics', 'Test Fixture'))
+        log = imported.logs.get()
+        self.assertEqual((log.phase, log.temperature_day, log.calibration), ('bloom', Decimal('24.50'), True))
+        self.assertEqual(log.date, timezone.localdate() - timedelta(days=400))
+        self.assertEqual(NutrientLog.objects.get(log=log).concentration, 20)
+        imported_reservoir = ReservoirLog.objects.get(log=log)
+        self.assertEqual(
+            (imported_reservoir.water, imported_reservoir.waste_water, imported_reservoir.ro_amount,
+             imported_reservoir.status),
+            (reservoir.water, reservoir.waste_water, reservoir.ro_amount, reservoir.status),
+        )
+
+    def test_archived_sensor_data_can_be_imported(self):
+        cycle = self.create_cycle(timezone.localdate() - timedelta(days=400))
+        hour = int((timezone.now() - timedelta(days=400)).timestamp())
+        hour -= hour % 3600
+        SensorRollup.objects.create(cycle=cycle, hour=hour, temperature_count=2, temperature_sum=5000,
+                                    temperature_min=2400, temperature_max=2600)
+        SensorReading.objects.create(cycle=cycle, timestamp=hour + 3600, temperature=2500, humidity=None)
+
+        paths = archive_finished_cycles(365, self.archive_dir)
+        self.assertFalse(SensorRollup.objects.exists())
+
+        call_command('import_records', paths[0], '--batch-size', '1', stdout=StringIO(), stderr=StringIO())
+        call_command('import_records', paths[0], stdout=StringIO(), stderr=StringIO())
+        imported = Cycle.objects.get()
+        rollup = SensorRollup.objects.get(cycle=imported)
+        self.assertEqual(
+            (rollup.hour, rollup.temperature_count, rollup.temperature_sum, rollup.temperature_min,
+             rollup.temperature_max, rollup.humidity_count, rollup.humidity_min),
+            (hour, 2, 5000, 2400, 2600, 0, None),
+        )
+        reading = SensorReading.objects.get(cycle=imported)
+        self.assertEqual((reading.timestamp, reading.temperature, reading.humidity), (hour + 3600, 2500, None))
+
+    def test_finished_tasks_are_purged(self):
+        enqueue(refresh_cycle_summaries, [])
+        run_pending_tasks()
+        pending = enqueue(refresh_cycle_summaries, [], delay=60)
+        self.assertEqual(purge_tasks(1), 0)
+        Task.objects.filter(status='done').update(finished=timezone.now() - timedelta(days=2))
+        self.assertEqual(purge_tasks(1), 1)
+        self.assertEqual(list(Task.objects.all()), [pending])
+
+    def test_apply_retention_skips_unset_policies(self):
+        self.create_cycle(timezone.localdate() - timedelta(days=400))
+        removed = apply_retention(tasks_days=None, archive_dir=self.archive_dir, vacuum=False)
+        self.assertEqual(removed, {'readings': 0, 'cycles': 0, 'tasks': 0})
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+    def test_retention_task_reschedules_itself(self):
+        self.assertIsNotNone(schedule_retention(delay=0))
+        self.assertIsNone(schedule_retention(delay=0))
+        with self.settings(RECORDS_RETENTION={'tasks_days': 7}):
+            run_pending_tasks()
+        self.assertEqual(Task.objects.get(name='apply_retention_policy', status='done').last_error, '')
+        scheduled = Task.objects.get(name='apply_retention_policy', status='pending')
+        self.assertGreater(scheduled.run_after, timezone.now() + timedelta(hours=23))
+
+    def test_next_retention_is_scheduled_before_the_run(self):
+        schedule_retention(delay=0)
+        pending_during_run = []
+
+        def apply_retention(**kwargs):
+            # a worker killed here, or a run given up after its visibility timeout, leaves the next run scheduled
+            pending_during_run.append(Task.objects.filter(name='apply_retention_policy', status='pending').exists())
+
+        with mock.patch('records.retention.apply_retention', side_effect=apply_retention):
+            run_pending_tasks()
+        self.assertEqual(pending_during_run, [True])
+
+
+class OptimizeDatabaseTestCase(TransactionTestCase):
+    def test_vacuum_and_analyze(self):
+        optimize_database(vacuum=True)
+
+    def test_compact_records_command(self):
+        out = StringIO()
+        call_command('compact_records', '--archive-days', '365', '--archive-dir', tempfile.mkdtemp(), stdout=out)
+        self.assertIn('Compacted 0 readings, archived 0 cycles, deleted 0 tasks.', out.getvalue())
+
+        call_command('compact_records', '--schedule', stdout=out)
+        self.assertTrue(Task.objects.filter(name='apply_retention_policy', status='pending').exists())
@@ -0,0 +1,159 @@
+import json
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from records.models import Cycle, Log, SensorReading, SensorRollup, Task
+from records.sensors import append_readings, get_readings, get_rollups, parse_readings, rollup_sensor_readings
+from records.tasks import run_pending_tasks
+
+
+def timestamp(day: date, hour: int, minute: int = 0) -> int:
+    return int(datetime(day.year, day.month, day.day, hour, minute, tzinfo=dt_timezone.utc).timestamp())
+
+
+@override_settings(RECORDS_LIGHTS_ON_HOUR=6)
+class SensorReadingsTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle')
+        self.day = date(2023, 5, 10)
+        self.log = Log.objects.create(cycle=self.cycle, phase='bloom')
+        Log.objects.filter(pk=self.log.pk).update(date=self.day)
+        self.cycles = {str(self.cycle.pk): self.cycle}
+
+    def append(self, rows):
+        readings, errors = parse_readings(rows, self.cycles)
+        self.assertEqual(errors, [])
+        append_readings(readings)
+
+    def test_values_are_stored_at_fixed_scales(self):
+        self.append([{'cycle': str(self.cycle.pk), 'timestamp': '2023-05-10T12:00:30Z', 'temperature': 24.56,
+                      'humidity': 61.2, 'carbon_dioxide': 812}])
+        reading = SensorReading.objects.get()
+        self.assertEqual(reading.timestamp, timestamp(self.day, 12) + 30)
+        self.assertEqual((reading.temperature, reading.humidity, reading.carbon_dioxide), (2456, 612, 812))
+
+    def test_invalid_readings_are_reported(self):
+        readings, errors = parse_readings([
+            {'cycle': 'missing', 'timestamp': 'yesterday', 'temperature': 'warm'},
+            'not an object',
+            {'cycle': str(self.cycle.pk), 'timestamp': 1683720000},
+        ], self.cycles)
+        self.assertEqual(len(readings), 1)
+        self.assertEqual(errors[0].index, 0)
+        self.assertEqual(set(errors[0].errors), {'cycle', 'timestamp', 'temperature'})
+        self.assertEqual(errors[1].index, 1)
+
+    def test_out_of_range_readings_are_reported(self):
+        readings, errors = parse_readings([
+            {'cycle': str(self.cycle.pk), 'timestamp': 1683720000, 'temperature': 400.0},
+            {'cycle': str(self.cycle.pk), 'timestamp': 1683720001, 'humidity': -3276.9, 'carbon_dioxide': float('inf')},
+            {'cycle': str(self.cycle.pk), 'timestamp': 1683720002, 'temperature': 327.67, 'humidity': -3276.8},
+        ], self.cycles)
+        self.assertEqual([reading.timestamp for reading in readings], [1683720002])
+        self.assertEqual([error.index for error in errors], [0, 1])
+        self.assertEqual(errors[0].errors, {'temperature': ['Ensure this value is between -327.68 and 327.67.']})
+        self.assertEqual(set(errors[1].errors), {'humidity', 'carbon_dioxide'})
+
+    def test_resent_readings_are_stored_once(self):
+        rows = [{'cycle': str(self.cycle.pk), 'timestamp': timestamp(self.day, 12), 'temperature': 24}]
+        self.append(rows)
+        self.append(rows)
+        self.assertEqual(SensorReading.objects.count(), 1)
+
+    def test_rollups_are_scheduled_once_per_cycle(self):
+        self.append([{'cycle': str(self.cycle.pk), 'timestamp': timestamp(self.day, 12), 'temperature': 24}])
+        self.append([{'cycle': str(self.cycle.pk), 'timestamp': timestamp(self.day, 2), 'temperature': 18}])
+        task = Task.objects.get()
+        self.assertEqual(task.args, [str(self.cycle.pk), timestamp(self.day, 2), timestamp(self.day, 12)])
+        self.assertGreater(task.run_after, task.created)
+
+    def test_rollup_aggregates_hours_and_log_fields(self):
+        # bloom lights are on from 6:00 to 18:00
+        self.append([
+            {'cycle': str(self.cycle.pk), 'timestamp': timestamp(self.day, hour, minute), 'temperature': temperature,
+             'humidity': humidity, 'carbon_dioxide': 900}
+            for hour, minute, temperature, humidity in [(8, 0, 24.0, 50), (8, 30, 26.0, 52), (20, 0, 18.5, 65),
+                                                        (2, 0, 19.5, 67)]
+        ])
+        task = Task.objects.get()
+        rollup_sensor_readings(*task.args)
+
+        morning = SensorRollup.objects.get(hour=timestamp(self.day, 8))
+        self.assertEqual((morning.temperature_count, morning.temperature_sum), (2, 5000))
+        self.assertEqual((morning.temperature_min, morning.temperature_max), (2400, 2600))
+        self.assertEqual(SensorRollup.objects.count(), 3)
+
+        log = Log.objects.get(pk=self.log.pk)
+        self.assertEqual(log.temperature_day, Decimal('25.00'))
+        self.assertEqual(log.humidity_day, 51)
+        self.assertEqual(log.temperature_night, Decimal('19.00'))
+        self.assertEqual(log.humidity_night, 66)
+        self.assertEqual(log.carbon_dioxide, 900)
+
+    def test_rollup_can_be_repeated(self):
+        self.append([{'cycle': str(self.cycle.pk), 'timestamp': timestamp(self.day, 12), 'temperature': 24}])
+        rollup_sensor_readings(*Task.objects.get().args)
+        self.append([{'cycle': str(self.cycle.pk), 'timestamp': timestamp(self.day, 12, 30), 'temperature': 26}])
+        Task.objects.filter(status='pending').update(run_after=Task.objects.get(status='pending').created)
+        run_pending_tasks()
+
+        rollup = SensorRollup.objects.get()
+        self.assertEqual(rollup.temperature_count, 2)
+        self.assertEqual(Log.objects.get(pk=self.log.pk).temperature_day, Decimal('25.00'))
+
+    def test_rollup_invalidates_rows_cached_by_the_web_process(self):
+        url = reverse('record', args=[self.cycle.pk])
+        self.assertNotContains(self.client.get(url), '25.0')
+        self.append([{'cycle': str(self.cycle.pk), 'timestamp': timestamp(self.day, 12), 'temperature': 25}])
+        Task.objects.update(run_after=Task.objects.get().created)
+
+        # the task worker runs in another process, with its own cache objects
+        with mock.patch('records.cache.get_records_cache', return_value=caches.create_connection('records')):
+            with self.captureOnCommitCallbacks(execute=True):
+                run_pending_tasks()
+        self.assertContains(self.client.get(url), '25.0')
+
+    def test_time_range_queries(self):
+        self.append([
+            {'cycle': str(self.cycle.pk), 'timestamp': timestamp(self.day, hour), 'temperature': 20 + hour}
+            for hour in (1, 2, 3)
+        ])
+        rollup_sensor_readings(*Task.objects.get().args)
+        start, end = timestamp(self.day, 2), timestamp(self.day, 3)
+        self.assertEqual([row['timestamp'] for row in get_readings(self.cycle.pk, start, end)], [start])
+        self.assertEqual([bucket['temperature']['mean'] for bucket in get_rollups(self.cycle.pk, start, end)], [22])
+
+
+class SensorReadingsViewsTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle')
+        self.url = reverse('bulk_create_readings')
+
+    def test_bulk_create_readings(self):
+        rows = [{'cycle': str(self.cycle.pk), 'timestamp': 1683720000 + 30 * i, 'temperature': 24.5} for i in range(3)]
+        rows.append({'cycle': str(self.cycle.pk), 'timestamp': None})
+        response = self.client.post(self.url, data=json.dumps(rows), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['accepted'], 3)
+        self.assertEqual(response.json()['errors'][0]['index'], 3)
+
+    def test_bulk_create_readings_without_valid_rows(self):
+        response = self.client.post(self.url, data=json.dumps([{'cycle': 'missing'}]),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_sensor_readings(self):
+        SensorReading.objects.create(cycle=self.cycle, timestamp=1683720000, temperature=2450)
+        url = reverse('sensor_readings', args=[self.cycle.pk])
+
+        response = self.client.get(url, {'start': 1683720000, 'end': 1683723600, 'resolution': 'raw'})
+        self.assertEqual(response.json()['readings'],
+                         [{'timestamp': 1683720000, 'temperature': 24.5, 'humidity': None, 'carbon_dioxide': None}])
+        self.assertEqual(self.client.get(url, {'start': 'now'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('sensor_readings', args=[uuid.uuid4()])).status_code, 404)
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from records.models import Cycle, Task
+from records.tasks import TASK_RETRY_DELAY, TASKS, claim_task, enqueue, run_pending_tasks, run_task, task
+
+calls = []
+
+
+@task(name='test_record_call', max_attempts=2)
+def record_call(value, **kwargs) -> None:
+    calls.append((value, kwargs))
+
+
+@task(name='test_fail')
+def fail() -> None:
+    Cycle.objects.create(name='rolled back')
+    raise RuntimeError('boom')
+
+
+class TaskQueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_task_is_registered(self):
+        self.assertIs(TASKS['test_record_call'], record_call)
+
+    def test_enqueue_unknown_task(self):
+        with self.assertRaises(ValueError):
+            enqueue('missing')
+
+    def test_task_runs_once(self):
+        enqueued = enqueue(record_call, 1, flag=True)
+        self.assertEqual(enqueued.max_attempts, 2)
+
+        self.assertEqual(run_pending_tasks(), 1)
+        self.assertEqual(calls, [(1, {'flag': True})])
+        enqueued.refresh_from_db()
+        self.assertEqual(enqueued.status, 'done')
+        self.assertEqual(enqueued.attempts, 1)
+        self.assertIsNotNone(enqueued.finished)
+        self.assertEqual(run_pending_tasks(), 0)
+
+    def test_delayed_task_is_not_due(self):
+        enqueue(record_call, 1, delay=60)
+        self.assertIsNone(claim_task())
+
+    def test_failed_task_is_retried_with_backoff(self):
+        enqueued = enqueue(fail)
+        before = timezone.now()
+        with self.assertLogs('records.tasks', 'ERROR'):
+            self.assertFalse(run_task(claim_task()))
+
+        enqueued.refresh_from_db()
+        self.assertEqual(enqueued.status, 'pending')
+        self.assertIn('RuntimeError: boom', enqueued.last_error)
+        self.assertGreaterEqual(enqueued.run_after, before + timedelta(seconds=TASK_RETRY_DELAY))
+        # the work of the failed attempt is rolled back
+        self.assertFalse(Cycle.objects.filter(name='rolled back').exists())
+
+    def test_task_fails_after_max_attempts(self):
+        enqueued = enqueue(fail)
+        for _ in range(enqueued.max_attempts):
+            Task.objects.filter(pk=enqueued.pk).update(run_after=timezone.now())
+            with self.assertLogs('records.tasks', 'ERROR'):
+                run_pending_tasks()
+        enqueued.refresh_from_db()
+        self.assertEqual(enqueued.status, 'failed')
+        self.assertEqual(enqueued.attempts, enqueued.max_attempts)
+
+    def test_claimed_task_is_invisible_until_timeout(self):
+        enqueued = enqueue(record_call, 1)
+        self.assertEqual(claim_task().pk, enqueued.pk)
+        self.assertIsNone(claim_task())
+
+        Task.objects.filter(pk=enqueued.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        taken_over = claim_task()
+        self.assertEqual(taken_over.pk, enqueued.pk)
+        self.assertEqual(taken_over.attempts, 2)
+
+    def test_outcome_of_taken_over_task_is_ignored(self):
+        enqueue(record_call, 1)
+        stale = claim_task()
+        Task.objects.filter(pk=stale.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        claim_task()
+
+        run_task(stale)
+        self.assertEqual(Task.objects.get(pk=stale.pk).status, 'running')
+
+    def test_last_attempt_past_visibility_timeout_fails(self):
+        enqueued = enqueue(record_call, 1)
+        Task.objects.filter(pk=enqueued.pk).update(
+            status='running', attempts=2, locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        with self.assertLogs('records.tasks', 'ERROR'):
+            run_pending_tasks()
+        enqueued.refresh_from_db()
+        self.assertEqual(enqueued.status, 'failed')
+        self.assertIn('TimeoutError', enqueued.last_error)
+        self.assertEqual(calls, [])
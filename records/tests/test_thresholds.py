@@ -0,0 +1,61 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from records.models import Cycle, Log
+from records.thresholds import CO2_ENRICHMENT_LEVEL, Threshold, classify_logs
+
+
+class ThresholdTestCase(TestCase):
+    def test_matches_respects_bound_inclusivity(self):
+        threshold = Threshold('temp-ideal', gt=18, le=25)
+        self.assertFalse(threshold.matches(18))
+        self.assertTrue(threshold.matches(Decimal('18.1')))
+        self.assertTrue(threshold.matches(25))
+        self.assertFalse(threshold.matches(Decimal('25.5')))
+
+
+class ClassifyLogsTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle')
+
+    def test_classify_by_phase(self):
+        seedling = Log.objects.create(cycle=self.cycle, phase='seedling', temperature_day=29, humidity_day=65)
+        bloom = Log.objects.create(cycle=self.cycle, phase='bloom', temperature_day=29, humidity_day=65)
+        classify_logs([seedling, bloom])
+        self.assertEqual(seedling.metric_status['temperature_day'].css_class, 'temp-danger')
+        self.assertEqual(seedling.metric_status['temperature_day'].icon, 'fa-brands fa-gripfire')
+        self.assertEqual(seedling.metric_status['humidity_day'].css_class, 'hum-ideal')
+        self.assertEqual(bloom.metric_status['humidity_day'].css_class, 'hum-high')
+
+    def test_classify_bloom_with_co2_enrichment(self):
+        log = Log.objects.create(cycle=self.cycle, phase='bloom', temperature_day=30,
+                                 carbon_dioxide=CO2_ENRICHMENT_LEVEL)
+        classify_logs([log])
+        self.assertEqual(log.metric_status['temperature_day'].css_class, 'temp-high')
+        self.assertIsNone(log.metric_status['temperature_day'].icon)
+
+    def test_classify_missing_and_unclassified_values(self):
+        log = Log.objects.create(cycle=self.cycle, phase='vegetative', temperature_day=20, ec=Decimal('0.80'))
+        classify_logs([log])
+        self.assertIsNone(log.metric_status['temperature_day'])
+        self.assertIsNone(log.metric_status['ph'])
+        self.assertEqual(log.metric_status['ec'].css_class, 'ec-moderate')
+
+    def test_classify_bound_values(self):
+        logs = [
+            Log(phase='seedling', temperature_day=18, ec=Decimal('2.00'), carbon_dioxide=CO2_ENRICHMENT_LEVEL),
+            Log(phase='seedling', temperature_day=Decimal('25.50'), ph=Decimal('5.50'), carbon_dioxide=1000),
+            Log(phase='bloom', temperature_day=33, carbon_dioxide=CO2_ENRICHMENT_LEVEL - 1),
+        ]
+        classify_logs(logs)
+        self.assertEqual(logs[0].metric_status['temperature_day'].css_class, 'temp-low')
+        self.assertEqual(logs[0].metric_status['ec'].css_class, 'ec-extreme')
+        self.assertIsNone(logs[0].metric_status['carbon_dioxide'])
+        self.assertIsNone(logs[1].metric_status['temperature_day'])
+        self.assertEqual(logs[1].metric_status['ph'].css_class, 'ph-color-green')
+        self.assertEqual(logs[1].metric_status['carbon_dioxide'].css_class, 'carbon-dioxide-ideal')
+        self.assertEqual(logs[2].metric_status['temperature_day'].css_class, 'temp-danger')
+
+    def test_classify_no_logs(self):
+        self.assertEqual(classify_logs([]), [])
@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.test import TestCase
+
+from records.analytics import SUMMARY_METRICS
+from records.models import Cycle, Log, Nutrient, NutrientLog, ReservoirLog
+from records.timeseries import align_by_phase_day, load_cycle_series, load_cycles_series
+
+
+class LoadCycleSeriesTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle')
+        first_day = date.today() - timedelta(days=2)
+        self.logs = []
+        for day, (phase, ph) in enumerate([('seedling', Decimal('5.8')), ('vegetative', None), ('bloom', 6)]):
+            log = Log.objects.create(cycle=self.cycle, phase=phase, ph=ph, humidity_day=60 + day)
+            Log.objects.filter(pk=log.pk).update(date=first_day + timedelta(days=day))
+            self.logs.append(log)
+
+    def test_columns(self):
+        series = load_cycle_series(self.cycle)
+        self.assertEqual(series.ids.tolist(), [log.pk for log in self.logs])
+        self.assertEqual(series.dates.dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(series.dates[0], np.datetime64(date.today() - timedelta(days=2)))
+        self.assertEqual(series.phases.tolist(), [1, 2, 3])
+        self.assertEqual(set(series.metrics), set(SUMMARY_METRICS))
+
+    def test_metrics_are_masked_floats(self):
+        series = load_cycle_series(self.cycle, metrics=['ph', 'humidity_day'])
+        ph = series.metrics['ph']
+        self.assertEqual(ph.dtype, np.float64)
+        self.assertEqual(ph.mask.tolist(), [False, True, False])
+        self.assertAlmostEqual(ph.mean(), 5.9)
+        self.assertEqual(series.metrics['humidity_day'].tolist(), [60.0, 61.0, 62.0])
+
+    def test_phase_mask(self):
+        series = load_cycle_series(self.cycle)
+        self.assertEqual(series.ids[series.get_phase_mask('vegetative')].tolist(), [self.logs[1].pk])
+
+    def test_cycle_without_logs(self):
+        series = load_cycle_series(Cycle.objects.create(name='Empty'), metrics=['ph'])
+        self.assertEqual(len(series.ids), 0)
+        self.assertEqual(len(series.metrics['ph']), 0)
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            load_cycle_series(self.cycle)
+
+
+class AlignByPhaseDayTestCase(TestCase):
+    def setUp(self):
+        self.nutrient = Nutrient.objects.create(name='Grow', brand='Test Brand')
+        self.cycle1 = Cycle.objects.create(name='Cycle 1')
+        self.cycle2 = Cycle.objects.create(name='Cycle 2')
+        for phase, temperature in [('vegetative', 20), ('vegetative', 21), ('bloom', 22), ('vegetative', 23)]:
+            log = Log.objects.create(cycle=self.cycle1, phase=phase, temperature_day=temperature)
+            ReservoirLog.objects.create(log=log, water=10)
+        for phase, temperature in [('vegetative', 30), ('bloom', None), ('bloom', 32)]:
+            log = Log.objects.create(cycle=self.cycle2, phase=phase, temperature_day=temperature)
+            NutrientLog.objects.create(log=log, nutrient=self.nutrient, concentration=5)
+
+    def test_phase_days_match_model(self):
+        series = load_cycle_series(self.cycle1)
+        days = dict(zip(series.ids.tolist(), series.get_phase_days().tolist()))
+        for log in Log.objects.filter(cycle=self.cycle1):
+            self.assertEqual(days[log.pk], log.get_phase_day_in_cycle())
+
+    def test_load_several_cycles_in_one_query(self):
+        with self.assertNumQueries(1):
+            series = load_cycles_series([self.cycle1.pk, str(self.cycle2.pk)], metrics=['water', 'nutrients'])
+        self.assertEqual(series[self.cycle1.pk].metrics['water'].tolist(), [10.0] * 4)
+        self.assertEqual(series[self.cycle2.pk].metrics['nutrients'].tolist(), [5.0] * 3)
+        self.assertTrue(series[self.cycle2.pk].metrics['water'].mask.all())
+
+    def test_align(self):
+        series = load_cycles_series([self.cycle1.pk, self.cycle2.pk], metrics=['temperature_day'])
+        aligned = align_by_phase_day([series[self.cycle1.pk], series[self.cycle2.pk]], ['temperature_day'])
+        self.assertEqual(list(aligned), ['vegetative', 'bloom'])
+        self.assertEqual(aligned['vegetative']['temperature_day'].tolist(), [[20, 21, 23], [30, None, None]])
+        self.assertEqual(aligned['bloom']['temperature_day'].tolist(), [[22, None], [None, 32]])
@@ -1,22 +1,69 @@
 from django.test import TestCase
 
 from records.models import Cycle, Log
-from records.utils import calculate_average_veg_day_temp
+from records.utils import annotate_log_positions, get_log_page
 
 
-class CalculateAverageVegDayTempTestCase(TestCase):
+class AnnotateLogPositionsTestCase(TestCase):
     def setUp(self):
         self.cycle = Cycle.objects.create(name='Test Cycle')
-        self.log1 = Log.objects.create(cycle=self.cycle, phase='vegetative', temperature_day=20, temperature_night=15)
-        self.log2 = Log.objects.create(cycle=self.cycle, phase='vegetative', temperature_day=None,
-                                       temperature_night=None)
-        self.log3 = Log.objects.create(cycle=self.cycle, phase='bloom', temperature_day=25, temperature_night=20)
-
-    def test_calculate_average_veg_temp_with_logs(self):
-        avg_day_temp = calculate_average_veg_day_temp(self.cycle)
-        self.assertEqual(avg_day_temp, 20)
-
-    def test_calculate_average_veg_temp_without_logs(self):
-        cycle2 = Cycle.objects.create(name='Test Cycle 2')
-        avg_day_temp = calculate_average_veg_day_temp(cycle2)
-        self.assertIsNone(avg_day_temp)
+        self.log1 = Log.objects.create(cycle=self.cycle, phase='vegetative')
+        self.log2 = Log.objects.create(cycle=self.cycle, phase='bloom')
+        self.log3 = Log.objects.create(cycle=self.cycle, phase='vegetative')
+
+    def test_positions_match_model_methods(self):
+        logs = annotate_log_positions(list(Log.objects.filter(cycle=self.cycle)))
+        for log in logs:
+            self.assertEqual(log.day_in_cycle, log.get_day_in_cycle())
+            self.assertEqual(log.phase_day_in_cycle, log.get_phase_day_in_cycle())
+            self.assertEqual(log.days_since_calibration, log.get_days_since_calibration())
+
+    def test_positions_keep_order(self):
+        logs = annotate_log_positions(list(Log.objects.filter(cycle=self.cycle)))
+        self.assertEqual(logs, [self.log1, self.log3, self.log2])
+        self.assertEqual([log.day_in_cycle for log in logs], [1, 3, 2])
+        self.assertEqual([log.phase_day_in_cycle for log in logs], [1, 2, 1])
+
+    def test_days_since_calibration(self):
+        Log.objects.filter(pk=self.log1.pk).update(calibration=True)
+        logs = annotate_log_positions(list(Log.objects.filter(cycle=self.cycle).order_by('id')))
+        self.assertEqual([log.days_since_calibration for log in logs], [None, 1, 2])
+
+    def test_positions_with_constant_queries(self):
+        logs = list(Log.objects.filter(cycle=self.cycle))
+        with self.assertNumQueries(0):
+            annotate_log_positions(logs)
+
+
+class GetLogPageTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='Test Cycle')
+        self.bloom_log = Log.objects.create(cycle=self.cycle, phase='bloom', calibration=True)
+        self.veg_logs = [Log.objects.create(cycle=self.cycle, phase='vegetative', light_height=day)
+                         for day in range(4)]
+
+    def test_pages_follow_log_ordering(self):
+        first_page, after = get_log_page(self.cycle, limit=3)
+        second_page, last = get_log_page(self.cycle, after=after, limit=3)
+        self.assertEqual(first_page + second_page, list(Log.objects.filter(cycle=self.cycle)))
+        self.assertEqual(after, self.veg_logs[2].pk)
+        self.assertIsNone(last)
+
+    def test_positions_are_kept_across_pages(self):
+        _, after = get_log_page(self.cycle, limit=3)
+        second_page, _ = get_log_page(self.cycle, after=after, limit=3)
+        self.assertEqual([log.row_number for log in second_page], [4, 5])
+        self.assertEqual([log.day_in_cycle for log in second_page], [5, 1])
+        self.assertEqual([log.days_since_calibration for log in second_page], [4, None])
+        self.assertEqual(second_page[0].previous_light_height, 2)
+
+    def test_pages_follow_stale_phase_order(self):
+        # QuerySet.update() leaves phase_order as it was
+        Log.objects.filter(pk=self.veg_logs[2].pk).update(phase='bloom')
+        first_page, after = get_log_page(self.cycle, limit=3)
+        second_page, _ = get_log_page(self.cycle, after=after, limit=3)
+        self.assertEqual(first_page + second_page, list(Log.objects.filter(cycle=self.cycle)))
+
+    def test_unknown_cursor(self):
+        with self.assertRaises(Log.DoesNotExist):
+            get_log_page(self.cycle, after=0)
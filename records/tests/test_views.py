@@ -1,8 +1,15 @@
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+
 from django.test import Client, TestCase, RequestFactory
 from django.urls import reverse
 
-from records.models import Cycle, Log, Nutrient, NutrientLog, ReservoirLog
+from records.models import Cycle, CycleSummary, Log, Nutrient, NutrientLog, ReservoirLog, Task
 from records.forms import CycleForm, NutrientLogForm, ReservoirLogForm
+from records.tasks import run_pending_tasks
+from records.utils import LOGS_PER_PAGE
 
 
 # record views test cases
@@ -49,6 +56,87 @@ class RecordsViewTestCase(TestCase):
         response = self.client.get(self.url_record)
         self.assertEqual(response.context['cycle'], self.cycle)
 
+    def test_records_lists_summaries_in_one_query(self):
+        for _ in range(3):
+            cycle = Cycle.objects.create(name='Cycle', genetics='Unknown')
+            Log.objects.create(cycle=cycle, phase='bloom')
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url_records)
+        self.assertContains(response, 'Bloom &middot; day 1', count=3)
+
+    def test_record_logs_are_annotated_with_previous_log(self):
+        log1 = Log.objects.create(cycle=self.cycle, light_height=50, irrigation='drip')
+        log2 = Log.objects.create(cycle=self.cycle, light_height=40, irrigation='flood')
+        response = self.client.get(self.url_record)
+        logs = {log.pk: log for log in response.context['logs']}
+        self.assertIsNone(logs[log1.pk].previous_light_height)
+        self.assertIsNone(logs[log1.pk].previous_irrigation)
+        self.assertEqual(logs[log2.pk].previous_light_height, log1.light_height)
+        self.assertEqual(logs[log2.pk].previous_irrigation, log1.irrigation)
+        self.assertEqual(logs[log2.pk].previous_light_height, log2.get_previous_log().light_height)
+
+    def test_record_renders_in_fixed_number_of_queries(self):
+        nutrient = Nutrient.objects.create(name='test nutrient', brand='test brand', nutrient_type='base_line')
+        for day in range(10):
+            log = Log.objects.create(cycle=self.cycle, calibration=day % 3 == 0)
+            NutrientLog.objects.create(log=log, nutrient=nutrient, concentration=10)
+            ReservoirLog.objects.create(log=log, water=20, waste_water=5)
+        # cycle, log history, logs, reservoir logs, nutrient logs with nutrients
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url_record)
+        self.assertContains(response, 'test nutrient - 10')
+
+    def test_log_rows_returns_next_page(self):
+        logs = [Log.objects.create(cycle=self.cycle) for _ in range(LOGS_PER_PAGE + 2)]
+        response = self.client.get(self.url_record)
+        self.assertContains(response, 'id="irrigation', count=LOGS_PER_PAGE)
+        self.assertEqual(response.context['next_cursor'], logs[LOGS_PER_PAGE - 1].pk)
+
+        url_log_rows = reverse('log_rows', args=[self.cycle.pk])
+        response = self.client.get(url_log_rows, {'after': response.context['next_cursor']})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['next'])
+        self.assertEqual(response.json()['html'].count('<tr'), 2)
+        self.assertIn(f'irrigation{logs[-1].pk}', response.json()['html'])
+
+    def test_log_rows_with_invalid_cursor(self):
+        url_log_rows = reverse('log_rows', args=[self.cycle.pk])
+        self.assertEqual(self.client.get(url_log_rows, {'after': 'invalid'}).status_code, 400)
+        self.assertEqual(self.client.get(url_log_rows, {'after': 0}).status_code, 404)
+
+    def test_phase_summary(self):
+        Log.objects.create(cycle=self.cycle, phase='vegetative', temperature_day=20)
+        Log.objects.create(cycle=self.cycle, phase='vegetative', temperature_day=24)
+        response = self.client.get(reverse('phase_summary', args=[self.cycle.pk]))
+        self.assertTemplateUsed(response, 'records/phase_summary.html')
+        self.assertContains(response, '<strong>Vegetative:</strong> 2 logs')
+
+        response = self.client.get(reverse('phase_summary_json', args=[self.cycle.pk]))
+        phases = response.json()['phases']
+        self.assertEqual(len(phases), 1)
+        self.assertEqual(phases[0]['metrics']['temperature_day']['mean'], 22)
+        self.assertEqual(phases[0]['start'], date.today().isoformat())
+
+    def test_phase_summary_of_missing_cycle(self):
+        self.assertEqual(self.client.get(reverse('phase_summary', args=[uuid.uuid4()])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('phase_summary_json', args=[uuid.uuid4()])).status_code, 404)
+
+    def test_compare_cycles(self):
+        cycle = Cycle.objects.create(name='Cycle 2', genetics='Unknown')
+        for compared_cycle in (self.cycle, cycle):
+            Log.objects.create(cycle=compared_cycle, phase='vegetative', temperature_day=20)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('compare_cycles'), {'cycle': [self.cycle.pk, cycle.pk]})
+        self.assertEqual(response.context['selected_cycles'], [self.cycle, cycle])
+        phases = response.context['chart_data']['phases']
+        self.assertEqual(phases[0]['label'], 'Vegetative')
+        self.assertEqual(phases[0]['metrics'][0]['values'], [[20.0], [20.0]])
+        self.assertContains(response, 'id="compare-data"')
+
+    def test_compare_cycles_with_invalid_cycle(self):
+        response = self.client.get(reverse('compare_cycles'), {'cycle': 'invalid'})
+        self.assertEqual(response.status_code, 400)
+
     def test_view_returns_error_when_no_records(self):
         Cycle.objects.all().delete()
         response = self.client.get(self.url_records)
@@ -406,4 +494,71 @@ class ReservoirLogTestCase(TestCase):
         self.assertEqual(ReservoirLog.objects.count(), 0)
 
 
+# api views test cases
+class BulkCreateLogsTestCase(TestCase):
+    def setUp(self):
+        self.cycle = Cycle.objects.create(name='test cycle')
+        self.url = reverse('bulk_create_logs')
+        self.reading = {'cycle': str(self.cycle.pk), 'phase': 'vegetative', 'temperature_day': 24.5,
+                        'humidity_day': 60, 'carbon_dioxide': 800, 'ph': 6.1, 'ec': 1.4}
+
+    def test_bulk_create_logs_json(self):
+        response = self.client.post(self.url, data=json.dumps([self.reading] * 3), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 3)
+        self.assertEqual(response.json()['errors'], [])
+        self.assertEqual(self.cycle.logs.count(), 3)
+        log = self.cycle.logs.first()
+        self.assertEqual(log.temperature_day, Decimal('24.5'))
+        self.assertEqual(log.date, date.today())
+
+    def test_bulk_create_logs_with_dates(self):
+        rows = [{**self.reading, 'date': '2023-01-03'}, {**self.reading, 'date': '2023-01-02'}]
+        response = self.client.post(self.url, data=json.dumps(rows), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        logs = Log.objects.in_bulk(response.json()['ids'])
+        self.assertEqual([logs[pk].date for pk in response.json()['ids']], [date(2023, 1, 3), date(2023, 1, 2)])
+
+        run_pending_tasks()
+        self.assertEqual(CycleSummary.objects.get(cycle=self.cycle).last_log_date, date(2023, 1, 3))
+
+    def test_bulk_create_logs_with_invalid_date(self):
+        response = self.client.post(self.url, data=json.dumps([{**self.reading, 'date': '2023-13-01'}]),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date', response.json()['errors'][0]['errors'])
+
+    def test_bulk_create_logs_enqueues_summary_refresh(self):
+        self.client.post(self.url, data=json.dumps([self.reading] * 2), content_type='application/json')
+        self.assertEqual(CycleSummary.objects.get(cycle=self.cycle).log_count, 0)
+        self.assertEqual(Task.objects.get().args, [[str(self.cycle.pk)]])
+
+        run_pending_tasks()
+        self.assertEqual(CycleSummary.objects.get(cycle=self.cycle).log_count, 2)
+
+    def test_bulk_create_logs_ndjson(self):
+        body = '\n'.join(json.dumps(self.reading) for _ in range(2)) + '\n'
+        response = self.client.post(self.url, data=body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.cycle.logs.count(), 2)
+
+    def test_bulk_create_logs_reports_row_errors(self):
+        rows = [self.reading, {**self.reading, 'phase': 'invalid'}, {**self.reading, 'cycle': str(uuid.uuid4())}]
+        response = self.client.post(self.url, data=json.dumps(rows), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual([error['index'] for error in response.json()['errors']], [1, 2])
+        self.assertIn('phase', response.json()['errors'][0]['errors'])
+        self.assertIn('cycle', response.json()['errors'][1]['errors'])
+
+    def test_bulk_create_logs_without_valid_rows(self):
+        response = self.client.post(self.url, data=json.dumps([{'phase': 'invalid'}]), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Log.objects.count(), 0)
+
+    def test_bulk_create_logs_with_malformed_ndjson(self):
+        response = self.client.post(self.url, data='{"phase": \n', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 400)
+
+
 # other views test cases
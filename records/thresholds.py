@@ -0,0 +1,239 @@
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Union
+
+import numpy as np
+
+from .models import Log
+
+Number = Union[int, Decimal]
+
+
+class Threshold(NamedTuple):
+    """
+    A range of values of a single `Log` metric and the status it maps to.
+
+    Fields:
+        css_class (str): The CSS class the table cell gets when the value falls into the range.
+        gt (Number): Exclusive lower bound, if any.
+        ge (Number): Inclusive lower bound, if any.
+        lt (Number): Exclusive upper bound, if any.
+        le (Number): Inclusive upper bound, if any.
+        icon (str): Font Awesome classes of the icon shown next to the value, if any.
+
+    Methods:
+        matches (bool): Returns whether the value falls into the range, see `classify_logs` for whole columns.
+    """
+    css_class: str
+    gt: Optional[Number] = None
+    ge: Optional[Number] = None
+    lt: Optional[Number] = None
+    le: Optional[Number] = None
+    icon: Optional[str] = None
+
+    def matches(self, value: Number) -> bool:
+        return not (
+            (self.gt is not None and value <= self.gt)
+            or (self.ge is not None and value < self.ge)
+            or (self.lt is not None and value >= self.lt)
+            or (self.le is not None and value > self.le)
+        )
+
+
+FREEZING_ICON: str = 'fa-regular fa-snowflake'
+HEAT_ICON: str = 'fa-brands fa-gripfire'
+DRY_ICON: str = 'fa-solid fa-droplet-slash'
+WET_ICON: str = 'fa-solid fa-droplet'
+DANGER_ICON: str = 'fa-solid fa-triangle-exclamation'
+
+# bloom logs with at least this much co2 tolerate higher day temperatures, see 'bloom+co2'
+CO2_ENRICHMENT_LEVEL: int = 1500
+
+# metric -> phase (or '*' for every phase) -> thresholds, the first matching threshold wins
+THRESHOLDS: Dict[str, Dict[str, List[Threshold]]] = {
+    'temperature_day': {
+        'seedling': [
+            Threshold('temp-freezing', le=15, icon=FREEZING_ICON),
+            Threshold('temp-low', gt=15, le=18),
+            Threshold('temp-ideal', gt=18, le=25),
+            Threshold('temp-high', ge=26, le=28),
+            Threshold('temp-danger', gt=28, icon=HEAT_ICON),
+        ],
+        'vegetative': [
+            Threshold('temp-freezing', le=15, icon=FREEZING_ICON),
+            Threshold('temp-low', gt=15, le=18),
+            Threshold('temp-ideal', ge=22, le=28),
+            Threshold('temp-high', gt=28, le=30),
+            Threshold('temp-danger', gt=30, icon=HEAT_ICON),
+        ],
+        'bloom': [
+            Threshold('temp-freezing', le=15, icon=FREEZING_ICON),
+            Threshold('temp-low', gt=15, le=18),
+            Threshold('temp-ideal', gt=18, le=26),
+            Threshold('temp-high', gt=26, le=28),
+            Threshold('temp-danger', gt=28, icon=HEAT_ICON),
+        ],
+        'bloom+co2': [
+            Threshold('temp-freezing', le=15, icon=FREEZING_ICON),
+            Threshold('temp-low', gt=15, le=18),
+            Threshold('temp-ideal', gt=18, le=26),
+            Threshold('temp-high', gt=26, le=33),
+            Threshold('temp-danger', gt=33, icon=HEAT_ICON),
+        ],
+    },
+    'temperature_night': {
+        '*': [
+            Threshold('temp-freezing', le=15, icon=FREEZING_ICON),
+            Threshold('temp-low', gt=15, le=18),
+            Threshold('temp-ideal', gt=22, lt=25),
+            Threshold('temp-high', ge=26, lt=28),
+            Threshold('temp-danger', ge=28, icon=HEAT_ICON),
+        ],
+    },
+    'humidity_day': {
+        'seedling': [
+            Threshold('hum-critical-low', le=30, icon=DRY_ICON),
+            Threshold('hum-low', gt=30, lt=60),
+            Threshold('hum-ideal', ge=60, le=70),
+            Threshold('hum-high', gt=70, lt=75),
+            Threshold('hum-critical-high', ge=75, icon=WET_ICON),
+        ],
+        'vegetative': [
+            Threshold('hum-critical-low', le=30, icon=DRY_ICON),
+            Threshold('hum-low', gt=30, lt=55),
+            Threshold('hum-ideal', ge=55, le=65),
+            Threshold('hum-high', gt=65, lt=75),
+            Threshold('hum-critical-high', ge=75, icon=WET_ICON),
+        ],
+        'bloom': [
+            Threshold('hum-critical-low', le=30, icon=DRY_ICON),
+            Threshold('hum-low', gt=30, le=45),
+            Threshold('hum-ideal', gt=45, le=55),
+            Threshold('hum-high', gt=55, lt=75),
+            Threshold('hum-critical-high', ge=75, icon=WET_ICON),
+        ],
+    },
+    'humidity_night': {
+        'seedling': [
+            Threshold('hum-critical-low', le=30, icon=DRY_ICON),
+            Threshold('hum-low', gt=30, lt=60),
+            Threshold('hum-ideal', ge=60, le=70),
+            Threshold('hum-high', gt=70, lt=75),
+            Threshold('hum-critical-high', ge=75, icon=WET_ICON),
+        ],
+        'vegetative': [
+            Threshold('hum-critical-low', le=30, icon=DRY_ICON),
+            Threshold('hum-low', gt=30, lt=55),
+            Threshold('hum-ideal', ge=55, le=65),
+            Threshold('hum-high', gt=65, lt=75),
+            Threshold('hum-critical-high', ge=75, icon=WET_ICON),
+        ],
+        'bloom': [
+            Threshold('hum-critical-low', le=30, icon=DRY_ICON),
+            Threshold('hum-low', gt=30, le=45),
+            Threshold('hum-ideal', gt=45, le=65),
+            Threshold('hum-high', gt=65, lt=75),
+            Threshold('hum-critical-high', ge=75, icon=WET_ICON),
+        ],
+    },
+    'ph': {
+        '*': [
+            Threshold('ph-color-red', lt=2),
+            Threshold('ph-color-orange', ge=2, lt=4),
+            Threshold('ph-color-yellow', ge=4, lt=Decimal('5.5')),
+            Threshold('ph-color-green', ge=Decimal('5.5'), lt=Decimal('6.5')),
+            Threshold('ph-color-blue', ge=Decimal('6.5'), lt=Decimal('8.5')),
+            Threshold('ph-color-indigo', ge=Decimal('8.5'), lt=10),
+            Threshold('ph-color-violet', ge=10),
+        ],
+    },
+    'ec': {
+        '*': [
+            Threshold('ec-low', lt=Decimal('0.8')),
+            Threshold('ec-moderate', ge=Decimal('0.8'), lt=Decimal('1.2')),
+            Threshold('ec-mid-high', ge=Decimal('1.2'), lt=Decimal('1.4')),
+            Threshold('ec-high', ge=Decimal('1.4'), lt=Decimal('1.7')),
+            Threshold('ec-very-high', ge=Decimal('1.7'), lt=2),
+            Threshold('ec-extreme', ge=2),
+        ],
+    },
+    'carbon_dioxide': {
+        '*': [
+            Threshold('carbon-dioxide-low', lt=1000),
+            Threshold('carbon-dioxide-ideal', ge=1000, lt=1500),
+            Threshold('carbon-dioxide-high', gt=1500, lt=5000),
+            Threshold('carbon-dioxide-human-health-danger', ge=5000, lt=35000, icon=DANGER_ICON),
+            Threshold('carbon-dioxide-human-life-danger', ge=35000, icon=DANGER_ICON),
+        ],
+    },
+}
+
+
+def get_threshold_keys(metric: str, phases: np.ndarray, carbon_dioxide: np.ndarray) -> np.ndarray:
+    """
+    A function to pick the THRESHOLDS entry of a metric that applies to every log, based on its phase and co2 level.
+
+    Parameters:
+        metric (str): The name of the Log field, a key of THRESHOLDS.
+        phases (np.ndarray): The phase of every log.
+        carbon_dioxide (np.ndarray): The co2 level of every log, NaN if missing.
+
+    Returns:
+        np.ndarray: The phase key of every log, its '<phase>+co2' entry when enriched, falling back to the one for
+                    every phase ('*').
+    """
+    thresholds_by_phase: Dict[str, List[Threshold]] = THRESHOLDS[metric]
+    keys: np.ndarray = np.where(np.isin(phases, list(thresholds_by_phase)), phases, '*')
+    co2_keys: np.ndarray = np.char.add(phases, '+co2')
+    enriched: np.ndarray = np.nan_to_num(carbon_dioxide, nan=-np.inf) >= CO2_ENRICHMENT_LEVEL
+    return np.where(enriched & np.isin(co2_keys, list(thresholds_by_phase)), co2_keys, keys)
+
+
+def _match_values(threshold: Threshold, values: np.ndarray) -> np.ndarray:
+    # Threshold.matches over an array, missing values (NaN) match no threshold
+    matches: np.ndarray = ~np.isnan(values)
+    if threshold.gt is not None:
+        matches &= values > float(threshold.gt)
+    if threshold.ge is not None:
+        matches &= values >= float(threshold.ge)
+    if threshold.lt is not None:
+        matches &= values < float(threshold.lt)
+    if threshold.le is not None:
+        matches &= values <= float(threshold.le)
+    return matches
+
+
+def classify_logs(logs: List[Log]) -> List[Log]:
+    """
+    A function to classify the metrics of every log against THRESHOLDS, a metric column at a time.
+
+    Every column is read into a NumPy array once and compared against all the thresholds of the metric in
+    vectorized passes, `np.select` picking the first matching threshold of the entry that applies to each log.
+
+    Parameters:
+        logs (List[Log]): The Log objects to classify.
+
+    Returns:
+        List[Log]: The same logs with a `metric_status` dictionary set, mapping each metric of THRESHOLDS to the
+                   matching Threshold, or to None if the value is missing or falls between ranges.
+    """
+    for log in logs:
+        log.metric_status = {}
+    if not logs:
+        return logs
+
+    phases: np.ndarray = np.array([log.phase or '' for log in logs], dtype=str)
+    carbon_dioxide: np.ndarray = np.array([log.carbon_dioxide for log in logs], dtype=float)
+    for metric, thresholds_by_phase in THRESHOLDS.items():
+        values: np.ndarray = np.array([getattr(log, metric) for log in logs], dtype=float)
+        keys: np.ndarray = get_threshold_keys(metric, phases, carbon_dioxide)
+        thresholds: List[Threshold] = []
+        conditions: List[np.ndarray] = []
+        for key, key_thresholds in thresholds_by_phase.items():
+            applies: np.ndarray = keys == key
+            for threshold in key_thresholds:
+                thresholds.append(threshold)
+                conditions.append(applies & _match_values(threshold, values))
+        statuses: np.ndarray = np.select(conditions, np.arange(len(thresholds)), default=-1)
+        for log, status in zip(logs, statuses.tolist()):
+            log.metric_status[metric] = thresholds[status] if status >= 0 else None
+    return logs
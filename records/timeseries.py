@@ -0,0 +1,163 @@
+from itertools import groupby
+from typing import Dict, Iterable, List, NamedTuple, Sequence
+
+import numpy as np
+from django.db.models import Expression, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast
+
+from .analytics import SUMMARY_METRICS
+from .models import Cycle, Log, NutrientLog, ReservoirLog
+from .utils import PHASE_ORDER
+
+# metrics of the feeding of a log, loaded next to the Log fields
+FEEDING_METRICS: Dict[str, Expression] = {
+    'water': Subquery(
+        ReservoirLog.objects.filter(log=OuterRef('pk')).order_by().values('log').annotate(total=Sum('water'))
+        .values('total')
+    ),
+    'nutrients': Subquery(
+        NutrientLog.objects.filter(log=OuterRef('pk')).order_by().values('log').annotate(total=Sum('concentration'))
+        .values('total')
+    ),
+}
+# metrics overlaid by the compare view
+COMPARE_METRICS: Dict[str, str] = {
+    'temperature_day': 'Day temperature',
+    'temperature_night': 'Night temperature',
+    'humidity_day': 'Day humidity',
+    'humidity_night': 'Night humidity',
+    'ph': 'pH',
+    'ec': 'EC',
+    'water': 'Water',
+    'nutrients': 'Nutrients',
+}
+
+
+class CycleSeries(NamedTuple):
+    """
+    The logs of a cycle as NumPy columns, one element per log, in date order.
+
+    Fields:
+        ids (np.ndarray): The primary keys of the logs, int64.
+        dates (np.ndarray): The dates of the logs, datetime64[D].
+        phases (np.ndarray): The phases of the logs as PHASE_ORDER codes, int8, 0 for an unknown phase.
+        metrics (Dict[str, np.ma.MaskedArray]): Every loaded metric as float64, masked where the log has no value.
+
+    Methods:
+        get_phase_mask (np.ndarray): Returns a boolean array selecting the logs of a phase.
+        get_phase_days (np.ndarray): Returns the day in phase of every log, matching `Log.get_phase_day_in_cycle`.
+    """
+    ids: np.ndarray
+    dates: np.ndarray
+    phases: np.ndarray
+    metrics: Dict[str, np.ma.MaskedArray]
+
+    def get_phase_mask(self, phase: str) -> np.ndarray:
+        return self.phases == PHASE_ORDER.get(phase, 0)
+
+    def get_phase_days(self) -> np.ndarray:
+        # the logs of each phase keep their date order in a stable sort, so their position in it is the day in phase
+        order: np.ndarray = np.argsort(self.phases, kind='stable')
+        sorted_phases: np.ndarray = self.phases[order]
+        positions: np.ndarray = np.arange(len(order))
+        phase_starts: np.ndarray = np.flatnonzero(np.r_[True, sorted_phases[1:] != sorted_phases[:-1]])
+        days: np.ndarray = np.empty(len(order), dtype=np.int64)
+        days[order] = positions - np.repeat(phase_starts, np.diff(np.r_[phase_starts, len(order)])) + 1
+        return days
+
+
+def _get_metric_expression(metric: str) -> Expression:
+    return Cast(FEEDING_METRICS.get(metric, metric), FloatField())
+
+
+def _build_series(rows: Sequence[tuple], metrics: Sequence[str]) -> CycleSeries:
+    # rows hold the id, date and phase of a log, then its metrics
+    columns: List[tuple] = list(zip(*rows)) or [()] * (3 + len(metrics))
+
+    metric_columns: Dict[str, np.ma.MaskedArray] = {}
+    for metric, values in zip(metrics, columns[3:]):
+        # None becomes NaN in a float array
+        array = np.array(values, dtype=np.float64)
+        metric_columns[metric] = np.ma.masked_invalid(array, copy=False)
+
+    return CycleSeries(
+        ids=np.array(columns[0], dtype=np.int64),
+        dates=np.array(columns[1], dtype='datetime64[D]'),
+        phases=np.array([PHASE_ORDER.get(phase, 0) for phase in columns[2]], dtype=np.int8),
+        metrics=metric_columns,
+    )
+
+
+def load_cycle_series(cycle: Cycle, metrics: Sequence[str] = tuple(SUMMARY_METRICS)) -> CycleSeries:
+    """
+    A function to load the logs of a cycle into NumPy columns, without building model instances.
+
+    Metrics are cast to floats by the database, so no Decimal objects are created on the way, and the rows of a single
+    `values_list` query are transposed into one array per column.
+
+    Parameters:
+        cycle (Cycle): The Cycle object whose logs are loaded.
+        metrics (Sequence[str], optional): The numeric Log fields or FEEDING_METRICS to load. Defaults to every
+                                           SUMMARY_METRICS field.
+
+    Returns:
+        CycleSeries: The columns of the logs, empty arrays if the cycle has no logs.
+    """
+    return load_cycles_series([cycle.pk], metrics)[cycle.pk]
+
+
+def load_cycles_series(cycle_ids: Iterable, metrics: Sequence[str] = tuple(SUMMARY_METRICS)) -> Dict:
+    """
+    A function to load the logs of several cycles into NumPy columns in a single query.
+
+    Parameters:
+        cycle_ids (Iterable): The primary keys of the Cycle objects whose logs are loaded, as UUIDs or strings.
+        metrics (Sequence[str], optional): The numeric Log fields or FEEDING_METRICS to load. Defaults to every
+                                           SUMMARY_METRICS field.
+
+    Returns:
+        Dict: A CycleSeries for every given primary key, as a UUID, with empty arrays for cycles without logs.
+
+    Raises:
+        ValidationError: If a primary key is not a valid UUID.
+    """
+    cycle_ids = [Cycle._meta.pk.to_python(cycle_id) for cycle_id in cycle_ids]
+    rows = Log.objects.filter(cycle_id__in=cycle_ids).order_by('cycle_id', 'date', 'id').values_list(
+        'cycle_id', 'id', 'date', 'phase', *[_get_metric_expression(metric) for metric in metrics]
+    )
+    series: Dict = {cycle_id: _build_series([], metrics) for cycle_id in cycle_ids}
+    for cycle_id, cycle_rows in groupby(rows, key=lambda row: row[0]):
+        series[cycle_id] = _build_series([row[1:] for row in cycle_rows], metrics)
+    return series
+
+
+def align_by_phase_day(series: Sequence[CycleSeries],
+                       metrics: Sequence[str]) -> Dict[str, Dict[str, np.ma.MaskedArray]]:
+    """
+    A function to align the metrics of several cycles by day in phase, for overlaying them.
+
+    Parameters:
+        series (Sequence[CycleSeries]): The columns of every compared cycle, e.g. from `load_cycles_series`.
+        metrics (Sequence[str]): The metrics to align, loaded in every CycleSeries.
+
+    Returns:
+        Dict[str, Dict[str, np.ma.MaskedArray]]: For every phase any of the cycles reached, in phase order, and every
+                                                 metric, an array with a row per cycle and a column per day in phase,
+                                                 masked where the cycle has no value for that day.
+    """
+    phase_days: List[np.ndarray] = [cycle_series.get_phase_days() for cycle_series in series]
+    aligned: Dict[str, Dict[str, np.ma.MaskedArray]] = {}
+
+    for phase, code in sorted(PHASE_ORDER.items(), key=lambda item: item[1]):
+        masks: List[np.ndarray] = [cycle_series.phases == code for cycle_series in series]
+        length: int = max((int(mask.sum()) for mask in masks), default=0)
+        if not length:
+            continue
+
+        aligned[phase] = {}
+        for metric in metrics:
+            values: np.ndarray = np.full((len(series), length), np.nan)
+            for row, (cycle_series, days, mask) in enumerate(zip(series, phase_days, masks)):
+                values[row, days[mask] - 1] = cycle_series.metrics[metric].filled(np.nan)[mask]
+            aligned[phase][metric] = np.ma.masked_invalid(values, copy=False)
+    return aligned
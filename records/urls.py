@@ -1,15 +1,22 @@
-from django.urls import path
+from django.urls import path, re_path
+from django.views.static import serve
 from . import views
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .images import IMAGE_VARIANTS_DIR
+
 urlpatterns = [
     path('', views.records, name='records'),
     path('record/<uuid:pk>/', views.record, name='record'),
+    path('record/<uuid:pk>/logs/', views.log_rows, name='log_rows'),
     path('new/', views.create_or_edit_record, name='create_record'),
     path('edit/<uuid:pk>/', views.create_or_edit_record, name='edit_record'),
     path('delete/<uuid:pk>/', views.delete_record, name='delete_record'),
     path('record/phase_summary/<uuid:pk>/', views.phase_summary, name='phase_summary'),
+    path('record/phase_summary/<uuid:pk>/json/', views.phase_summary_json, name='phase_summary_json'),
+    path('compare/', views.compare_cycles, name='compare_cycles'),
+    path('export/<str:table>/', views.export_records, name='export_records'),
 
     path('record/<uuid:pk>/new-log/', views.create_log, name='create_log'),
     path('record/<uuid:pk>/edit-log/<int:log_pk>/', views.edit_log, name='edit_log'),
@@ -20,7 +27,20 @@ urlpatterns = [
          name='delete_nutrient_log'),
     path('record/<uuid:pk>/log/<int:log_pk>/delete-reservoir-log/<int:reservoir_log_pk>/', views.delete_reservoir_log,
          name='delete_reservoir_log'),
+
+    path('api/logs/', views.bulk_create_logs, name='bulk_create_logs'),
+    path('api/readings/', views.bulk_create_readings, name='bulk_create_readings'),
+    path('api/readings/<uuid:pk>/', views.sensor_readings, name='sensor_readings'),
+
+    # image variants are served ahead of the media files, with their own cache headers
+    path(f'{settings.MEDIA_URL.strip("/")}/{IMAGE_VARIANTS_DIR}/<path:path>', views.image_variant,
+         name='image_variant'),
 ]
 
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if not settings.DEBUG:
+    # static() only serves uploads while debugging, pages mostly load their variants so the originals stay in Django
+    urlpatterns += [
+        re_path(rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
+    ]
 urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
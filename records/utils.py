@@ -1,21 +1,111 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from django.http import HttpRequest
 from django.contrib import messages
-from django.db.models import Avg
+from django.db.models import Prefetch, Q, QuerySet
 
-from .models import Log
+from .models import Cycle, Log, NutrientLog
 from .forms import LogForm
+from .thresholds import classify_logs
 
+# number of logs rendered per page of the cycle table, eight weeks of daily logs
+LOGS_PER_PAGE: int = 56
+# the order logs of a cycle are listed and paginated in, Log.Meta.ordering and the records_log_cycle_order_idx index
+LOG_PAGE_ORDER: Tuple[str, ...] = ('phase_order', 'date', 'id')
+# the Log fields read for every log of the cycle to number the days of a page
+LOG_HISTORY_FIELDS: Tuple[str, ...] = ('id', 'phase_order', 'date', 'phase', 'calibration', 'light_height',
+                                      'irrigation')
+# the position of each phase, the value of Log.phase_order
+PHASE_ORDER: Dict[str, int] = {phase: order for order, (phase, _) in enumerate(Log.PHASE_CHOICES, start=1)}
 
-def calculate_average_veg_day_temp(cycle):
-    veg_logs = Log.objects.filter(cycle=cycle, phase='vegetative')
-    veg_day_temp_logs = veg_logs.exclude(temperature_day=None)
-    if veg_day_temp_logs.exists():
-        avg_day_temp = veg_day_temp_logs.aggregate(Avg('temperature_day'))['temperature_day__avg']
-    else:
-        avg_day_temp = None
-    return avg_day_temp
+
+def annotate_log_positions(logs: List[Log], history: Optional[Sequence] = None) -> List[Log]:
+    """
+    A function to assign the position in the cycle table to every log of a cycle in one ordered pass.
+
+    The values match `Log.get_day_in_cycle`, `Log.get_phase_day_in_cycle`, `Log.get_days_since_calibration` and
+    `Log.get_previous_log`, without running a query per log. Days are counted by date, then by id, calibration streaks
+    and previous logs by id.
+
+    Parameters:
+        logs (List[Log]): The Log objects to annotate, all of a single cycle.
+        history (Sequence, optional): Every log of the cycle in the Log.Meta.ordering order, as objects with the
+                                      LOG_HISTORY_FIELDS attributes, e.g. named `values_list` rows. Needed when
+                                      `logs` is only a page of the cycle. Defaults to `logs` itself.
+
+    Returns:
+        List[Log]: The same logs, in the same order, with `row_number`, `day_in_cycle`, `phase_day_in_cycle`,
+                   `days_since_calibration`, `previous_light_height` and `previous_irrigation` attributes set.
+    """
+    history = logs if history is None else history
+    positions: Dict[int, Dict] = {row.id: {'row_number': row_number} for row_number, row in enumerate(history, start=1)}
+
+    phase_counters: Dict[str, int] = {}
+    for day_in_cycle, row in enumerate(sorted(history, key=lambda row: (row.date, row.id)), start=1):
+        phase_counters[row.phase] = phase_counters.get(row.phase, 0) + 1
+        positions[row.id]['day_in_cycle'] = day_in_cycle
+        positions[row.id]['phase_day_in_cycle'] = phase_counters[row.phase]
+
+    consecutive_false_count: int = 0
+    previous_row = None
+    for row in sorted(history, key=lambda row: row.id):
+        consecutive_false_count = 0 if row.calibration else consecutive_false_count + 1
+        positions[row.id]['days_since_calibration'] = consecutive_false_count if consecutive_false_count > 0 else None
+        positions[row.id]['previous_light_height'] = previous_row.light_height if previous_row else None
+        positions[row.id]['previous_irrigation'] = previous_row.irrigation if previous_row else None
+        previous_row = row
+
+    for log in logs:
+        for name, value in positions[log.id].items():
+            setattr(log, name, value)
+    return logs
+
+
+def get_log_page(cycle: Cycle, after: Optional[int] = None, limit: int = LOGS_PER_PAGE) -> Tuple[List[Log], Optional[int]]:
+    """
+    A function to fetch one page of a cycle's logs, using keyset pagination on the LOG_PAGE_ORDER columns, the
+    Log.Meta.ordering order read from the records_log_cycle_order_idx index.
+
+    Positions, calibration streaks and previous log values are computed from a narrow query over the whole cycle, so
+    they stay correct across pages. Reservoir logs and nutrient logs with their nutrients are prefetched and metric
+    cells are classified, so a page costs a fixed number of queries.
+
+    Parameters:
+        cycle (Cycle): The Cycle object whose logs are paginated.
+        after (int, optional): The id of the last log of the previous page. Defaults to None, for the first page.
+        limit (int, optional): The maximum number of logs on the page. Defaults to LOGS_PER_PAGE.
+
+    Returns:
+        Tuple[List[Log], Optional[int]]: The logs of the page and the id to pass as `after` for the next page, or
+                                         None if this is the last page.
+
+    Raises:
+        Log.DoesNotExist: If `after` is not the id of a log of the cycle.
+    """
+    history = list(
+        Log.objects.filter(cycle=cycle).order_by(*LOG_PAGE_ORDER).values_list(*LOG_HISTORY_FIELDS, named=True)
+    )
+    logs: QuerySet = Log.objects.filter(cycle=cycle).order_by(*LOG_PAGE_ORDER)
+
+    if after is not None:
+        cursor = next((row for row in history if row.id == after), None)
+        if cursor is None:
+            raise Log.DoesNotExist(f"Log {after} does not belong to the cycle")
+        # the stored column the page is sorted on, not the phase, which a QuerySet.update() may have changed alone
+        logs = logs.filter(
+            Q(phase_order__gt=cursor.phase_order)
+            | Q(phase_order=cursor.phase_order, date__gt=cursor.date)
+            | Q(phase_order=cursor.phase_order, date=cursor.date, id__gt=cursor.id)
+        )
+
+    logs = list(logs.prefetch_related(
+        'reservoir_logs',
+        Prefetch('nutrient_logs', queryset=NutrientLog.objects.select_related('nutrient')),
+    )[:limit + 1])
+
+    next_cursor: Optional[int] = logs[limit - 1].id if len(logs) > limit else None
+    logs = classify_logs(annotate_log_positions(logs[:limit], history))
+    return logs, next_cursor
 
 
 def fill_and_submit_log_form(cycle: 'models.Cycle', initial_data: Dict[str, str], request: Optional[HttpRequest] = None) -> None:
@@ -1,21 +1,49 @@
+import os
+import time
+import uuid
 from datetime import date
+from typing import Dict, List, Optional
 
 from django.shortcuts import render, redirect, reverse, get_object_or_404
 from django.contrib import messages
 from django.http import HttpResponseBadRequest, HttpResponseRedirect, HttpRequest, HttpResponse, HttpResponseNotFound, \
-    Http404
+    Http404, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import transaction
 from django.db.models import QuerySet
-
+from django.views.static import serve
+from rest_framework import status
+from rest_framework.decorators import api_view, parser_classes
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .analytics import get_phase_summary
+from .cache import invalidate_cycle_cache, render_log_rows
+from .export import EXPORT_CONTENT_TYPES, EXPORT_FORMATS, EXPORT_TABLES, stream_export
+from .images import IMAGE_VARIANTS_DIR
 from .models import Cycle, Log, Nutrient, NutrientLog, ReservoirLog
 from .forms import CycleForm, LogForm, NutrientLogForm, ReservoirLogForm
-from .utils import calculate_average_veg_day_temp, fill_and_submit_log_form
+from .sensors import SENSOR_SCALES, append_readings, get_readings, get_rollups, parse_readings
+from .serializers import LogSerializer, NDJSONParser
+from .tasks import enqueue, refresh_cycle_summaries
+from .timeseries import COMPARE_METRICS, align_by_phase_day, load_cycles_series
+from .utils import fill_and_submit_log_form, get_log_page
+
+# the maximum number of logs accepted by a single bulk_create_logs request
+BULK_LOG_BATCH_SIZE: int = 5000
+# seconds browsers may cache image variants, their names change with the original image so they never go stale
+IMAGE_VARIANT_MAX_AGE: int = 60 * 60 * 24 * 365
 
 
 # record views
 def records(request: HttpRequest) -> HttpResponse:
     """
     A view that retrieves all Cycle objects from the database and renders them
-    in the 'records/records.html' template.
+    in the 'records/records.html' template. Each Cycle is joined with its
+    CycleSummary, so log count, current phase, last log date and feeding
+    totals of every cycle are listed in a single query.
 
     Parameters:
         request (HttpRequest):
@@ -29,7 +57,7 @@ def records(request: HttpRequest) -> HttpResponse:
             context.
     """
     try:
-        cycles = Cycle.objects.all()
+        cycles = Cycle.objects.select_related('summary')
     except Cycle.DoesNotExist:
         cycles = []
 
@@ -40,8 +68,15 @@ def records(request: HttpRequest) -> HttpResponse:
 def record(request: HttpRequest, pk: str) -> HttpResponse:
     """
     A view that retrieves a single Cycle object from the database based on the
-    given primary key (pk), along with any related Log objects, and renders
-    them in the 'records/record.html' template.
+    given primary key (pk), along with the first page of its Log objects, and
+    renders them in the 'records/record.html' template. Later pages are loaded
+    on demand from the 'log_rows' view. Rows of past weeks are served from
+    the 'records' cache, see records.cache.
+
+    Each Log carries its day in cycle, day in phase, days since calibration and
+    previous log values, reservoir logs and nutrient logs with their nutrients
+    are prefetched, and metric cells are classified against records.thresholds,
+    so the page renders in a fixed number of queries regardless of cycle length.
 
     Parameters:
         request (HttpRequest):
@@ -59,21 +94,58 @@ def record(request: HttpRequest, pk: str) -> HttpResponse:
             found in the database, a 404 HTTP response will be returned.
     """
     try:
-        cycle = Cycle.objects.get(id=pk)
+        cycle = Cycle.objects.select_related('summary').get(id=pk)
     except Cycle.DoesNotExist:
         return HttpResponseNotFound("Cycle not found")
 
-    logs = Log.objects.filter(cycle=cycle)
+    logs, next_cursor = get_log_page(cycle)
     today = date.today()
 
     context = {
         'cycle': cycle,
         'logs': logs,
+        'log_rows': render_log_rows(request, cycle, logs, today),
+        'next_cursor': next_cursor,
         'today': today
     }
     return render(request, 'records/record.html', context)
 
 
+def log_rows(request: HttpRequest, pk: str) -> HttpResponse:
+    """
+    A view that renders a page of a Cycle's Log objects as table rows, for the
+    record table to load later weeks on demand.
+
+    Parameters:
+        request (HttpRequest):
+            An HTTP request object that contains metadata about the current
+            request. The 'after' query parameter holds the id of the last Log
+            already displayed.
+        pk (str):
+            The string representation of the UUID primary key of the Cycle object
+            whose logs are rendered.
+
+    Returns:
+        JsonResponse:
+            A JSON object with the rendered 'records/log_rows.html' rows under
+            'html' and the 'after' value of the next page under 'next', or null
+            if there are no more logs. If the Cycle object or the 'after' Log is
+            not found, a 404 HTTP response will be returned, and a 400 HTTP
+            response if 'after' is not an integer.
+    """
+    try:
+        cycle = Cycle.objects.get(id=pk)
+        after = int(request.GET['after']) if request.GET.get('after') else None
+        logs, next_cursor = get_log_page(cycle, after=after)
+    except (Cycle.DoesNotExist, Log.DoesNotExist):
+        return HttpResponseNotFound("Cycle or Log not found")
+    except ValueError:
+        return HttpResponseBadRequest("Invalid cursor")
+
+    html = render_log_rows(request, cycle, logs, date.today())
+    return JsonResponse({'html': html, 'next': next_cursor})
+
+
 def create_or_edit_record(request: HttpRequest, pk: str = None) -> HttpResponse:
     """
     A view that handles the creation or editing of Cycle objects in the database.
@@ -424,11 +496,337 @@ def delete_reservoir_log(request: HttpRequest, pk: str, log_pk: int, reservoir_l
     return HttpResponseRedirect(request.META.get('HTTP_REFERER'))
 
 
+# api views
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+def bulk_create_logs(request: Request) -> Response:
+    """
+    An API view that creates a batch of Log objects from environment controller readings.
+
+    The body is either a JSON array of readings or NDJSON with one reading per
+    line, each validated with LogSerializer. Valid readings are written with
+    bulk_create in a single transaction, invalid ones are reported by their
+    position in the batch without aborting the others. A reading may carry the
+    date it was taken, e.g. buffered or backfilled data, otherwise it is dated
+    today. The summaries of the affected cycles are refreshed by the task
+    worker.
+
+    Parameters:
+        request (Request):
+            A DRF request object whose body holds the readings.
+
+    Returns:
+        Response:
+            A 201 response with the number and ids of the created logs and the
+            per-row errors, or a 400 response if the body is not a list, is
+            larger than BULK_LOG_BATCH_SIZE, or no reading is valid.
+    """
+    rows = request.data
+    if isinstance(rows, dict):
+        rows = [rows]
+    if not isinstance(rows, list):
+        return Response({'detail': 'Expected a list of logs.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(rows) > BULK_LOG_BATCH_SIZE:
+        return Response({'detail': f'A batch holds at most {BULK_LOG_BATCH_SIZE} logs.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    cycle_ids = set()
+    for row in rows:
+        try:
+            cycle_ids.add(uuid.UUID(str(row.get('cycle'))))
+        except (AttributeError, ValueError):
+            pass
+    context = {'cycles': Cycle.objects.in_bulk(cycle_ids)}
+
+    logs: List[Log] = []
+    log_dates: List[Optional[date]] = []
+    errors: List[Dict] = []
+    for index, row in enumerate(rows):
+        serializer = LogSerializer(data=row, context=context)
+        if serializer.is_valid():
+            log_dates.append(serializer.validated_data.pop('date', None))
+            logs.append(Log(**serializer.validated_data))
+        else:
+            errors.append({'index': index, 'errors': serializer.errors})
+
+    if not logs:
+        return Response({'created': 0, 'ids': [], 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        logs = Log.objects.bulk_create(logs)
+        # auto_now_add stamps the logs with today, restore the posted dates, a statement per date
+        log_ids_by_date: Dict[date, List[int]] = {}
+        for log, log_date in zip(logs, log_dates):
+            if log_date is not None:
+                log.date = log_date
+                log_ids_by_date.setdefault(log_date, []).append(log.pk)
+        for log_date, log_ids in log_ids_by_date.items():
+            Log.objects.filter(pk__in=log_ids).update(date=log_date)
+        # bulk_create sends no post_save signals
+        cycle_ids = {log.cycle_id for log in logs}
+        enqueue(refresh_cycle_summaries, list(cycle_ids))
+    for cycle_id in cycle_ids:
+        invalidate_cycle_cache(cycle_id)
+    return Response({'created': len(logs), 'ids': [log.pk for log in logs], 'errors': errors},
+                    status=status.HTTP_201_CREATED)
+
+
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+def bulk_create_readings(request: Request) -> Response:
+    """
+    An API view that appends a batch of sensor readings posted by an environment controller.
+
+    The body is either a JSON array of readings or NDJSON with one reading per
+    line, see records.sensors.parse_readings. Valid readings are inserted in
+    batches, a reading already stored for the same cycle and second is
+    skipped, and the hourly rollups and log fields they affect are updated by
+    the task worker.
+
+    Parameters:
+        request (Request):
+            A DRF request object whose body holds the readings.
+
+    Returns:
+        Response:
+            A 201 response with the number of accepted readings and the
+            per-row errors, or a 400 response if the body is not a list, is
+            larger than BULK_LOG_BATCH_SIZE, or no reading is valid.
+    """
+    rows = request.data
+    if isinstance(rows, dict):
+        rows = [rows]
+    if not isinstance(rows, list):
+        return Response({'detail': 'Expected a list of readings.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(rows) > BULK_LOG_BATCH_SIZE:
+        return Response({'detail': f'A batch holds at most {BULK_LOG_BATCH_SIZE} readings.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    cycle_ids = set()
+    for row in rows:
+        try:
+            cycle_ids.add(uuid.UUID(str(row.get('cycle'))))
+        except (AttributeError, ValueError):
+            pass
+    cycles: Dict = {str(pk): cycle for pk, cycle in Cycle.objects.in_bulk(cycle_ids).items()}
+    readings, errors = parse_readings(rows, cycles)
+    errors = [error._asdict() for error in errors]
+    if not readings:
+        return Response({'accepted': 0, 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    append_readings(readings)
+    return Response({'accepted': len(readings), 'errors': errors}, status=status.HTTP_201_CREATED)
+
+
+def sensor_readings(request: HttpRequest, pk: str) -> HttpResponse:
+    """
+    A view that returns the sensor readings of a Cycle object within a time range, as JSON.
+
+    Parameters:
+        request (HttpRequest):
+            An HTTP request object that contains metadata about the current
+            request. The 'start' and 'end' query parameters bound the range in
+            seconds since the Unix epoch, defaulting to the last 24 hours, and
+            'resolution' selects 'hourly' rollups (default) or 'raw' readings.
+        pk (str):
+            The primary key of the Cycle object.
+
+    Returns:
+        JsonResponse:
+            The 'cycle', 'start', 'end', 'resolution' and 'readings': the
+            hourly buckets of records.sensors.get_rollups, or the raw readings
+            with their values scaled back to units. If the cycle does not
+            exist, a 404 HTTP response will be returned, and a 400 HTTP
+            response if a parameter is invalid.
+    """
+    if not Cycle.objects.filter(id=pk).exists():
+        return HttpResponseNotFound("Cycle not found")
+    resolution: str = request.GET.get('resolution', 'hourly')
+    try:
+        end = int(request.GET.get('end', int(time.time())))
+        start = int(request.GET.get('start', end - 24 * 60 * 60))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid start or end")
+    if resolution not in ('hourly', 'raw') or start > end:
+        return HttpResponseBadRequest("Invalid resolution or range")
+
+    if resolution == 'hourly':
+        readings: List[Dict] = get_rollups(pk, start, end)
+    else:
+        readings = [
+            {'timestamp': row.pop('timestamp'), **{
+                metric: None if value is None else value / SENSOR_SCALES[metric] for metric, value in row.items()
+            }}
+            for row in get_readings(pk, start, end)
+        ]
+    return JsonResponse({'cycle': pk, 'start': start, 'end': end, 'resolution': resolution, 'readings': readings})
+
+
 # other views
-def phase_summary(request, pk):
-    # TODO: tests or delete it
-    cycle = Cycle.objects.get(id=pk)
-    avg_day_temp = calculate_average_veg_day_temp(cycle)
+def phase_summary(request: HttpRequest, pk: str) -> HttpResponse:
+    """
+    A view that summarizes a Cycle object by phase and renders the summary in
+    the 'records/phase_summary.html' template.
 
-    context = {'cycle': cycle, 'avg_day_temp': avg_day_temp}
-    return render(request, 'records/record.html', context)
+    Parameters:
+        request (HttpRequest):
+            An HTTP request object that contains metadata about the current
+            request.
+        pk (str):
+            The string representation of the UUID primary key of the Cycle object
+            to summarize.
+
+    Returns:
+        HttpResponse:
+            A rendered HttpResponse object that contains the rendered
+            'records/phase_summary.html' template with the Cycle object, its
+            phase summary from records.analytics as context. If the Cycle object
+            is not found, a 404 HTTP response will be returned.
+    """
+    try:
+        cycle = Cycle.objects.get(id=pk)
+    except Cycle.DoesNotExist:
+        return HttpResponseNotFound("Cycle not found")
+
+    context = {'cycle': cycle, 'phases': get_phase_summary(cycle)}
+    return render(request, 'records/phase_summary.html', context)
+
+
+def phase_summary_json(request: HttpRequest, pk: str) -> HttpResponse:
+    """
+    A view that returns the phase summary of a Cycle object as JSON.
+
+    Parameters:
+        request (HttpRequest):
+            An HTTP request object that contains metadata about the current
+            request.
+        pk (str):
+            The string representation of the UUID primary key of the Cycle object
+            to summarize.
+
+    Returns:
+        JsonResponse:
+            A JSON object with the primary key of the Cycle object under 'cycle'
+            and its phase summary from records.analytics under 'phases', dates
+            in ISO format. If the Cycle object is not found, a 404 HTTP response
+            will be returned.
+    """
+    try:
+        cycle = Cycle.objects.get(id=pk)
+    except Cycle.DoesNotExist:
+        return HttpResponseNotFound("Cycle not found")
+
+    return JsonResponse({'cycle': cycle.pk, 'phases': get_phase_summary(cycle)})
+
+
+def export_records(request: HttpRequest, table: str) -> HttpResponse:
+    """
+    A view that streams a table of the records as a CSV or Parquet download.
+
+    Rows are read from the database in chunks and encoded as the response is
+    sent, so memory use does not grow with the size of the history.
+
+    Parameters:
+        request (HttpRequest):
+            An HTTP request object that contains metadata about the current
+            request. The 'format' query parameter selects 'csv' (default) or
+            'parquet', each 'cycle' parameter restricts the export to a Cycle
+            object.
+        table (str):
+            The name of the table, one of records.export.EXPORT_TABLES.
+
+    Returns:
+        StreamingHttpResponse:
+            The table as an attachment named '<table>.<format>'. If the table,
+            the format or a 'cycle' parameter is invalid, a 400 HTTP response
+            will be returned, and a 501 HTTP response if Parquet is requested
+            without pyarrow installed.
+    """
+    export_format: str = request.GET.get('format', 'csv')
+    if table not in EXPORT_TABLES or export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest("Invalid table or format")
+    try:
+        cycle_ids = [Cycle._meta.pk.to_python(pk) for pk in request.GET.getlist('cycle')] or None
+        chunks = stream_export(table, export_format, cycle_ids)
+    except ValidationError:
+        return HttpResponseBadRequest("Invalid cycle")
+    except ImproperlyConfigured as e:
+        return HttpResponse(str(e), status=501)
+
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{table}.{export_format}"'
+    return response
+
+
+def compare_cycles(request: HttpRequest) -> HttpResponse:
+    """
+    A view that overlays the metrics and feeding of several Cycle objects,
+    aligned by day in phase, and renders them in the 'records/compare.html'
+    template.
+
+    The logs of every selected cycle are loaded with a single query by
+    records.timeseries.load_cycles_series and aligned in NumPy, so the view
+    runs in a fixed number of queries regardless of the number of cycles and
+    logs.
+
+    Parameters:
+        request (HttpRequest):
+            An HTTP request object that contains metadata about the current
+            request. Each 'cycle' query parameter holds the primary key of a
+            Cycle object to compare.
+
+    Returns:
+        HttpResponse:
+            A rendered HttpResponse object that contains the rendered
+            'records/compare.html' template with every Cycle object, the
+            selected ones and the aligned curves as context. If a 'cycle'
+            parameter is not a valid primary key, a 400 HTTP response will be
+            returned.
+    """
+    cycles: List[Cycle] = list(Cycle.objects.all())
+    cycles_by_pk: Dict = {str(cycle.pk): cycle for cycle in cycles}
+    selected_pks: List[str] = request.GET.getlist('cycle')
+    if any(pk not in cycles_by_pk for pk in selected_pks):
+        return HttpResponseBadRequest("Invalid cycle")
+
+    selected_cycles: List[Cycle] = [cycles_by_pk[pk] for pk in dict.fromkeys(selected_pks)]
+    series = load_cycles_series([cycle.pk for cycle in selected_cycles], COMPARE_METRICS)
+    aligned = align_by_phase_day([series[cycle.pk] for cycle in selected_cycles], COMPARE_METRICS)
+
+    chart_data: Dict = {
+        'cycles': [str(cycle) for cycle in selected_cycles],
+        'phases': [
+            {
+                'label': dict(Log.PHASE_CHOICES)[phase],
+                'metrics': [
+                    {'label': COMPARE_METRICS[metric], 'values': values.astype(object).filled(None).tolist()}
+                    for metric, values in metrics.items()
+                ],
+            }
+            for phase, metrics in aligned.items()
+        ],
+    }
+    context = {'cycles': cycles, 'selected_cycles': selected_cycles, 'chart_data': chart_data}
+    return render(request, 'records/compare.html', context)
+
+
+def image_variant(request: HttpRequest, path: str) -> HttpResponse:
+    """
+    A view that serves a generated variant of a featured image, cacheable by browsers for a year.
+
+    Parameters:
+        request (HttpRequest):
+            An HTTP request object that contains metadata about the current
+            request.
+        path (str):
+            The path of the variant inside the variants directory, see
+            records.images.get_variant_name.
+
+    Returns:
+        HttpResponse:
+            The image with a long-lived, immutable Cache-Control header. If
+            the variant does not exist, a 404 HTTP response will be returned.
+    """
+    response = serve(request, path, document_root=os.path.join(settings.MEDIA_ROOT, IMAGE_VARIANTS_DIR))
+    response['Cache-Control'] = f'public, max-age={IMAGE_VARIANT_MAX_AGE}, immutable'
+    return response
@@ -40,6 +40,41 @@ function create_log(pk) {
     window.location.href = url;
 }
 
+function load_log_rows(button) {
+  // Fetch the next page of rows after the last displayed log and append them to the record table
+  const url = button.getAttribute('data-href') + '?after=' + button.getAttribute('data-after');
+  $.getJSON(url, function(page) {
+    $('#record-content-table tbody').append(page.html);
+    if (page.next) {
+      button.setAttribute('data-after', page.next);
+    } else {
+      button.remove();
+    }
+    adjustTableWidth();
+  });
+}
+
+function draw_comparison_charts(data) {
+  // Draw a line chart per phase and metric, with a line per compared cycle, the x axis is the day in phase
+  const container = document.getElementById('compare-charts');
+  data.phases.forEach(function(phase) {
+    phase.metrics.forEach(function(metric) {
+      const canvas = document.createElement('canvas');
+      container.appendChild(canvas);
+      new Chart(canvas, {
+        type: 'line',
+        data: {
+          labels: metric.values[0].map(function(value, day) { return day + 1; }),
+          datasets: metric.values.map(function(values, cycle) {
+            return {label: data.cycles[cycle], data: values, spanGaps: true};
+          }),
+        },
+        options: {plugins: {title: {display: true, text: phase.label + ' - ' + metric.label}}},
+      });
+    });
+  });
+}
+
 // function incrementValue(logID) {
 //   console.log("Log ID:", logID);
 //